@@ -1,12 +1,30 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, send_file
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS
+from werkzeug.http import parse_content_range_header
 from dotenv import load_dotenv
 import os
+import time
+import uuid
 import logging
-from audio_processor import AudioProcessor
-from stt_service import SarvamSTTService
-from upload_handler import UploadHandler
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from audio_processor import AudioProcessor, TEMP_DIR
+from stt_service import SarvamSTTService, caption_segmenter
+from stt_engine import STTEngine, STTRouter, LANGUAGE_DETECTION_SECONDS
+from whisper_engine import WhisperSTTEngine
+from vad import VAD_ENABLED, VoiceActivityFilter, get_vad_stats
+from upload_handler import UploadHandler, UPLOAD_DIR, TEMP_CHUNK_DIR
+from result_cache import ResultCache
+from caption_export import EXPORT_FORMATS, write_export
+from job_manager import JobManager, JobQueueFull
+from temp_storage import TempStorageJanitor, StorageQuotaExceeded
+from shared_transcription import InFlightTranscriptions
+from live_captioning import LiveCaptioner, LiveSessionLimit, LIVE_INPUT_FORMATS
+import tracing
+from metrics import (REGISTRY, FFMPEG_EXTRACT_SECONDS, FFMPEG_STREAM_SECONDS, TRANSLATE_CAPTION_SECONDS,
+                     ASR_REUSED, JOBS_ACTIVE, LIVE_SESSIONS, TEMP_DISK_BYTES, directory_size)
 
 # Load environment variables
 load_dotenv()
@@ -21,7 +39,8 @@ CORS(app, resources={
     r"/*": {
         "origins": ["http://localhost:5173", "http://localhost:3000", "http://127.0.0.1:5173", "http://127.0.0.1:3000"],
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
+        "allow_headers": ["Content-Type", "Content-Range", "Authorization", "Range", "If-None-Match"],
+        "expose_headers": ["ETag", "Content-Range", "Accept-Ranges"],
         "supports_credentials": True
     }
 })
@@ -37,6 +56,29 @@ socketio = SocketIO(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Decode audio straight into transcription instead of writing a temp WAV first
+STREAM_AUDIO_EXTRACTION = os.getenv('STREAM_AUDIO_EXTRACTION', 'true').lower() == 'true'
+
+# Start transcribing resumable uploads while their chunks are still arriving
+PROGRESSIVE_INGEST = os.getenv('PROGRESSIVE_INGEST', 'true').lower() == 'true'
+
+# Browser/CDN cache lifetime of caption exports; revalidated with the ETag afterwards
+EXPORT_MAX_AGE = int(os.getenv('EXPORT_MAX_AGE', 3600))
+
+# Threads translating one segment into several target languages at once
+FANOUT_WORKERS = int(os.getenv('FANOUT_WORKERS', 8))
+
+# Sent when stt_router has no engine to offer (none configured, or all cooling down)
+NO_STT_ENGINE_MESSAGE = 'No speech-to-text engine is available right now, please try again later'
+
+# Uploads transcribed while arriving at once; more wait for the complete file instead
+PROGRESSIVE_MAX_STREAMS = int(os.getenv('PROGRESSIVE_MAX_STREAMS', 4))
+
+# Session ID -> handoff state of a progressive upload (see progressive_handoff)
+progressive_uploads = {}
+progressive_lock = threading.Lock()
+progressive_slots = threading.BoundedSemaphore(PROGRESSIVE_MAX_STREAMS)
+
 # Initialize STT Service
 try:
     stt_service = SarvamSTTService()
@@ -45,6 +87,52 @@ except Exception as e:
     logger.error(f"Failed to initialize STT service: {str(e)}")
     stt_service = None
 
+# Local Whisper engine, used when it meets the latency target more cheaply than the API
+whisper_engine = None
+if os.getenv('LOCAL_STT_ENABLED', 'false').lower() == 'true':
+    try:
+        whisper_engine = WhisperSTTEngine(preload=os.getenv('WHISPER_PRELOAD', 'false').lower() == 'true')
+    except Exception as e:
+        logger.error(f"Failed to initialize local Whisper engine: {str(e)}")
+
+stt_router = STTRouter([stt_service, whisper_engine])
+
+# Initialize job manager (bounded ffmpeg and job worker pools)
+job_manager = JobManager(socketio)
+
+# Reclaims temp files that jobs leak and keeps temp storage within its disk quota
+temp_storage = TempStorageJanitor(job_manager.is_active, current_owner=job_manager.current_job_id)
+temp_storage.start()
+
+# Per-language translation of each segment, and ASR shared between identical jobs
+fanout_pool = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='fanout')
+in_flight_asr = InFlightTranscriptions()
+
+# Live microphone/stream captioning on the /live namespace
+live_captioner = LiveCaptioner(
+    emit=lambda event, data, sid: job_manager.emit(event, data, to=sid, namespace='/live'),
+    translate=lambda captions, language, source: translate_captions(captions, language, source)
+)
+
+# Initialize result cache
+try:
+    result_cache = ResultCache()
+except Exception as e:
+    logger.error(f"Failed to initialize result cache: {str(e)}")
+    result_cache = None
+
+# Gauges read at scrape time
+def active_jobs():
+    stats = job_manager.get_stats()
+    return {('queued',): stats['queue_depth'], ('running',): stats['in_flight']}
+
+JOBS_ACTIVE.set_function(active_jobs)
+LIVE_SESSIONS.set_function(live_captioner.session_count)
+TEMP_DISK_BYTES.set_function(lambda: {
+    (name,): directory_size(path)
+    for name, path in (('uploads', UPLOAD_DIR), ('temp_chunks', TEMP_CHUNK_DIR), ('temp_audio', TEMP_DIR))
+})
+
 # ==================== SOCKET.IO EVENTS ====================
 
 @socketio.on('connect')
@@ -61,52 +149,186 @@ def handle_disconnect():
     """Handle client disconnection"""
     logger.info(f'Client disconnected: {request.sid}')
 
+@socketio.on('join_session')
+def handle_join_session(data):
+    """Join the rooms that receive status and captions for an upload session
+
+    `languages` picks which of the session's caption languages to receive;
+    by default all of them (every language if the session wasn't registered
+    through /upload/init).
+    """
+    session_id = (data or {}).get('session_id')
+    if not UploadHandler.is_valid_session_id(session_id):
+        return {'status': 'error', 'message': 'Invalid session ID'}
+    
+    if data.get('languages'):
+        languages = parse_languages(data['languages'])
+        if languages is None:
+            return {'status': 'error', 'message': unsupported_language_message()}
+    else:
+        languages = session_languages(UploadHandler.get_session(session_id)) or \
+            list(SarvamSTTService.LANGUAGE_CODES)
+    
+    encoding = join_language_rooms(session_id, languages, data.get('encoding'))
+    logger.info(f'Client {request.sid} joined session {session_id} ({", ".join(languages)})')
+    return {'status': 'success', 'session_id': session_id, 'encoding': encoding, 'languages': languages}
+
+@socketio.on('leave_session')
+def handle_leave_session(data):
+    """Stop receiving events for an upload session"""
+    session_id = (data or {}).get('session_id')
+    if UploadHandler.is_valid_session_id(session_id):
+        leave_room(session_id)
+        for language in SarvamSTTService.LANGUAGE_CODES:
+            leave_room(language_room(session_id, language))
+    return {'status': 'success'}
+
 @socketio.on('youtube_video')
 def handle_youtube_video(data):
-    """Handle YouTube video request"""
+    """Handle YouTube video request for one or more caption languages"""
     try:
         youtube_url = data.get('videoId')
-        language = data.get('language', 'hi')
-        
-        logger.info(f'Processing YouTube video: {youtube_url}')
-        emit('status', {'message': 'Downloading YouTube audio...'}, broadcast=False)
+        languages = parse_languages(data.get('languages') or data.get('language', 'hi'))
+        if languages is None:
+            emit('error', {'message': unsupported_language_message()}, broadcast=False)
+            return
         
-        # Extract audio from YouTube
-        audio_file = AudioProcessor.extract_audio_from_youtube(youtube_url)
-        emit('status', {'message': 'Audio extracted, starting transcription...'}, broadcast=False)
+        # Each request gets its own room so results reach only this client
+        room = f"youtube-{uuid.uuid4().hex[:12]}"
+        join_language_rooms(room, languages, data.get('encoding'))
         
-        # Get language code
-        lang_code = stt_service.LANGUAGE_CODES.get(language, 'en-IN')
+        logger.info(f'Processing YouTube video: {youtube_url} ({", ".join(languages)})')
         
-        # Transcribe audio
-        result = stt_service.transcribe_audio(audio_file, 'en-IN')
+        video_id = ResultCache.canonical_youtube_id(youtube_url)
+        engine = stt_router.select()
+        if engine is None:
+            emit('error', {'message': NO_STT_ENGINE_MESSAGE}, broadcast=False)
+            return
+        pending = replay_cached('youtube', video_id, languages, room, engine)
+        if not pending:
+            return
         
-        if result['status'] == 'success':
-            # Send captions to frontend
-            for caption in result['captions']:
-                emit('caption', caption, broadcast=False)
-            
-            emit('transcription_complete', {
-                'status': 'success',
-                'total_captions': len(result['captions']),
-                'language': language
-            }, broadcast=False)
-        else:
-            emit('error', {'message': result['message']}, broadcast=False)
+        # The download size isn't known up front, so only refuse when storage is already full
+        temp_storage.check_quota(kind='youtube')
         
-        # Cleanup
-        AudioProcessor.cleanup_temp_file(audio_file)
+        # Download, conversion and STT run on the job pools, not in this handler
+        job_id = job_manager.submit('youtube', process_youtube_video, youtube_url, pending,
+                                    video_id, room, engine, to=room)
+        emit('status', {'message': 'Queued for processing...', 'job_id': job_id, 'room': room,
+                        'languages': languages}, broadcast=False)
     
+    except (JobQueueFull, StorageQuotaExceeded) as e:
+        emit('error', {'message': str(e)}, broadcast=False)
     except Exception as e:
         logger.error(f'Error processing YouTube video: {str(e)}')
         emit('error', {'message': f'YouTube processing error: {str(e)}'}, broadcast=False)
 
+def process_youtube_video(youtube_url, languages, video_id, room, engine):
+    """Job: download and transcribe a YouTube video once, emitting captions in every language"""
+    try:
+        transcribe = functools.partial(transcribe_youtube, youtube_url, room, engine)
+        asr_result, captions = caption_languages('youtube', video_id, languages, room, engine, transcribe)
+        
+        if asr_result is not None and asr_result['status'] != 'success':
+            job_manager.emit('error', {'message': asr_result['message']}, to=room)
+            return
+        
+        store_languages('youtube', video_id, room, engine, captions, asr_result)
+    
+    except Exception as e:
+        logger.error(f'Error processing YouTube video: {str(e)}')
+        job_manager.emit('error', {'message': f'YouTube processing error: {str(e)}'}, to=room)
+        raise
+
+def transcribe_youtube(youtube_url, room, engine, on_segment, languages=None):
+    """Download a YouTube video's audio and transcribe it (see transcribe_speech)"""
+    audio_file = None
+    try:
+        job_manager.progress('download')
+        job_manager.emit('status', {'message': 'Downloading YouTube audio...'}, to=room)
+        
+        # Extract audio from YouTube
+        with FFMPEG_EXTRACT_SECONDS.time(source='youtube'), tracing.span('audio.extract', source='youtube'):
+            audio_file = job_manager.run_cpu(AudioProcessor.extract_audio_from_youtube, youtube_url)
+        temp_storage.track(audio_file)
+        job_manager.progress('transcribe')
+        job_manager.emit('status', {'message': 'Audio extracted, starting transcription...'}, to=room)
+        
+        return transcribe_speech(engine, audio_file=audio_file, on_segment=on_segment, languages=languages)
+    
+    finally:
+        # Cleanup
+        if audio_file:
+            AudioProcessor.cleanup_temp_file(audio_file)
+
 @socketio.on('get_languages')
 def handle_get_languages():
     """Return supported languages"""
-    languages = stt_service.get_supported_languages()
+    languages = SarvamSTTService.LANGUAGE_CODES
     emit('supported_languages', {'languages': languages}, broadcast=False)
 
+# ==================== LIVE CAPTIONING ====================
+
+@socketio.on('start', namespace='/live')
+def handle_live_start(data):
+    """Start captioning the audio this client sends as binary `audio` events"""
+    data = data or {}
+    languages = parse_languages(data.get('language', 'hi'))
+    spoken = parse_languages(data.get('spoken_language') or data.get('language', 'hi'))
+    if not languages or not spoken or len(languages) > 1 or len(spoken) > 1:
+        return {'status': 'error', 'message': unsupported_language_message()}
+    
+    input_format = data.get('format', 'pcm16')
+    if input_format not in LIVE_INPUT_FORMATS:
+        return {'status': 'error', 'message': f"Unsupported format. Use one of: {', '.join(LIVE_INPUT_FORMATS)}"}
+    
+    try:
+        sample_rate = int(data.get('sample_rate', 16000))
+    except (TypeError, ValueError):
+        sample_rate = 0
+    if not 8000 <= sample_rate <= 96000:
+        return {'status': 'error', 'message': 'sample_rate must be between 8000 and 96000'}
+    
+    if languages[0] != spoken[0] and stt_service is None:
+        return {'status': 'error', 'message': translation_unavailable_message(languages[0])}
+    
+    engine = stt_router.select()
+    if engine is None:
+        return {'status': 'error', 'message': NO_STT_ENGINE_MESSAGE}
+    
+    try:
+        live_captioner.start(request.sid, engine, languages[0], spoken[0], input_format, sample_rate)
+    except LiveSessionLimit as e:
+        return {'status': 'error', 'message': str(e)}
+    
+    return {
+        'status': 'success',
+        'session_id': request.sid,
+        'language': languages[0],
+        'spoken_language': spoken[0],
+        'format': input_format
+    }
+
+@socketio.on('audio', namespace='/live')
+def handle_live_audio(data):
+    """One frame of live audio; no ack, so frames can be sent back to back"""
+    if not isinstance(data, (bytes, bytearray)):
+        emit('live_error', {'message': 'audio frames must be binary'})
+        return
+    if not live_captioner.feed(request.sid, data):
+        emit('live_error', {'message': 'No live session; send start first'})
+
+@socketio.on('stop', namespace='/live')
+def handle_live_stop(data=None):
+    """Finalize the buffered audio; live_ended follows the last captions"""
+    if not live_captioner.stop(request.sid):
+        return {'status': 'error', 'message': 'No live session'}
+    return {'status': 'success'}
+
+@socketio.on('disconnect', namespace='/live')
+def handle_live_disconnect():
+    live_captioner.close(request.sid)
+
 # ==================== HTTP FILE UPLOAD ENDPOINT ====================
 
 @app.route('/upload', methods=['POST', 'OPTIONS'])
@@ -117,18 +339,20 @@ def upload_chunk():
         return '', 200
     
     try:
-        logger.info(f"Upload request received")
-        logger.info(f"Files in request: {list(request.files.keys())}")
-        logger.info(f"Form data: {list(request.form.keys())}")
+        logger.debug(f"Upload request received")
+        logger.debug(f"Files in request: {list(request.files.keys())}")
+        logger.debug(f"Form data: {list(request.form.keys())}")
         
         # Get upload parameters
         chunk_index = request.form.get('chunk_index')
         total_chunks = request.form.get('total_chunks')
         session_id = request.form.get('session_id')
         filename = request.form.get('filename')
-        language = request.form.get('language', 'hi')
+        languages = parse_languages(request.form.getlist('languages') or request.form.get('language', 'hi'))
+        chunk_size = request.form.get('chunk_size')
+        file_size = request.form.get('file_size')
         
-        logger.info(f"Parameters - chunk_index: {chunk_index}, total_chunks: {total_chunks}, session_id: {session_id}, filename: {filename}")
+        logger.debug(f"Parameters - chunk_index: {chunk_index}, total_chunks: {total_chunks}, session_id: {session_id}, filename: {filename}")
         
         # Validate parameters
         if not chunk_index or not total_chunks or not session_id or not filename:
@@ -138,15 +362,23 @@ def upload_chunk():
                 'message': 'Missing required fields: chunk_index, total_chunks, session_id, filename'
             }), 400
         
+        if languages is None:
+            return jsonify({
+                'status': 'error',
+                'message': unsupported_language_message()
+            }), 400
+        
         # Convert to integers
         try:
             chunk_index = int(chunk_index)
             total_chunks = int(total_chunks)
+            chunk_size = int(chunk_size) if chunk_size else None
+            file_size = int(file_size) if file_size else None
         except ValueError as e:
             logger.error(f"Invalid integer values: {str(e)}")
             return jsonify({
                 'status': 'error',
-                'message': 'chunk_index and total_chunks must be integers'
+                'message': 'chunk_index, total_chunks, chunk_size and file_size must be integers'
             }), 400
         
         # Check if file is in request
@@ -166,33 +398,54 @@ def upload_chunk():
                 'message': 'No file selected'
             }), 400
         
-        logger.info(f"File received: {file.filename}, MIME type: {file.content_type}")
+        logger.debug(f"File received: {file.filename}, MIME type: {file.content_type}")
+        
+        # Refuse a new upload before storing anything if it won't fit
+        if UploadHandler.is_valid_session_id(session_id) and \
+                not os.path.isdir(os.path.join(TEMP_CHUNK_DIR, session_id)):
+            try:
+                temp_storage.check_quota(file_size or (request.content_length or 0) * total_chunks)
+            except StorageQuotaExceeded as e:
+                return jsonify({'status': 'error', 'message': str(e)}), 507
         
         # Handle chunk upload
-        result = UploadHandler.handle_chunk_upload(
-            file,
-            chunk_index,
-            total_chunks,
-            session_id,
-            filename
-        )
+        with tracing.activate(upload_trace(session_id)):
+            result = UploadHandler.handle_chunk_upload(
+                file,
+                chunk_index,
+                total_chunks,
+                session_id,
+                filename,
+                chunk_size=chunk_size,
+                file_size=file_size
+            )
         
         logger.info(f"Chunk upload result: {result['status']}")
         
         # If all chunks received, process the video
         if result['status'] == 'success':
-            logger.info("All chunks received, starting background processing")
-            socketio.start_background_task(
-                process_uploaded_video,
-                result['file_path'],
-                language,
-                session_id
-            )
+            logger.info("All chunks received, queueing processing job")
+            try:
+                job_id = job_manager.submit(
+                    'upload',
+                    process_uploaded_video,
+                    result['file_path'],
+                    languages,
+                    session_id,
+                    result.get('content_hash'),
+                    to=session_id,
+                    trace_id=session_id
+                )
+            except JobQueueFull as e:
+                AudioProcessor.cleanup_temp_file(result['file_path'])
+                return jsonify({'status': 'error', 'message': str(e)}), 503
+            temp_storage.track(result['file_path'], owner=job_id)
             
             return jsonify({
                 'status': 'success',
                 'message': 'File upload complete, processing started',
-                'file_path': result['file_path']
+                'file_path': result['file_path'],
+                'job_id': job_id
             }), 200
         
         elif result['status'] == 'chunk_received':
@@ -211,65 +464,776 @@ def upload_chunk():
             'status': 'error',
             'message': str(e)
         }), 500
+
+@app.route('/upload/init', methods=['POST', 'OPTIONS'])
+def upload_init():
+    """Register a resumable upload session"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    data = request.get_json(silent=True) or {}
     
-def process_uploaded_video(file_path, language, session_id):
-    """Background task to process uploaded video"""
     try:
-        logger.info(f"Starting video processing for session {session_id}")
+        total_chunks = int(data.get('total_chunks'))
+        chunk_size = int(data.get('chunk_size'))
+        file_size = int(data['file_size']) if data.get('file_size') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({
+            'status': 'error',
+            'message': 'total_chunks and chunk_size are required integers'
+        }), 400
+    
+    if not data.get('filename'):
+        return jsonify({
+            'status': 'error',
+            'message': 'Missing required field: filename'
+        }), 400
+    
+    languages = parse_languages(data.get('languages') or data.get('language', 'hi'))
+    if languages is None:
+        return jsonify({
+            'status': 'error',
+            'message': unsupported_language_message()
+        }), 400
+    
+    # Resumed sessions already hold their space
+    if not UploadHandler.get_session(data.get('session_id')):
+        try:
+            temp_storage.check_quota(file_size or 0)
+        except StorageQuotaExceeded as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 507
+    
+    result = UploadHandler.create_session(
+        data['filename'],
+        total_chunks,
+        chunk_size,
+        file_size=file_size,
+        languages=languages,
+        session_id=data.get('session_id')
+    )
+    
+    return jsonify(result), 200 if result['status'] == 'success' else 400
+
+@app.route('/upload/<session_id>/status', methods=['GET'])
+def upload_status(session_id):
+    """Return the bitmap of received chunks so clients can resume"""
+    result = UploadHandler.get_session_status(session_id)
+    return jsonify(result), 200 if result['status'] == 'success' else 404
+
+@app.route('/upload/<session_id>/chunks/<int:chunk_index>', methods=['PUT', 'OPTIONS'])
+def upload_session_chunk(session_id, chunk_index):
+    """Idempotently store one chunk of a registered session, in any order"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    metadata = UploadHandler.get_session(session_id)
+    if not metadata:
+        return jsonify({
+            'status': 'error',
+            'message': 'Upload session not found'
+        }), 404
+    
+    if 'file' not in request.files:
+        return jsonify({
+            'status': 'error',
+            'message': 'No file in request'
+        }), 400
+    
+    with tracing.activate(upload_trace(session_id)):
+        result = UploadHandler.put_chunk(session_id, chunk_index, request.files['file'].stream)
+    return session_chunk_response(result, metadata, session_id)
 
-        # Extract audio from the video file
-        audio_file = AudioProcessor.extract_audio_from_file(file_path)
+@app.route('/upload/<session_id>', methods=['PUT', 'OPTIONS'])
+def upload_session_range(session_id):
+    """Stream a raw application/octet-stream chunk addressed by Content-Range
+    
+    The body goes straight from the WSGI input to its offset in the partial
+    file, skipping multipart parsing and the intermediate spool file.
+    """
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    metadata = UploadHandler.get_session(session_id)
+    if not metadata:
+        return jsonify({
+            'status': 'error',
+            'message': 'Upload session not found'
+        }), 404
+    
+    content_range = parse_content_range_header(request.headers.get('Content-Range'))
+    if not content_range or content_range.units != 'bytes':
+        return jsonify({
+            'status': 'error',
+            'message': 'Content-Range header required, e.g. "bytes 0-5242879/104857600"'
+        }), 400
+    
+    # The total is fixed when the session is created; every range must agree with it
+    file_size = metadata.get('file_size')
+    if content_range.length != file_size:
+        return jsonify({
+            'status': 'error',
+            'message': f'Content-Range total must be the session file_size ({file_size})'
+        }), 416
+    
+    # Ranges must line up with the session's chunk grid
+    chunk_size = metadata['chunk_size']
+    chunk_index = content_range.start // chunk_size
+    expected_stop = min(content_range.start + chunk_size, file_size)
+    
+    if content_range.start % chunk_size or content_range.stop != expected_stop:
+        return jsonify({
+            'status': 'error',
+            'message': f'Content-Range must cover exactly one chunk of {chunk_size} bytes'
+        }), 416
+    
+    if request.content_length != content_range.stop - content_range.start:
+        return jsonify({
+            'status': 'error',
+            'message': 'Content-Length does not match Content-Range'
+        }), 400
+    
+    with tracing.activate(upload_trace(session_id)):
+        result = UploadHandler.put_chunk(session_id, chunk_index, request.stream)
+    return session_chunk_response(result, metadata, session_id)
 
-        # Get language code mapping, default to Hindi if missing
-        target_lang_code = stt_service.LANGUAGE_CODES.get(language, 'hi-IN')
+def upload_trace(session_id):
+    """Trace shared by an upload session's chunk requests and its processing job"""
+    if not UploadHandler.is_valid_session_id(session_id):
+        return None
+    return tracing.tracer.start(session_id, 'upload')
 
-        # 1. Transcribe audio to English always
-        asr_result = stt_service.transcribe_audio(audio_file, 'en-IN')
+def session_chunk_response(result, metadata, session_id):
+    """Turn a put_chunk result into a response, starting processing on completion"""
+    if result['status'] == 'success':
+        state, finished = progressive_handoff(session_id, upload=result)
+        if state is not None:
+            # Already being transcribed; hand over the finished file
+            if finished:
+                # The progressive job has already ended, so finishing needs a job of its own
+                try:
+                    result['job_id'] = job_manager.submit('upload', finish_progressive_upload, session_id, state,
+                                                          to=session_id, trace_id=session_id)
+                except JobQueueFull as e:
+                    AudioProcessor.cleanup_temp_file(result['file_path'])
+                    return jsonify({'status': 'error', 'message': str(e)}), 503
+                temp_storage.track(result['file_path'], owner=result['job_id'])
+            else:
+                # The progressive job finishes the session itself when its transcription ends
+                temp_storage.track(result['file_path'], owner=state['job_id'])
+            return jsonify(result), 200
+        
+        logger.info(f"All chunks received for session {session_id}, queueing processing job")
+        try:
+            result['job_id'] = job_manager.submit(
+                'upload',
+                process_uploaded_video,
+                result['file_path'],
+                session_languages(metadata),
+                session_id,
+                result.get('content_hash'),
+                to=session_id,
+                trace_id=session_id
+            )
+        except JobQueueFull as e:
+            AudioProcessor.cleanup_temp_file(result['file_path'])
+            return jsonify({'status': 'error', 'message': str(e)}), 503
+        temp_storage.track(result['file_path'], owner=result['job_id'])
+        return jsonify(result), 200
+    
+    elif result['status'] == 'chunk_received':
+        maybe_start_progressive_ingest(metadata, session_id)
+        return jsonify(result), 200
+    
+    else:
+        return jsonify(result), 400
 
-        if asr_result['status'] != 'success':
-            logger.error(f"Transcription failed: {asr_result.get('message', 'STT failed')}")
-            socketio.emit('error', {'message': asr_result.get('message', 'STT failed')}, namespace='/')
+def maybe_start_progressive_ingest(metadata, session_id):
+    """Start transcribing before the upload finishes if the container allows it"""
+    if not PROGRESSIVE_INGEST or not metadata.get('file_size'):
+        return
+    
+    # Needs chunk 0 to inspect the container; decide only once per session
+    if 0 not in UploadHandler.get_received_chunks(session_id):
+        return
+    if not UploadHandler.claim_progressive_ingest(session_id):
+        return
+    
+    header = UploadHandler.read_session_header(session_id)
+    if not AudioProcessor.supports_progressive_decode(header, metadata['filename']):
+        logger.info(f"Session {session_id} can't be decoded progressively, waiting for full upload")
+        return
+    
+    prune_progressive_uploads()
+    
+    # Registered before submitting, so a final chunk landing meanwhile is handed to this job
+    state = {
+        'job_id': None,
+        'languages': session_languages(metadata),
+        'upload': None,
+        'transcription': None
+    }
+    with progressive_lock:
+        progressive_uploads[session_id] = state
+    
+    try:
+        state['job_id'] = job_manager.submit('progressive_upload', process_progressive_upload, session_id,
+                                             metadata, to=session_id, trace_id=session_id)
+        # Keep the session from being evicted while it is being read
+        temp_storage.track(os.path.join(TEMP_CHUNK_DIR, session_id), owner=state['job_id'])
+    except JobQueueFull:
+        with progressive_lock:
+            progressive_uploads.pop(session_id, None)
+        logger.warning(f"Job queue full, session {session_id} will be processed after upload")
+        if state['upload']:
+            # The final chunk already handed its file to this session
+            try:
+                job_id = job_manager.submit('upload', process_uploaded_video, state['upload']['file_path'],
+                                            state['languages'], session_id, state['upload'].get('content_hash'),
+                                            to=session_id, trace_id=session_id)
+                temp_storage.track(state['upload']['file_path'], owner=job_id)
+            except JobQueueFull as e:
+                AudioProcessor.cleanup_temp_file(state['upload']['file_path'])
+                job_manager.emit('error', {'message': str(e)}, to=session_id)
+
+def progressive_handoff(session_id, **half):
+    """
+    Record one half of a progressive upload: upload=<finished upload result>
+    or transcription=<(ASR result, captions, engine)>
+
+    Neither side waits for the other; whichever finishes second finishes the
+    session with finish_progressive_upload.
+
+    Returns:
+        Tuple of (state, finished): state is None if the session isn't being
+        processed progressively; finished is True once both halves are in,
+        and the caller must then finish the session
+    """
+    with progressive_lock:
+        state = progressive_uploads.get(session_id)
+        if state is None:
+            return None, False
+        state.update(half)
+        finished = state['upload'] is not None and state['transcription'] is not None
+        if finished:
+            del progressive_uploads[session_id]
+        return state, finished
+
+def prune_progressive_uploads():
+    """Forget progressive sessions whose upload was abandoned or reaped after their job ended"""
+    with progressive_lock:
+        for session_id in [s for s, state in progressive_uploads.items()
+                           if state['transcription'] is not None and UploadHandler.get_session(s) is None]:
+            del progressive_uploads[session_id]
+
+def process_uploaded_video(file_path, languages, session_id, content_hash=None):
+    """Job: process an uploaded video, transcribing once for every caption language"""
+    try:
+        logger.info(f"Starting video processing for session {session_id} ({', '.join(languages)})")
+
+        engine = stt_router.select()
+        if engine is None:
+            logger.error(f"No STT engine for session {session_id}")
+            job_manager.emit('error', {'message': NO_STT_ENGINE_MESSAGE}, to=session_id)
+            AudioProcessor.cleanup_temp_file(file_path)
             return
+        transcribe = functools.partial(transcribe_file, engine, file_path=file_path)
+        asr_result, captions = caption_languages('upload', content_hash, languages, session_id, engine, transcribe)
 
-        # 2. Translate each caption if requested language is non-English
-        if language != 'en':
-            translated_captions = []
-            for cap in asr_result['captions']:
-                translated = stt_service.translate_text(cap['text'], target_lang_code, 'en-IN')
-                caption_obj = {
-                    'text': translated,
-                    'start_time': cap['start_time'],
-                    'end_time': cap['end_time'],
-                    'confidence': cap.get('confidence', 0.0)
-                }
-                translated_captions.append(caption_obj)
-                # 3. Emit each caption as soon as it's ready for real-time frontend update
-                socketio.emit('caption', caption_obj, namespace='/')
-        else:
-            translated_captions = asr_result['captions']
-            for cap in translated_captions:
-                socketio.emit('caption', cap, namespace='/')
+        if asr_result is not None and asr_result['status'] != 'success':
+            logger.error(f"Transcription failed: {asr_result.get('message', 'STT failed')}")
+            job_manager.emit('error', {'message': asr_result.get('message', 'STT failed')}, to=session_id)
+            return
 
         # Notify frontend transcription complete
-        socketio.emit('transcription_complete', {
-            'status': 'success',
-            'message': f'Processed {len(translated_captions)} captions in {language}',
-            'total_captions': len(translated_captions),
-            'language': language
-        }, namespace='/')
+        store_languages('upload', content_hash, session_id, engine, captions, asr_result)
 
         # Cleanup temporary files
-        AudioProcessor.cleanup_temp_file(audio_file)
         AudioProcessor.cleanup_temp_file(file_path)
 
     except Exception as e:
         logger.error(f"Error in background processing: {str(e)}", exc_info=True)
-        socketio.emit('error', {'message': str(e)}, namespace='/')
+        job_manager.emit('error', {'message': str(e)}, to=session_id)
+        raise
+
+def process_progressive_upload(session_id, metadata):
+    """Job: transcribe an upload while its chunks are still arriving
+
+    The job ends as soon as transcription does; if the upload is still
+    arriving, its final chunk queues finish_progressive_upload.
+    """
+    languages = session_languages(metadata)
+    engine = stt_router.select()
+    if engine is None:
+        # Nothing was sent yet; the complete file asks stt_router again
+        asr_result, captions = {'status': 'error', 'message': NO_STT_ENGINE_MESSAGE}, {}
+    elif not progressive_slots.acquire(blocking=False):
+        asr_result, captions = {'status': 'error', 'message': 'Too many uploads streaming'}, {}
+    else:
+        try:
+            asr_result, captions = stream_progressive_upload(session_id, languages, engine)
+        finally:
+            progressive_slots.release()
+
+    if asr_result['status'] != 'success':
+        logger.warning(f"Progressive processing failed for session {session_id}: {asr_result.get('message')}")
+        # The complete file is transcribed again; clients drop what they already got
+        if captions is None or any(captions.values()):
+            emit_captions_reset(session_id, languages)
+
+    state, finished = progressive_handoff(session_id, transcription=(asr_result, captions or {}, engine))
+    if finished:
+        finish_progressive_upload(session_id, state)
+        return
+
+    if state is not None and asr_result['status'] != 'success' and UploadHandler.is_session_stalled(session_id):
+        # Nothing will complete this upload, so don't keep its session around
+        with progressive_lock:
+            abandoned = progressive_uploads.get(session_id) is state and state['upload'] is None
+            if abandoned:
+                del progressive_uploads[session_id]
+        if abandoned and UploadHandler.get_session(session_id):
+            logger.error(f"Upload {session_id} stalled, abandoning it")
+            UploadHandler.cleanup_session(session_id)
+            job_manager.emit('error', {'message': 'Upload stalled, please upload the file again'}, to=session_id)
+
+def stream_progressive_upload(session_id, languages, engine):
+    """Caption an upload's chunks as they arrive; returns (ASR result dict, captions by language or None)"""
+    logger.info(f"Starting progressive processing for session {session_id} with {engine.name}")
+
+    # Shared by the chunk reader and ffmpeg, so neither outlives the stream
+    stop = threading.Event()
+    captions = None
+    try:
+        frames = timed_stream(AudioProcessor.stream_audio_from_chunks(
+            UploadHandler.iter_contiguous_bytes(session_id, stop=stop),
+            label=f"upload {session_id}",
+            stop=stop
+        ), 'upload')
+        # The content hash isn't known until the upload completes, so nothing to look up or share yet
+        transcribe = functools.partial(transcribe_file, engine, frames=frames)
+        asr_result, captions = caption_languages('upload', None, languages, session_id, engine, transcribe)
+    except Exception as e:
+        asr_result = {'status': 'error', 'message': str(e)}
+    finally:
+        stop.set()
+    return asr_result, captions
+
+def finish_progressive_upload(session_id, state):
+    """Store a progressive upload's captions, or transcribe the complete file if streaming failed"""
+    upload_result = state['upload']
+    asr_result, captions, engine = state['transcription']
+    file_path = upload_result['file_path']
+    temp_storage.track(file_path)
+
+    if asr_result['status'] == 'success':
+        store_languages('upload', upload_result.get('content_hash'), session_id, engine, captions, asr_result)
+        AudioProcessor.cleanup_temp_file(file_path)
+    else:
+        # e.g. a container ffmpeg couldn't decode from a pipe
+        logger.warning(f"Falling back to the complete file for session {session_id}")
+        process_uploaded_video(file_path, state['languages'], session_id, upload_result.get('content_hash'))
+
+def caption_languages(kind, content_id, languages, room, engine, transcribe):
+    """
+    Caption content in several languages from a single ASR pass
+
+    Languages with a stored track are replayed from the result cache. The
+    rest are translated from one transcription: the stored ASR track if
+    there is one (English, or a detected spoken language), else a new ASR
+    pass whose segments are fanned out to every language as they finish. That pass is in English, or in the spoken
+    language when detection finds it is one of the pending languages, which
+    then needs no translation. An identical job already transcribing the
+    same content is followed instead of transcribing again.
+
+    Args:
+        kind: 'upload' or 'youtube'
+        content_id: Content hash or YouTube video ID; None disables the cache and sharing
+        languages: Caption language keys from LANGUAGE_CODES
+        room: Base Socket.IO room; captions go to its per-language rooms
+        engine: STT engine chosen by stt_router
+        transcribe: Callable(on_segment, languages=...) that runs ASR and returns the ASR result dict
 
+    Returns:
+        Tuple of (ASR result dict or None if ASR didn't run, dict of language -> captions emitted)
+        for the languages that weren't replayed
+    """
+    pending = replay_cached(kind, content_id, languages, room, engine)
+    if not pending:
+        return None, {}
 
+    # Transcribed before for another language: only translation is left
+    source = get_cached_transcription(kind, content_id, pending, engine)
+    if source is not None:
+        source_language, source_captions = source
+        ASR_REUSED.inc(source='cache')
+        job_manager.progress('translate')
+        targets = drop_untranslatable(pending, source_language, room)
+        return None, fan_out_captions(source_captions, targets, room, source_language)
 
+    captions = {language: [] for language in pending}
+    targets = list(pending)
+
+    def on_segment(segment_result):
+        source = language_key(segment_result.get('language'))
+        targets[:] = drop_untranslatable(targets, source, room)
+        for language, translated in fan_out_captions(segment_result['captions'], targets, room, source).items():
+            captions[language].extend(translated)
+
+    key = (kind, content_id, engine.STT_MODEL) if content_id else None
+    asr_result = in_flight_asr.run(key, functools.partial(transcribe, languages=pending), on_segment)
+    return asr_result, {language: captions[language] for language in targets}
+
+def drop_untranslatable(languages, source, room):
+    """Without the Sarvam service only the source language can be captioned; report the rest
+
+    Returns:
+        Languages that can still be captioned from `source`
+    """
+    if stt_service is not None:
+        return languages
+    for language in languages:
+        if language != source:
+            job_manager.emit('error', {'message': translation_unavailable_message(language), 'language': language},
+                             to=language_room(room, language))
+    return [language for language in languages if language == source]
+
+def transcribe_file(engine, on_segment, languages=None, file_path=None, frames=None):
+    """
+    Transcribe a video file, or PCM frames already decoded from one (see transcribe_speech)
+
+    Args:
+        engine: STT engine chosen by stt_router
+        on_segment: Callback for each finished segment, in order
+        languages: Caption language keys the audio may be transcribed in directly
+        file_path: Video file to extract audio from
+        frames: PCM frames to transcribe instead of extracting from file_path
+
+    Returns:
+        ASR result dict
+    """
+    audio_file = None
+    try:
+        if frames is not None:
+            # Decoded from an upload still arriving, so mostly waiting on the network;
+            # progressive_slots bounds these ffmpeg processes instead of the ffmpeg slots
+            job_manager.progress('transcribe')
+            return transcribe_speech(engine, frames=frames, on_segment=on_segment, languages=languages)
+        elif STREAM_AUDIO_EXTRACTION:
+            job_manager.progress('transcribe')
+            frames = timed_stream(AudioProcessor.stream_audio_from_file(file_path), 'file')
+            # The ffmpeg process lives as long as the stream, so it holds an ffmpeg slot throughout
+            with job_manager.cpu_slot():
+                return transcribe_speech(engine, frames=frames, on_segment=on_segment, languages=languages)
+        else:
+            job_manager.progress('extract')
+            with FFMPEG_EXTRACT_SECONDS.time(source='file'), tracing.span('audio.extract', source='file'):
+                audio_file = job_manager.run_cpu(AudioProcessor.extract_audio_from_file, file_path)
+            temp_storage.track(audio_file)
+            job_manager.progress('transcribe')
+            return transcribe_speech(engine, audio_file=audio_file, on_segment=on_segment, languages=languages)
+    finally:
+        if audio_file:
+            AudioProcessor.cleanup_temp_file(audio_file)
+
+def timed_stream(frames, source):
+    """Pass frames through, recording decode time to the first frame and to the end of the stream"""
+    started = time.perf_counter()
+    first = True
+    try:
+        for frame in frames:
+            if first:
+                FFMPEG_STREAM_SECONDS.observe(time.perf_counter() - started, source=source, stage='first_frame')
+                first = False
+            yield frame
+        FFMPEG_STREAM_SECONDS.observe(time.perf_counter() - started, source=source, stage='total')
+    finally:
+        # Stops ffmpeg right away when the consumer gives up early
+        frames.close()
+
+@tracing.traced('stt.transcribe')
+def transcribe_speech(engine, frames=None, audio_file=None, on_segment=None, languages=None):
+    """
+    Transcribe PCM frames or an extracted WAV file
+
+    Speech is transcribed to English, unless spoken-language detection on
+    its first seconds finds one of `languages`; then it is transcribed in
+    that language directly and needs no translation for it. Every segment
+    and the result carry the ASR 'language' code.
+
+    With VAD_ENABLED, silence and other non-speech audio is dropped before it
+    reaches the engine, and caption times are mapped back to the source.
+
+    Args:
+        engine: STT engine chosen by stt_router
+        frames: Iterable of (offset_seconds, pcm_bytes)
+        audio_file: WAV file to transcribe when frames is None
+        on_segment: Optional callback for each finished segment, in order
+        languages: Caption language keys the audio may be transcribed in directly
+
+    Returns:
+        ASR result dict
+    """
+    candidates = [SarvamSTTService.LANGUAGE_CODES[language] for language in languages or [] if language != 'en']
+    language_code = 'en-IN'
+
+    def identify(frames):
+        language_code, frames = engine.identify_language(frames, candidates)
+        if language_code != 'en-IN':
+            job_manager.progress('transcribe', f'Speech is in {language_code}, transcribing without translation')
+        return language_code, frames
+
+    def on_language_segment(segment_result):
+        segment_result['language'] = language_code
+        if on_segment:
+            on_segment(segment_result)
+
+    if frames is None:
+        if not VAD_ENABLED or not audio_file.lower().endswith('.wav'):
+            if candidates and audio_file.lower().endswith('.wav'):
+                language_code, _ = identify(STTEngine.iter_wav_windows(audio_file, LANGUAGE_DETECTION_SECONDS))
+            asr_result = engine.transcribe_audio_segmented(audio_file, language_code)
+            if asr_result['status'] == 'success':
+                on_language_segment(asr_result)
+            return asr_result
+        frames = STTEngine.iter_wav_windows(audio_file)
+
+    if not VAD_ENABLED:
+        language_code, frames = identify(frames)
+        return engine.transcribe_stream(frames, language_code, on_segment=on_language_segment)
+
+    speech = VoiceActivityFilter()
+
+    def on_speech_segment(segment_result):
+        speech.remap_captions(segment_result['captions'])
+        on_language_segment(segment_result)
+
+    # Identify on speech only, so a silent or musical intro doesn't decide the language
+    language_code, speech_frames = identify(speech.filter(frames))
+    asr_result = engine.transcribe_stream(speech_frames, language_code, on_segment=on_speech_segment)
+
+    if asr_result['status'] != 'success' and speech.finished and not speech.speech_seconds:
+        # Nothing but silence, so nothing to caption
+        return {
+            'status': 'success',
+            'text': '',
+            'confidence': 0.0,
+            'captions': [],
+            'language': language_code
+        }
+
+    return asr_result
+
+def fan_out_captions(captions, languages, room, source='en'):
+    """
+    Translate one batch of captions in `source` into every language and emit each to its room
+
+    Languages are translated concurrently on the fan-out pool and emitted
+    as each finishes, so a slow language doesn't hold back the others.
+
+    Returns:
+        Dict of language -> translated captions
+    """
+    if len(languages) == 1:
+        finished = [(languages[0], translate_captions(captions, languages[0], source))]
+    else:
+        translate = tracing.wrap(translate_captions)
+        futures = {fanout_pool.submit(translate, captions, language, source): language for language in languages}
+        finished = ((futures[future], future.result()) for future in as_completed(futures))
+
+    translated_by_language = {}
+    for language, translated in finished:
+        # Emitted from the job thread so first-caption timing is attributed to the job
+        emit_captions(translated, language, room)
+        translated_by_language[language] = translated
+    return translated_by_language
+
+def translate_captions(captions, language, source='en'):
+    """Translate captions from the source language into language (returned as-is when they match)"""
+    if language == source or not captions:
+        return captions
+    if stt_service is None:
+        raise RuntimeError(translation_unavailable_message(language))
+
+    # Get language code mapping, default to Hindi if missing
+    target_lang_code = stt_service.LANGUAGE_CODES.get(language, 'hi-IN')
+    started = time.perf_counter()
+    # One line each, so line breaks don't split packed batches; wrapped again for the target language
+    translated_texts = stt_service.translate_batch(
+        [' '.join(cap['text'].split()) for cap in captions], target_lang_code, stt_service.LANGUAGE_CODES[source]
+    )
+    # Every caption in the batch waited for the whole call
+    TRANSLATE_CAPTION_SECONDS.observe(time.perf_counter() - started, count=len(captions),
+                                      target=target_lang_code)
+    return [
+        {
+            'text': caption_segmenter.wrap_text(translated),
+            'start_time': cap['start_time'],
+            'end_time': cap['end_time'],
+            'confidence': cap.get('confidence', 0.0)
+        }
+        for cap, translated in zip(captions, translated_texts)
+    ]
 
+def emit_captions(captions, language, room):
+    """Emit captions to the subscribers of one language, tagged with that language"""
+    # Queued per caption; the job manager coalesces them into caption_batch frames
+    to = language_room(room, language)
+    for cap in captions:
+        job_manager.emit_caption(dict(cap, language=language), to=to)
 
+def emit_captions_reset(room, languages):
+    """Tell clients to drop the captions they have for a room, before they are sent again"""
+    for language in languages:
+        job_manager.emit('captions_reset', {'language': language}, to=language_room(room, language))
+
+def replay_cached(kind, content_id, languages, room, engine):
+    """
+    Replay stored caption tracks to their language rooms
+
+    Returns:
+        Languages without a stored track, still to be captioned
+    """
+    pending = []
+    for language in languages:
+        cached = get_cached_result(kind, content_id, language, engine)
+        if cached is None:
+            pending.append(language)
+            continue
+        emit_captions(cached, language, room)
+        emit_transcription_complete(len(cached), language, language_room(room, language), cached=True,
+                                    track_id=caption_track_id(kind, content_id, language, engine))
+    return pending
+
+def store_languages(kind, content_id, room, engine, captions_by_language, asr_result=None):
+    """Store each language's track and tell its subscribers it is complete
+
+    The ASR track is stored too, in the language it was transcribed in, so
+    a later job asking for another language of the same content only needs
+    translation.
+    """
+    asr_captions = asr_result.get('captions') if asr_result else None
+    asr_language = language_key(asr_result.get('language')) if asr_result else None
+    if asr_captions and asr_language not in captions_by_language:
+        store_result(kind, content_id, asr_language, asr_captions, engine, transcribed=True)
+
+    for language, captions in captions_by_language.items():
+        track_id = store_result(kind, content_id, language, captions, engine, transcribed=language == asr_language)
+        emit_transcription_complete(len(captions), language, language_room(room, language), track_id=track_id)
+
+def emit_transcription_complete(total_captions, language, room, cached=False, track_id=None):
+    """Notify the room's clients that transcription is complete
+
+    track_id, when the track was stored, lets clients download it from /captions/<track_id>.<format>
+    """
+    job_manager.emit('transcription_complete', {
+        'status': 'success',
+        'message': f'Processed {total_captions} captions in {language}',
+        'total_captions': total_captions,
+        'language': language,
+        'cached': cached,
+        'track_id': track_id
+    }, to=room)
+
+def caption_model_version(engine):
+    """Version of the models behind a caption track: ASR engine, translation and segmentation"""
+    return f"{engine.STT_MODEL}+{SarvamSTTService.TRANSLATION_VERSION}+{caption_segmenter.version}"
+
+@tracing.traced('result_cache.lookup')
+def get_cached_result(kind, content_id, language, engine):
+    """Return a stored caption track for this content, or None"""
+    if not result_cache or not engine or not content_id:
+        return None
+    return result_cache.get(kind, content_id, language, caption_model_version(engine))
+
+@tracing.traced('result_cache.lookup')
+def get_cached_transcription(kind, content_id, pending, engine):
+    """Return a stored ASR track of this content as (language, captions), or None
+
+    Any language may hold it: English, or the spoken language when it was
+    transcribed directly. Pending languages have no stored track at all.
+    """
+    if not result_cache or not engine or not content_id:
+        return None
+    candidates = [language for language in SarvamSTTService.LANGUAGE_CODES if language not in pending]
+    # English first: it is what most passes are transcribed in
+    candidates.sort(key=lambda language: language != 'en')
+    return result_cache.find_transcribed(kind, content_id, candidates, caption_model_version(engine))
+
+@tracing.traced('result_cache.store')
+def store_result(kind, content_id, language, captions, engine, transcribed=False):
+    """Store a finished caption track for reuse; returns its track ID or None
+
+    transcribed marks the ASR output, which later jobs translate from
+    """
+    if result_cache and engine and content_id and captions:
+        result_cache.put(kind, content_id, language, caption_model_version(engine), captions, transcribed)
+        return caption_track_id(kind, content_id, language, engine)
+    return None
+
+def caption_track_id(kind, content_id, language, engine):
+    """Track ID of a stored caption track, for export downloads"""
+    if not result_cache or not engine:
+        return None
+    return ResultCache.track_id(kind, content_id, language, caption_model_version(engine))
+
+def parse_languages(value):
+    """
+    Normalize requested caption languages
+
+    Args:
+        value: Language key, comma-separated keys or a list of either
+
+    Returns:
+        List of LANGUAGE_CODES keys without duplicates, in request order,
+        or None if any is unsupported
+    """
+    if isinstance(value, str):
+        value = [value]
+
+    languages = []
+    for language in (part.strip() for item in value or [] for part in str(item).split(',')):
+        if language not in SarvamSTTService.LANGUAGE_CODES:
+            return None
+        if language not in languages:
+            languages.append(language)
+    return languages or None
+
+def unsupported_language_message():
+    return f"Unsupported language. Use any of: {', '.join(SarvamSTTService.LANGUAGE_CODES)}"
+
+def translation_unavailable_message(language):
+    return f"Translation service unavailable, so {language} captions can't be produced"
+
+def session_languages(metadata):
+    """Caption languages of an upload session (sessions from before multi-language have just one)"""
+    if not metadata:
+        return None
+    return metadata.get('languages') or [metadata.get('language', 'hi')]
+
+def language_key(language_code):
+    """LANGUAGE_CODES key of an ASR language code, e.g. 'hi' for 'hi-IN' (English if unknown)"""
+    for language, code in SarvamSTTService.LANGUAGE_CODES.items():
+        if code == language_code:
+            return language
+    return 'en'
+
+def language_room(room, language):
+    """Room that receives one language's captions for a job's room"""
+    return f"{room}:{language}"
+
+def join_language_rooms(room, languages, encoding=None):
+    """
+    Join a job's room (status, progress) and its rooms for each caption language
+
+    Returns:
+        The caption_batch encoding the rooms will use
+    """
+    join_room(room)
+    encoding = job_manager.set_encoding(room, encoding)
+    for language in languages:
+        join_room(language_room(room, language))
+        job_manager.set_encoding(language_room(room, language), encoding)
+    return encoding
 
 # ==================== REGULAR ROUTES ====================
 
@@ -288,7 +1252,132 @@ def health():
         "status": "healthy",
         "stt_service": "active" if stt_service else "inactive",
         "service_name": "Sarvam AI",
-        "uploads": UploadHandler.get_upload_stats()
+        "uploads": UploadHandler.get_upload_stats(),
+        "translation_cache": stt_service.translation_cache.get_stats()
+            if stt_service and stt_service.translation_cache else None,
+        "sarvam_api": stt_service.client.get_stats() if stt_service else None,
+        "stt_engines": stt_router.get_stats(),
+        "vad": get_vad_stats(),
+        "result_cache": result_cache.get_stats() if result_cache else None,
+        "shared_asr": in_flight_asr.get_stats(),
+        "live": live_captioner.get_stats(),
+        "temp_storage": temp_storage.get_stats(),
+        "jobs": job_manager.get_stats()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text-format metrics"""
+    return Response(REGISTRY.render(), content_type=REGISTRY.CONTENT_TYPE)
+
+@app.route('/traces', methods=['GET'])
+def list_traces():
+    """Newest recorded job timelines, to find slow ones"""
+    return jsonify({
+        'sample_rate': tracing.tracer.sample_rate,
+        'traces': tracing.tracer.recent(limit=request.args.get('limit', 50, type=int))
+    })
+
+@app.route('/traces/<trace_id>', methods=['GET'])
+def get_trace(trace_id):
+    """A job's span timeline as Chrome trace-event JSON, by job ID or upload session ID"""
+    job = job_manager.get_job(trace_id)
+    trace = tracing.tracer.get(job['trace_id'] if job and job['trace_id'] else trace_id)
+    if trace is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Trace not found (not sampled or no longer retained)'
+        }), 404
+    
+    return jsonify(trace.to_chrome_trace())
+
+# ==================== EXPORT ROUTES ====================
+
+@app.route('/captions/<track_id>.<fmt>', methods=['GET'])
+def export_captions(track_id, fmt):
+    """
+    Download a stored caption track as SRT, WebVTT or TTML
+
+    Each format is serialized once to disk and then served as a static
+    file, with ETag/If-None-Match and Range handled by send_file.
+    """
+    # Both end up in a file name, so check them before any path is built
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({
+            'status': 'error',
+            'message': f"Unsupported format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}"
+        }), 400
+    
+    if not ResultCache.is_valid_track_id(track_id):
+        return jsonify({
+            'status': 'error',
+            'message': 'Invalid caption track ID'
+        }), 400
+    
+    if not result_cache:
+        return jsonify({
+            'status': 'error',
+            'message': 'Result cache is not available'
+        }), 503
+    
+    path = result_cache.export_path(track_id, fmt)
+    if not os.path.exists(path):
+        track = result_cache.get_track(track_id)
+        if track is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'Caption track not found'
+            }), 404
+        write_export(track['captions'], fmt, path, language=track.get('language') or 'en')
+    
+    return send_file(
+        path,
+        mimetype=EXPORT_FORMATS[fmt][1],
+        as_attachment=request.args.get('download') == '1',
+        download_name=f"{track_id}.{fmt}",
+        conditional=True,
+        etag=True,
+        max_age=EXPORT_MAX_AGE
+    )
+
+# ==================== ADMIN ROUTES ====================
+
+@app.route('/admin/results', methods=['DELETE'])
+def invalidate_results():
+    """Invalidate stored caption tracks, filtered by kind, content_id and language"""
+    admin_token = os.getenv('ADMIN_TOKEN')
+    if not admin_token:
+        return jsonify({
+            'status': 'error',
+            'message': 'Admin endpoints are disabled. Set ADMIN_TOKEN to enable them.'
+        }), 403
+    
+    if request.headers.get('X-Admin-Token') != admin_token:
+        return jsonify({
+            'status': 'error',
+            'message': 'Invalid admin token'
+        }), 401
+    
+    if not result_cache:
+        return jsonify({
+            'status': 'error',
+            'message': 'Result cache is not available'
+        }), 503
+    
+    kind = request.args.get('kind')
+    content_id = request.args.get('content_id')
+    if kind == 'youtube' and content_id:
+        content_id = ResultCache.canonical_youtube_id(content_id) or content_id
+    
+    removed = result_cache.invalidate(
+        kind=kind,
+        content_id=content_id,
+        language=request.args.get('language')
+    )
+    
+    return jsonify({
+        'status': 'success',
+        'removed': removed
     })
 
 # ==================== ERROR HANDLERS ====================
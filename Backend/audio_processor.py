@@ -1,8 +1,14 @@
 import os
+import io
+import wave
+import queue
 import subprocess
+import threading
 import logging
+from collections import deque
 from pathlib import Path
 import yt_dlp
+import tracing
 import uuid
 
 logger = logging.getLogger(__name__)
@@ -11,10 +17,31 @@ logger = logging.getLogger(__name__)
 TEMP_DIR = "./temp_audio"
 Path(TEMP_DIR).mkdir(exist_ok=True)
 
+# Streaming extraction configuration (16 kHz mono s16le PCM)
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2
+STREAM_FRAME_SECONDS = int(os.getenv('STREAM_FRAME_SECONDS', 30))
+STREAM_BUFFER_FRAMES = int(os.getenv('STREAM_BUFFER_FRAMES', 4))
+
+# Compressed encodings for uploading audio to the STT API: ffmpeg output args, MIME type, extension
+OPUS_BITRATE = os.getenv('OPUS_BITRATE', '24k')
+TRANSPORT_ENCODINGS = {
+    'flac': (['-c:a', 'flac', '-compression_level', '5', '-f', 'flac'], 'audio/flac', 'flac'),
+    'opus': (['-c:a', 'libopus', '-b:a', OPUS_BITRATE, '-application', 'voip', '-f', 'ogg'], 'audio/ogg', 'ogg'),
+}
+
+# Decode live streams as soon as bytes arrive instead of probing seconds of input first
+LIVE_INPUT_ARGS = ['-fflags', 'nobuffer', '-probesize', '4096', '-analyzeduration', '0']
+
+# Containers ffmpeg can decode from a pipe as they arrive
+STREAMABLE_EXTENSIONS = {'webm', 'mkv', 'flv', 'mpg', 'mpeg'}
+ISO_BMFF_EXTENSIONS = {'mp4', 'm4v', 'mov', '3gp'}
+
 class AudioProcessor:
     """Handles audio extraction from videos and YouTube"""
     
     @staticmethod
+    @tracing.traced('audio.extract_file')
     def extract_audio_from_file(video_file_path, output_format="wav"):
         """
         Extract audio from an uploaded video file using FFmpeg
@@ -78,6 +105,263 @@ class AudioProcessor:
 
 
     @staticmethod
+    def stream_audio_from_file(video_file_path, frame_seconds=None, max_buffered_frames=None):
+        """
+        Stream audio from a video file as raw PCM frames without a temp WAV
+
+        FFmpeg decodes into a pipe; a reader thread cuts stdout into
+        fixed-duration frames and hands them over through a bounded queue, so
+        decoding runs at most max_buffered_frames ahead of the consumer.
+
+        Args:
+            video_file_path: Path to the video file
+            frame_seconds: Duration of each frame in seconds (default: STREAM_FRAME_SECONDS)
+            max_buffered_frames: Frames decoded ahead of the consumer (default: STREAM_BUFFER_FRAMES)
+
+        Yields:
+            Tuples of (offset_seconds, pcm_bytes) with 16 kHz mono s16le samples
+        """
+        return AudioProcessor._stream_pcm(
+            video_file_path, None, video_file_path, frame_seconds, max_buffered_frames
+        )
+
+    @staticmethod
+    def stream_audio_from_chunks(chunks, label='pipe', frame_seconds=None, max_buffered_frames=None,
+                                 input_args=None, stop=None):
+        """
+        Stream audio from video bytes fed to ffmpeg's stdin as they arrive
+
+        Used to decode a growing upload; only containers that don't need to
+        seek (see supports_progressive_decode) work this way.
+
+        Args:
+            chunks: Iterable of bytes making up the video file, in order
+            label: Name used in log messages
+            frame_seconds: Duration of each frame in seconds (default: STREAM_FRAME_SECONDS)
+            max_buffered_frames: Frames decoded ahead of the consumer (default: STREAM_BUFFER_FRAMES)
+            input_args: Extra ffmpeg input options, e.g. LIVE_INPUT_ARGS to start decoding without probing
+            stop: Optional threading.Event set when the stream finishes or is closed; give the
+                same event to a chunks iterator that blocks, so it stops waiting for input
+
+        Yields:
+            Tuples of (offset_seconds, pcm_bytes) with 16 kHz mono s16le samples
+        """
+        return AudioProcessor._stream_pcm(
+            'pipe:0', chunks, label, frame_seconds, max_buffered_frames, input_args, stop
+        )
+
+    @staticmethod
+    def supports_progressive_decode(header, filename):
+        """
+        Check whether ffmpeg can decode a file from a non-seekable pipe
+
+        MP4/MOV need their 'moov' index before the 'mdat' payload; files
+        written with moov at the end can only be decoded once complete.
+
+        Args:
+            header: Leading bytes of the file
+            filename: Original filename (for the container type)
+
+        Returns:
+            True if the file can be decoded while it is still arriving
+        """
+        ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+
+        if ext in STREAMABLE_EXTENSIONS:
+            return True
+        if ext not in ISO_BMFF_EXTENSIONS:
+            return False
+
+        # Walk top-level atoms until moov or mdat shows up
+        position = 0
+        while position + 8 <= len(header):
+            size = int.from_bytes(header[position:position + 4], 'big')
+            atom_type = header[position + 4:position + 8]
+
+            if atom_type == b'moov':
+                return True
+            if atom_type == b'mdat':
+                return False
+
+            if size == 1:
+                if position + 16 > len(header):
+                    break
+                size = int.from_bytes(header[position + 8:position + 16], 'big')
+            if size < 8:
+                break
+            position += size
+
+        return False
+
+    @staticmethod
+    def _stream_pcm(input_path, input_chunks, label, frame_seconds, max_buffered_frames, input_args=None,
+                    stop=None):
+        """Run ffmpeg to raw PCM on stdout and yield fixed-duration frames"""
+        frame_seconds = frame_seconds or STREAM_FRAME_SECONDS
+        max_buffered_frames = max_buffered_frames or STREAM_BUFFER_FRAMES
+        frame_bytes = int(frame_seconds * SAMPLE_RATE) * BYTES_PER_SAMPLE
+
+        command = [
+            'ffmpeg',
+            '-hide_banner',
+            *(input_args or []),
+            '-i', input_path,                # Input video
+            '-vn',                           # No video
+            '-f', 's16le',                   # Raw PCM on stdout
+            '-acodec', 'pcm_s16le',
+            '-ar', str(SAMPLE_RATE),         # Sample rate (16kHz for STT)
+            '-ac', '1',                      # Mono audio
+            'pipe:1'
+        ]
+
+        if input_chunks is None:
+            command.insert(1, '-nostdin')
+
+        logger.info(f"Streaming audio from: {label} ({frame_seconds}s frames)")
+
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE if input_chunks is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        frames = queue.Queue(maxsize=max_buffered_frames)
+        stderr_tail = deque(maxlen=20)
+        stop = stop or threading.Event()
+        feed_error = []
+        done = object()
+
+        def read_stderr():
+            for line in process.stderr:
+                stderr_tail.append(line.decode('utf-8', errors='replace').rstrip())
+
+        def write_stdin():
+            try:
+                for chunk in input_chunks:
+                    if stop.is_set():
+                        break
+                    process.stdin.write(chunk)
+            except BrokenPipeError:
+                # ffmpeg exited early; its exit status reports why
+                pass
+            except Exception as e:
+                feed_error.append(e)
+                process.kill()
+            finally:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+
+        def put(item):
+            # Blocks while the queue is full, which stalls ffmpeg on its pipe
+            while not stop.is_set():
+                try:
+                    frames.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+
+        def read_frames():
+            try:
+                while not stop.is_set():
+                    pcm = process.stdout.read(frame_bytes)
+                    if not pcm:
+                        break
+                    put(pcm)
+            finally:
+                put(done)
+
+        threading.Thread(target=read_stderr, daemon=True).start()
+        threading.Thread(target=read_frames, daemon=True).start()
+        if input_chunks is not None:
+            threading.Thread(target=write_stdin, daemon=True).start()
+
+        offset = 0.0
+        try:
+            while True:
+                pcm = frames.get()
+                if pcm is done:
+                    break
+                yield offset, pcm
+                offset += len(pcm) / float(SAMPLE_RATE * BYTES_PER_SAMPLE)
+
+            if feed_error:
+                raise Exception(f"Reading input failed: {feed_error[0]}")
+
+            if process.wait() != 0:
+                stderr = '\n'.join(stderr_tail)
+                logger.error(f"FFmpeg error: {stderr}")
+                raise Exception(f"FFmpeg failed: {stderr}")
+
+            if offset == 0:
+                raise Exception("Extracted audio stream is empty")
+
+            logger.info(f"Audio streamed successfully: {label} ({offset:.1f}s)")
+
+        finally:
+            stop.set()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            # Unblocks a writer stuck on a full pipe; the writer itself exits once its input sees stop
+            if input_chunks is not None:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+
+    @staticmethod
+    @tracing.traced('audio.encode')
+    def encode_for_transport(encoding, pcm=None, input_path=None, sample_rate=SAMPLE_RATE,
+                             sample_width=BYTES_PER_SAMPLE):
+        """
+        Encode audio in memory for upload to the STT API
+
+        Args:
+            encoding: 'wav', 'flac' (lossless) or 'opus' (speech bitrate)
+            pcm: Mono s16le PCM bytes to encode
+            input_path: Audio file to encode instead of pcm
+            sample_rate: Sample rate of pcm
+            sample_width: Bytes per sample of pcm (only 2 can be compressed)
+
+        Returns:
+            Tuple of (encoded bytes, MIME type, file extension)
+        """
+        if pcm is not None and (encoding == 'wav' or sample_width != BYTES_PER_SAMPLE):
+            buffer = io.BytesIO()
+            with wave.open(buffer, 'wb') as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(sample_width)
+                wav_file.setframerate(sample_rate)
+                wav_file.writeframes(pcm)
+            return buffer.getvalue(), 'audio/wav', 'wav'
+
+        if encoding not in TRANSPORT_ENCODINGS:
+            raise ValueError(f"Unsupported transport encoding: {encoding}")
+
+        output_args, mime_type, extension = TRANSPORT_ENCODINGS[encoding]
+
+        if pcm is not None:
+            input_args = ['-f', 's16le', '-ar', str(sample_rate), '-ac', '1', '-i', 'pipe:0']
+        else:
+            input_args = ['-i', input_path, '-vn', '-ar', str(SAMPLE_RATE), '-ac', '1']
+
+        result = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-loglevel', 'error'] + input_args + output_args + ['pipe:1'],
+            input=pcm,
+            capture_output=True,
+            timeout=120
+        )
+
+        if result.returncode != 0 or not result.stdout:
+            raise Exception(f"FFmpeg {encoding} encoding failed: "
+                            f"{result.stderr.decode('utf-8', errors='replace')[-500:]}")
+
+        return result.stdout, mime_type, extension
+
+    @staticmethod
+    @tracing.traced('audio.youtube')
     def extract_audio_from_youtube(youtube_url, output_format="wav"):
         """
         Extract audio from a YouTube video
@@ -0,0 +1,368 @@
+"""
+Stage-level micro-benchmarks for the caption pipeline
+
+Each stage is timed in isolation on synthetic input and repeated so the
+median is stable:
+
+    upload_merge      UploadHandler.handle_chunk_upload with chunk files + merge_chunks
+    upload_in_place   UploadHandler.handle_chunk_upload writing at chunk offsets
+    extract_audio     AudioProcessor.extract_audio_from_file on generated media (needs ffmpeg)
+    parse_timestamps  SarvamSTTService._parse_timestamps on a large word payload
+    simplify_text     TextSimplifier.simplify_text (needs nltk)
+    translate_batch   SarvamSTTService.translate_batch against a local Sarvam stub
+
+Everything runs in a scratch working directory, so uploads, temp audio and
+caches never touch the real ones. Results are written as JSON tagged with
+the git commit; pass a previous file with --compare to see per-stage
+changes (exit status 1 when a stage regressed beyond --threshold).
+
+Usage (from Backend/):
+    python -m benchmarks.pipeline --output bench-new.json --compare bench-old.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.sarvam_stub import SarvamStub  # noqa: E402
+
+RESULTS_VERSION = 1
+STAGES = ('upload_merge', 'upload_in_place', 'extract_audio', 'parse_timestamps', 'simplify_text', 'translate_batch')
+
+
+class StageSkipped(Exception):
+    """Raised by a stage whose dependency (ffmpeg, nltk, ...) is unavailable"""
+
+
+def git_revision():
+    """Current commit and whether the tree has local changes, if run inside git"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BACKEND_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def measure(fn, repeats, warmup=1):
+    """
+    Time fn() repeats times after warmup runs
+
+    fn may return a dict of counters (bytes, items, ...) from its last run.
+
+    Returns:
+        Tuple of (seconds list, counters)
+    """
+    counters = {}
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        counters = fn() or {}
+        samples.append(time.perf_counter() - started)
+    return samples, counters
+
+
+def summarize(samples, counters, notes=None):
+    median = statistics.median(samples)
+    summary = {
+        'status': 'ok',
+        'repeats': len(samples),
+        'seconds': {
+            'min': round(min(samples), 6),
+            'median': round(median, 6),
+            'mean': round(statistics.fmean(samples), 6),
+            'max': round(max(samples), 6)
+        },
+        'samples': [round(s, 6) for s in samples],
+        'counters': counters
+    }
+    if notes:
+        summary['notes'] = notes
+    # Per-second rates for every counter, from the median run
+    if median > 0:
+        summary['throughput'] = {f"{name}_per_second": round(value / median, 2)
+                                 for name, value in counters.items() if isinstance(value, (int, float))}
+    return summary
+
+
+# ---------- stages ----------
+
+def bench_upload(args, in_place):
+    from werkzeug.datastructures import FileStorage
+    from upload_handler import UploadHandler
+
+    chunk_size = args.chunk_mb * 1024 * 1024
+    payload = os.urandom(chunk_size)
+    file_size = chunk_size * args.chunks
+
+    def run():
+        session_id = f"bench-{random.getrandbits(32):08x}"
+        if in_place:
+            UploadHandler.create_session('bench.mp4', args.chunks, chunk_size, file_size, session_id=session_id)
+
+        result = None
+        for index in range(args.chunks):
+            chunk = FileStorage(stream=io.BytesIO(payload), filename='blob')
+            result = UploadHandler.handle_chunk_upload(
+                chunk, index, args.chunks, session_id, filename='bench.mp4',
+                chunk_size=chunk_size if in_place else None,
+                file_size=file_size if in_place else None
+            )
+        if not result or result['status'] != 'success':
+            raise RuntimeError(f"Upload did not complete: {result}")
+
+        os.remove(result['file_path'])
+        UploadHandler.cleanup_session(session_id)
+        return {'bytes': file_size, 'chunks': args.chunks}
+
+    return measure(run, args.repeats)
+
+
+def bench_extract_audio(args):
+    if not shutil.which('ffmpeg'):
+        raise StageSkipped('ffmpeg not found')
+
+    from audio_processor import AudioProcessor
+
+    media_path = os.path.abspath('bench_media.mp4')
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f"sine=frequency=440:duration={args.media_seconds}",
+        '-f', 'lavfi', '-i', f"testsrc=size=320x240:rate=25:duration={args.media_seconds}",
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-c:a', 'aac', '-shortest', media_path
+    ], check=True)
+
+    def run():
+        audio_path = AudioProcessor.extract_audio_from_file(media_path)
+        os.remove(audio_path)
+        return {'media_seconds': args.media_seconds}
+
+    try:
+        return measure(run, args.repeats)
+    finally:
+        os.remove(media_path)
+
+
+def bench_parse_timestamps(args):
+    from stt_service import SarvamSTTService
+
+    rng = random.Random(0)
+    timestamps = []
+    position = 0.0
+    for i in range(args.words):
+        duration = rng.uniform(150, 500)
+        position += rng.uniform(800, 2000) if rng.random() < 0.03 else rng.uniform(0, 100)
+        timestamps.append({
+            'word': f"word{i % 997}" + ('.' if rng.random() < 0.05 else ''),
+            'start_time': position,
+            'end_time': position + duration,
+            'confidence': 0.9
+        })
+        position += duration
+    response = {'transcript': '', 'timestamps': timestamps}
+
+    def run():
+        captions = SarvamSTTService._parse_timestamps(response, 'en-IN')
+        return {'words': args.words, 'captions': len(captions)}
+
+    return measure(run, args.repeats)
+
+
+def bench_simplify_text(args):
+    try:
+        from modules.nlp_simplifier import TextSimplifier
+    except ImportError as e:
+        raise StageSkipped(str(e))
+
+    rng = random.Random(0)
+    sentences = []
+    for _ in range(args.sentences):
+        length = rng.randint(4, 40)
+        sentences.append(' '.join(f"word{rng.randint(0, 999)}" for _ in range(length)) + '.')
+    text = ' '.join(sentences)
+    simplifier = TextSimplifier()
+
+    def run():
+        simplifier.simplify_text(text)
+        return {'sentences': args.sentences, 'chars': len(text)}
+
+    return measure(run, args.repeats)
+
+
+def bench_translate_batch(args, stub):
+    from stt_service import SarvamSTTService
+
+    service = SarvamSTTService()
+    # Measure the API path, not the cache
+    service.translation_cache = None
+
+    rng = random.Random(0)
+    texts = [' '.join(f"word{rng.randint(0, 999)}" for _ in range(rng.randint(3, 14)))
+             for _ in range(args.captions)]
+
+    requests_before = stub.stats['requests']
+
+    def run():
+        translated = service.translate_batch(texts, 'hi-IN', 'en-IN')
+        if len(translated) != len(texts):
+            raise RuntimeError('translate_batch returned the wrong number of texts')
+        return {'captions': len(texts)}
+
+    samples, counters = measure(run, args.repeats)
+    runs = len(samples) + 1  # including the warmup
+    notes = {
+        'requests_per_run': round((stub.stats['requests'] - requests_before) / runs, 1),
+        'stub_errors': stub.stats['errors'],
+        'stub_latency_ms': args.stub_latency_ms,
+        'stub_error_rate': args.stub_error_rate
+    }
+    return samples, counters, notes
+
+
+# ---------- runner ----------
+
+def run_benchmarks(args):
+    stub = SarvamStub(latency_ms=args.stub_latency_ms, error_rate=args.stub_error_rate, seed=0).start()
+
+    # Module-level settings are read at import, so configure before importing the pipeline
+    os.environ['SARVAM_API_BASE_URL'] = stub.url
+    os.environ.setdefault('SARVAM_API_KEY', 'benchmark')
+    os.environ.setdefault('SARVAM_RATE_LIMIT', '0')
+
+    stages = {
+        'upload_merge': lambda: bench_upload(args, in_place=False),
+        'upload_in_place': lambda: bench_upload(args, in_place=True),
+        'extract_audio': lambda: bench_extract_audio(args),
+        'parse_timestamps': lambda: bench_parse_timestamps(args),
+        'simplify_text': lambda: bench_simplify_text(args),
+        'translate_batch': lambda: bench_translate_batch(args, stub)
+    }
+
+    results = {}
+    try:
+        for name in args.stages:
+            print(f"Running {name}...", flush=True)
+            try:
+                results[name] = summarize(*stages[name]())
+            except StageSkipped as e:
+                results[name] = {'status': 'skipped', 'reason': str(e)}
+            except Exception as e:
+                results[name] = {'status': 'error', 'reason': f"{type(e).__name__}: {e}"}
+    finally:
+        stub.stop()
+
+    return results
+
+
+def compare(baseline, current, threshold):
+    """
+    Print the median change of every stage present in both runs
+
+    Returns:
+        Names of stages that got slower by more than threshold
+    """
+    regressions = []
+    print(f"\nvs {baseline.get('commit') or 'baseline'}:")
+    print(f"{'stage':18} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in current['stages'].items():
+        before = baseline.get('stages', {}).get(name, {})
+        if result.get('status') != 'ok' or before.get('status') != 'ok':
+            continue
+
+        old = before['seconds']['median']
+        new = result['seconds']['median']
+        change = (new - old) / old if old else 0.0
+        flag = '  REGRESSION' if change > threshold else ''
+        print(f"{name:18} {old:>9.4f}s {new:>9.4f}s {change:>+7.1%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark caption pipeline stages')
+    parser.add_argument('--stages', default=','.join(STAGES), help='Comma-separated stages to run')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed runs per stage')
+    parser.add_argument('--chunks', type=int, default=16, help='Upload chunks per run')
+    parser.add_argument('--chunk-mb', type=int, default=4, help='Upload chunk size in MB')
+    parser.add_argument('--media-seconds', type=int, default=60, help='Length of the generated media')
+    parser.add_argument('--words', type=int, default=100000, help='Words in the timestamp payload')
+    parser.add_argument('--sentences', type=int, default=5000, help='Sentences for the simplifier')
+    parser.add_argument('--captions', type=int, default=500, help='Captions to translate')
+    parser.add_argument('--stub-latency-ms', type=float, default=50.0, help='Sarvam stub delay per request')
+    parser.add_argument('--stub-error-rate', type=float, default=0.0, help='Fraction of stub requests that fail')
+    parser.add_argument('--output', default='pipeline_benchmark.json', help='JSON results path')
+    parser.add_argument('--compare', help='Previous results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Median slowdown counted as a regression')
+    args = parser.parse_args()
+
+    args.stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in args.stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(unknown)}")
+
+    output_path = os.path.abspath(args.output)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    commit, dirty = git_revision()
+    workdir = tempfile.mkdtemp(prefix='caption-bench-')
+    original_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        stage_results = run_benchmarks(args)
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        'version': RESULTS_VERSION,
+        'commit': commit,
+        'dirty': dirty,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'stages': stage_results
+    }
+
+    print(f"\n{'stage':18} {'median':>10} {'min':>10}  notes")
+    for name, result in stage_results.items():
+        if result['status'] == 'ok':
+            rates = ', '.join(f"{k} {v:g}" for k, v in result.get('throughput', {}).items())
+            print(f"{name:18} {result['seconds']['median']:>9.4f}s {result['seconds']['min']:>9.4f}s  {rates}")
+        else:
+            print(f"{name:18} {result['status']:>10} {'':>10}  {result['reason']}")
+
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output_path}")
+
+    if baseline and compare(baseline, results, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
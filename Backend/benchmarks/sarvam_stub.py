@@ -0,0 +1,155 @@
+"""
+Local HTTP stub of the Sarvam endpoints used by the pipeline
+
+/translate echoes the input text (line breaks preserved, so batched
+translation splits back cleanly) and /speech-to-text returns a synthetic
+transcript with per-word timestamps proportional to the uploaded size
+(in auto-detect mode, language_code=unknown, it also reports the configured
+spoken language). Every request waits a configurable latency and fails with a configurable
+probability, so retry and batching behaviour can be measured offline.
+
+Usage (from Backend/):
+    python -m benchmarks.sarvam_stub --port 8765 --latency-ms 80 --error-rate 0.05
+
+Then point the server or a benchmark at it with
+SARVAM_API_BASE_URL=http://127.0.0.1:8765.
+"""
+import sys
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_WORDS_PER_SECOND = 2.5
+
+LANGUAGE_CODE_FIELD = re.compile(rb'name="language_code"\r\n\r\n([^\r]*)')
+
+
+class SarvamStub:
+    """Threaded stub server; start() returns immediately, stop() shuts it down"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=50.0, error_rate=0.0,
+                 error_status=503, seed=None, spoken_language='en-IN'):
+        self.spoken_language = spoken_language
+        self.latency = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'bytes_received': 0}
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                status, payload = stub.respond(self.path, body)
+                data = json.dumps(payload).encode('utf-8') if payload is not None else b''
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def respond(self, path, body):
+        """Build (status, payload) for one request"""
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['bytes_received'] += len(body)
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.stats['errors'] += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if failed:
+            return self.error_status, {'error': {'message': 'stub failure'}}
+
+        if path == '/translate':
+            request = json.loads(body or b'{}')
+            return 200, {'translated_text': request.get('input', '')}
+
+        if path == '/speech-to-text':
+            payload = self._transcript(body)
+            field = LANGUAGE_CODE_FIELD.search(body)
+            if field and field.group(1) == b'unknown':
+                payload.update(language_code=self.spoken_language, language_probability=0.95)
+            return 200, payload
+
+        return 404, {'error': {'message': f'Unknown endpoint {path}'}}
+
+    @staticmethod
+    def _transcript(body):
+        # Roughly 16 kHz s16le worth of seconds; close enough for compressed uploads too
+        seconds = max(1.0, len(body) / 32000.0)
+        count = int(seconds * STUB_WORDS_PER_SECOND)
+        step = 1000.0 / STUB_WORDS_PER_SECOND
+        timestamps = [
+            {
+                'word': f"word{i}" + ('.' if i % 12 == 11 else ''),
+                'start_time': i * step,
+                'end_time': i * step + step * 0.8,
+                'confidence': 0.9
+            }
+            for i in range(count)
+        ]
+        return {
+            'transcript': ' '.join(item['word'] for item in timestamps),
+            'confidence': 0.9,
+            'timestamps': timestamps
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local Sarvam API stub')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='Delay added to every request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests that fail')
+    parser.add_argument('--error-status', type=int, default=503, help='HTTP status of failed requests')
+    parser.add_argument('--spoken-language', default='en-IN', help='Language reported in auto-detect mode')
+    args = parser.parse_args()
+
+    stub = SarvamStub(args.host, args.port, args.latency_ms, args.error_rate, args.error_status,
+                      spoken_language=args.spoken_language)
+    print(f"Sarvam stub listening on {stub.url} "
+          f"({args.latency_ms:g} ms latency, {args.error_rate:.0%} errors)")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
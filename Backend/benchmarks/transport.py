@@ -0,0 +1,128 @@
+"""
+Benchmark STT transport encodings on a fixed local corpus
+
+For every audio/video file in the corpus, the audio is decoded once to
+16 kHz PCM and then transcribed with each transport encoding. The benchmark
+records bytes uploaded, end-to-end transcription latency and word error
+rate. WER is measured against <name>.txt next to the file when present,
+otherwise against the WAV transcript.
+
+Usage (from Backend/):
+    python -m benchmarks.transport path/to/corpus --encodings wav,flac,opus --output results.json
+
+Set SARVAM_API_KEY (and optionally SARVAM_API_BASE_URL) as for the server.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_processor import AudioProcessor  # noqa: E402
+from stt_service import SarvamSTTService  # noqa: E402
+
+MEDIA_EXTENSIONS = {'wav', 'flac', 'mp3', 'm4a', 'ogg', 'webm', 'mp4', 'mkv', 'mov'}
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length"""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+
+    return previous[-1] / len(ref)
+
+
+def benchmark_file(service, path, encodings, language_code):
+    """Transcribe one file with each encoding and collect the measurements"""
+    frames = list(AudioProcessor.stream_audio_from_file(path))
+    audio_seconds = sum(len(pcm) for _, pcm in frames) / 32000.0
+
+    reference_path = os.path.splitext(path)[0] + '.txt'
+    reference = None
+    if os.path.exists(reference_path):
+        with open(reference_path, encoding='utf-8') as f:
+            reference = f.read()
+
+    runs = []
+    for encoding in encodings:
+        service.transport_encoding = encoding
+        sent_before = service.transport_stats['sent_bytes']
+
+        started = time.perf_counter()
+        result = service.transcribe_stream(iter(frames), language_code)
+        latency = time.perf_counter() - started
+
+        runs.append({
+            'encoding': encoding,
+            'status': result['status'],
+            'bytes_sent': service.transport_stats['sent_bytes'] - sent_before,
+            'latency_seconds': round(latency, 3),
+            'text': result.get('text', ''),
+            'message': result.get('message')
+        })
+
+    baseline = next((run for run in runs if run['encoding'] == 'wav'), runs[0])
+    for run in runs:
+        run['wer'] = round(word_error_rate(reference if reference is not None else baseline['text'],
+                                           run['text']), 4)
+        run['bytes_vs_baseline'] = round(run['bytes_sent'] / baseline['bytes_sent'], 4) \
+            if baseline['bytes_sent'] else None
+
+    return {
+        'file': os.path.basename(path),
+        'audio_seconds': round(audio_seconds, 2),
+        'wer_reference': 'transcript' if reference is not None else 'wav',
+        'runs': runs
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare STT transport encodings')
+    parser.add_argument('corpus', help='Directory of audio/video files (optional <name>.txt references)')
+    parser.add_argument('--encodings', default='wav,flac,opus', help='Comma-separated encodings')
+    parser.add_argument('--language', default='en-IN', help='STT language code')
+    parser.add_argument('--output', default='transport_benchmark.json', help='JSON results path')
+    args = parser.parse_args()
+
+    encodings = [encoding.strip() for encoding in args.encodings.split(',') if encoding.strip()]
+    files = sorted(
+        os.path.join(args.corpus, name) for name in os.listdir(args.corpus)
+        if name.rsplit('.', 1)[-1].lower() in MEDIA_EXTENSIONS
+    )
+    if not files:
+        print(f"No audio or video files in {args.corpus}")
+        return 1
+
+    service = SarvamSTTService()
+    results = [benchmark_file(service, path, encodings, args.language) for path in files]
+
+    print(f"{'file':30} {'encoding':8} {'bytes':>12} {'vs wav':>7} {'latency':>8} {'WER':>6}")
+    for result in results:
+        for run in result['runs']:
+            ratio = f"{run['bytes_vs_baseline']:.2f}" if run['bytes_vs_baseline'] is not None else '-'
+            print(f"{result['file'][:30]:30} {run['encoding']:8} {run['bytes_sent']:>12} "
+                  f"{ratio:>7} {run['latency_seconds']:>7.2f}s {run['wer']:>6.3f}")
+
+    with open(args.output, 'w') as f:
+        json.dump({'encodings': encodings, 'results': results}, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
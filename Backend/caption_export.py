@@ -0,0 +1,108 @@
+import os
+import uuid
+import logging
+from xml.sax.saxutils import escape, quoteattr
+
+logger = logging.getLogger(__name__)
+
+# Captions serialized per chunk yielded by the writers
+EXPORT_CHUNK_CAPTIONS = int(os.getenv('EXPORT_CHUNK_CAPTIONS', 200))
+
+
+def _timestamp(seconds, separator):
+    millis = int(round(max(0.0, float(seconds or 0)) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def _cue_text(caption):
+    # A blank line ends a cue in SRT and WebVTT
+    lines = (caption.get('text') or '').splitlines()
+    return '\n'.join(line.strip() for line in lines if line.strip())
+
+
+def _chunked(captions, render):
+    parts = []
+    for index, caption in enumerate(captions, 1):
+        parts.append(render(index, caption))
+        if len(parts) >= EXPORT_CHUNK_CAPTIONS:
+            yield ''.join(parts).encode('utf-8')
+            parts = []
+    if parts:
+        yield ''.join(parts).encode('utf-8')
+
+
+def iter_srt(captions):
+    """Yield a caption track as SubRip in UTF-8 chunks"""
+    def render(index, caption):
+        return (f"{index}\n"
+                f"{_timestamp(caption['start_time'], ',')} --> {_timestamp(caption['end_time'], ',')}\n"
+                f"{_cue_text(caption)}\n\n")
+
+    return _chunked(captions, render)
+
+
+def iter_webvtt(captions):
+    """Yield a caption track as WebVTT in UTF-8 chunks"""
+    def render(index, caption):
+        # '-->' inside cue text would start a new timing line
+        text = _cue_text(caption).replace('-->', '->')
+        return (f"{index}\n"
+                f"{_timestamp(caption['start_time'], '.')} --> {_timestamp(caption['end_time'], '.')}\n"
+                f"{text}\n\n")
+
+    yield b'WEBVTT\n\n'
+    yield from _chunked(captions, render)
+
+
+def iter_ttml(captions, language='en'):
+    """Yield a caption track as TTML in UTF-8 chunks"""
+    def render(index, caption):
+        text = '<br/>'.join(escape(line) for line in _cue_text(caption).split('\n'))
+        return (f'      <p xml:id="c{index}" begin="{_timestamp(caption["start_time"], ".")}" '
+                f'end="{_timestamp(caption["end_time"], ".")}">{text}</p>\n')
+
+    yield (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+           f'<tt xmlns="http://www.w3.org/ns/ttml" xml:lang={quoteattr(language)}>\n'
+           f'  <body>\n    <div>\n').encode('utf-8')
+    yield from _chunked(captions, render)
+    yield b'    </div>\n  </body>\n</tt>\n'
+
+
+# format -> (writer, MIME type)
+EXPORT_FORMATS = {
+    'srt': (iter_srt, 'application/x-subrip'),
+    'vtt': (iter_webvtt, 'text/vtt'),
+    'ttml': (iter_ttml, 'application/ttml+xml'),
+}
+
+
+def write_export(captions, fmt, path, language='en'):
+    """
+    Serialize a caption track to a file chunk by chunk
+
+    The file is written under a temporary name and moved into place, so
+    concurrent requests never see a partial export.
+
+    Returns:
+        Number of bytes written
+    """
+    writer, _ = EXPORT_FORMATS[fmt]
+    chunks = writer(captions, language) if fmt == 'ttml' else writer(captions)
+
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    written = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    logger.info(f"Exported {len(captions)} captions to {fmt} ({written} bytes)")
+    return written
@@ -0,0 +1,251 @@
+import os
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Caption readability limits
+CAPTION_MAX_LINE_CHARS = int(os.getenv('CAPTION_MAX_LINE_CHARS', 42))
+CAPTION_MAX_LINES = int(os.getenv('CAPTION_MAX_LINES', 2))
+CAPTION_MAX_DURATION = float(os.getenv('CAPTION_MAX_DURATION', 7.0))  # seconds
+CAPTION_MAX_CPS = float(os.getenv('CAPTION_MAX_CPS', 17.0))  # characters per second
+CAPTION_PAUSE_GAP = float(os.getenv('CAPTION_PAUSE_GAP', 0.7))  # seconds of silence that ends a caption
+CAPTION_MIN_GAP = 0.04  # seconds kept between consecutive captions
+
+# Words ending with these close a caption
+SENTENCE_ENDINGS = ('.', '?', '!', '।', '॥')
+
+
+class CaptionSegmenter:
+    """
+    Splits word timestamps into readable captions
+
+    Words are held as columnar NumPy arrays. Hard breaks (pauses, sentence
+    ends) are found with vector ops, every run between them is cut into
+    evenly sized captions that respect the character and duration limits,
+    and display times are stretched to the reading-speed limit. Each
+    caption is then wrapped at word boundaries into lines of at most
+    max_line_chars, and one that needs more than max_lines lines is split.
+    The work is linear in the number of words.
+    """
+
+    def __init__(self, max_line_chars=CAPTION_MAX_LINE_CHARS, max_lines=CAPTION_MAX_LINES,
+                 max_duration=CAPTION_MAX_DURATION, max_cps=CAPTION_MAX_CPS, pause_gap=CAPTION_PAUSE_GAP):
+        self.max_line_chars = max_line_chars
+        self.max_lines = max(1, max_lines)
+        self.max_chars = max_line_chars * self.max_lines
+        self.max_duration = max_duration
+        self.max_cps = max_cps
+        self.pause_gap = pause_gap
+
+    @property
+    def version(self):
+        """Identifies the segmentation rules, for caption cache keys"""
+        return (f"seg2/{self.max_line_chars}x{self.max_lines}c/{self.max_duration:g}s/"
+                f"{self.max_cps:g}cps/{self.pause_gap:g}gap")
+
+    @staticmethod
+    def columns_from_sarvam(timestamps):
+        """
+        Convert a Sarvam 'timestamps' field to columns
+
+        Accepts either a list of {'word', 'start_time', 'end_time', 'confidence'}
+        items with times in milliseconds, or parallel lists under 'words',
+        'start_time_seconds' and 'end_time_seconds'.
+
+        Returns:
+            Tuple of (words list, starts, ends, confidences) with times in seconds
+
+        Raises:
+            ValueError: if the parallel lists differ in length
+        """
+        if isinstance(timestamps, dict):
+            words = [str(word) for word in timestamps.get('words', [])]
+            starts = np.asarray(timestamps.get('start_time_seconds', []), dtype=np.float64)
+            ends = np.asarray(timestamps.get('end_time_seconds', []), dtype=np.float64)
+            confidences = np.asarray(timestamps.get('confidence', [0.0] * len(words)), dtype=np.float64)
+            if not len(words) == len(starts) == len(ends) == len(confidences):
+                raise ValueError(f"Timestamp columns differ in length: {len(words)} words, {len(starts)} "
+                                 f"starts, {len(ends)} ends, {len(confidences)} confidences")
+            return words, starts, ends, confidences
+
+        count = len(timestamps)
+        words = [str(item.get('word') or '') for item in timestamps]
+        starts = np.fromiter((item.get('start_time', 0) for item in timestamps), np.float64, count) / 1000.0
+        ends = np.fromiter((item.get('end_time', 0) for item in timestamps), np.float64, count) / 1000.0
+        confidences = np.fromiter((item.get('confidence', 0) for item in timestamps), np.float64, count)
+        return words, starts, ends, confidences
+
+    def segment(self, words, starts, ends, confidences=None):
+        """
+        Group timed words into captions
+
+        Args:
+            words: List of word strings
+            starts: Word start times in seconds
+            ends: Word end times in seconds
+            confidences: Optional per-word confidence
+
+        Returns:
+            List of caption dicts with text (lines separated by '\n'), start_time,
+            end_time and confidence
+
+        Raises:
+            ValueError: if the columns differ in length
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        confidences = np.zeros(len(words)) if confidences is None else np.asarray(confidences, dtype=np.float64)
+        if not len(words) == len(starts) == len(ends) == len(confidences):
+            raise ValueError(f"Word columns differ in length: {len(words)} words, {len(starts)} starts, "
+                             f"{len(ends)} ends, {len(confidences)} confidences")
+
+        # Empty tokens would show up as double spaces
+        word_array = np.char.strip(np.asarray(words, dtype=str).reshape(-1))
+        keep = np.char.str_len(word_array) > 0
+        word_array, starts, ends, confidences = word_array[keep], starts[keep], ends[keep], confidences[keep]
+        words = word_array.tolist()
+
+        count = len(words)
+        if count == 0:
+            return []
+
+        ends = np.maximum(ends, starts)
+        # Characters each word adds to a caption, counting the joining space
+        widths = np.char.str_len(word_array).astype(np.int64) + 1
+        char_ends = np.cumsum(widths)
+
+        # 1. Hard breaks before a word: long pause or sentence end before it
+        hard = np.zeros(count, dtype=bool)
+        hard[0] = True
+        hard[1:] = starts[1:] - ends[:-1] >= self.pause_gap
+        sentence_end = np.zeros(count, dtype=bool)
+        for ending in SENTENCE_ENDINGS:
+            sentence_end |= np.char.endswith(word_array, ending)
+        hard[1:] |= sentence_end[:-1]
+
+        run_starts = np.flatnonzero(hard)
+        run_ids = np.cumsum(hard) - 1
+
+        # 2. Pieces per run so each piece fits the character and duration limits
+        run_first_char = char_ends[run_starts] - widths[run_starts]
+        run_chars = np.add.reduceat(widths, run_starts) - 1
+        run_duration = np.maximum.reduceat(ends, run_starts) - starts[run_starts]
+        pieces = np.maximum.reduce([
+            np.ceil(run_chars / float(self.max_chars)),
+            np.ceil(run_duration / self.max_duration),
+            np.ones(len(run_starts))
+        ]).astype(np.int64)
+
+        # Position of each word's midpoint within its run, by characters and by time
+        char_fraction = (char_ends - widths / 2.0 - run_first_char[run_ids]) / np.maximum(run_chars[run_ids], 1)
+        time_fraction = (starts - starts[run_starts][run_ids]) / np.maximum(run_duration[run_ids], 1e-9)
+        run_pieces = pieces[run_ids]
+        piece = np.minimum(
+            np.maximum(np.floor(char_fraction * run_pieces), np.floor(time_fraction * run_pieces)),
+            run_pieces - 1
+        ).astype(np.int64)
+
+        caption_ids = (np.cumsum(pieces) - pieces)[run_ids] + piece
+        breaks = np.flatnonzero(np.diff(caption_ids)) + 1
+        bounds = np.concatenate(([0], breaks, [count]))
+
+        # 3. Halve any caption that is still over a limit (rare; a few passes at most)
+        bounds = self._split_oversized(bounds, widths, char_ends, starts, ends)
+
+        # 4. Break lines at word boundaries; captions that don't fit in max_lines are split
+        bounds, line_starts = self._fit_lines(bounds, widths.tolist())
+
+        return self._build_captions(words, bounds, line_starts, widths, starts, ends, confidences)
+
+    def _split_oversized(self, bounds, widths, char_ends, starts, ends):
+        while True:
+            first, stop = bounds[:-1], bounds[1:]
+            chars = char_ends[stop - 1] - char_ends[first] + widths[first] - 1
+            duration = ends[stop - 1] - starts[first]
+            oversized = ((chars > self.max_chars) | (duration > self.max_duration)) & (stop - first > 1)
+            if not oversized.any():
+                return bounds
+
+            first, stop = first[oversized], stop[oversized]
+            midpoint = char_ends[first] - widths[first] + (chars[oversized] + 1) / 2.0
+            cut = np.clip(np.searchsorted(char_ends, midpoint, side='left') + 1, first + 1, stop - 1)
+            bounds = np.union1d(bounds, cut)
+
+    def _wrap(self, widths, first, stop):
+        """Indices of the words in [first, stop) that start a new line, filling lines greedily"""
+        breaks = []
+        line_chars = widths[first] - 1
+        for index in range(first + 1, stop):
+            if line_chars + widths[index] > self.max_line_chars:
+                breaks.append(index)
+                line_chars = widths[index] - 1
+            else:
+                line_chars += widths[index]
+        return breaks
+
+    def _fit_lines(self, bounds, widths):
+        """
+        Wrap every caption, splitting off the lines past max_lines as captions of their own
+
+        Returns:
+            Tuple of (caption bounds, per-caption list of the word indices starting lines 2..n)
+        """
+        fitted = []
+        line_starts = []
+        for first, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            breaks = self._wrap(widths, first, stop)
+            while len(breaks) >= self.max_lines:
+                # A prefix wraps the same way on its own, so the first max_lines lines stay as they are
+                cut = breaks[self.max_lines - 1]
+                fitted.append(first)
+                line_starts.append(breaks[:self.max_lines - 1])
+                first = cut
+                breaks = self._wrap(widths, first, stop)
+            fitted.append(first)
+            line_starts.append(breaks)
+        fitted.append(int(bounds[-1]))
+        return np.asarray(fitted, dtype=np.int64), line_starts
+
+    def wrap_text(self, text):
+        """Re-wrap free text (e.g. a translated caption) into lines of at most max_line_chars"""
+        words = text.split()
+        if not words:
+            return ''
+        breaks = self._wrap([len(word) + 1 for word in words], 0, len(words))
+        return self._join_lines(words, 0, breaks, len(words))
+
+    @staticmethod
+    def _join_lines(words, first, breaks, stop):
+        edges = [first] + breaks + [stop]
+        return '\n'.join(' '.join(words[a:b]) for a, b in zip(edges[:-1], edges[1:]))
+
+    def _build_captions(self, words, bounds, line_starts, widths, starts, ends, confidences):
+        first, stop = bounds[:-1], bounds[1:]
+        caption_starts = starts[first]
+        caption_ends = ends[stop - 1]
+        caption_chars = np.add.reduceat(widths, first) - 1
+        caption_confidence = np.add.reduceat(confidences, first) / (stop - first)
+
+        # Stretch fast captions toward the reading-speed limit, without overlapping the next one
+        next_starts = np.append(caption_starts[1:] - CAPTION_MIN_GAP, np.inf)
+        readable_ends = np.minimum(caption_starts + caption_chars / self.max_cps,
+                                   caption_starts + self.max_duration)
+        caption_ends = np.maximum(caption_ends, np.minimum(readable_ends, next_starts))
+
+        return [
+            {
+                'text': self._join_lines(words, a, breaks, b),
+                'start_time': start,
+                'end_time': end,
+                'confidence': confidence
+            }
+            for a, b, breaks, start, end, confidence in zip(
+                first.tolist(), stop.tolist(), line_starts, caption_starts.tolist(),
+                caption_ends.tolist(), caption_confidence.tolist()
+            )
+        ]
+
+
+# Shared by the engines that produce word timestamps (limits from CAPTION_* settings)
+caption_segmenter = CaptionSegmenter()
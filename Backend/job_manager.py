@@ -0,0 +1,382 @@
+import os
+import time
+import uuid
+import queue
+import logging
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from metrics import TIME_TO_FIRST_CAPTION_SECONDS
+import tracing
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    from eventlet import tpool
+except ImportError:
+    tpool = None
+
+logger = logging.getLogger(__name__)
+
+# Job manager configuration
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+FFMPEG_WORKERS = int(os.getenv('FFMPEG_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+JOB_QUEUE_LIMIT = int(os.getenv('JOB_QUEUE_LIMIT', 32))
+
+# Captions are coalesced into one caption_batch frame per room
+CAPTION_BATCH_SIZE = int(os.getenv('CAPTION_BATCH_SIZE', 50))
+CAPTION_BATCH_WINDOW = float(os.getenv('CAPTION_BATCH_WINDOW', 0.25))  # seconds
+CAPTION_ENCODINGS = ('json', 'msgpack') if msgpack else ('json',)
+
+# Longest the emit pump waits on an empty queue, so its waiting thread can exit at shutdown
+PUMP_IDLE_TIMEOUT = 1.0  # seconds
+
+# How long finished jobs stay visible in get_job
+FINISHED_JOB_TTL = 3600  # seconds
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at JOB_QUEUE_LIMIT"""
+
+
+def encode_caption_batch(captions, encoding='json'):
+    """
+    Build a caption_batch payload
+
+    Args:
+        captions: List of caption dicts
+        encoding: 'json' (captions inline) or 'msgpack' (one binary attachment)
+
+    Returns:
+        Payload dict for the caption_batch event
+    """
+    if encoding == 'msgpack' and msgpack:
+        return {
+            'count': len(captions),
+            'encoding': 'msgpack',
+            'data': msgpack.packb(captions, use_bin_type=True)
+        }
+
+    return {
+        'count': len(captions),
+        'encoding': 'json',
+        'captions': captions
+    }
+
+
+class JobManager:
+    """Runs caption jobs on bounded worker pools, off the Socket.IO event loop
+
+    Job bodies run on a thread pool of JOB_WORKERS real threads, so blocking
+    ffmpeg, yt-dlp and HTTP calls never stall the eventlet hub. CPU-bound
+    ffmpeg work runs on a process pool (or, for streaming pipes, holds one of
+    the same FFMPEG_WORKERS slots). Socket.IO emits from job threads are
+    queued and sent by a background task on the server's own event loop,
+    which coalesces consecutive captions for a room into caption_batch frames.
+    """
+
+    def __init__(self, socketio, job_workers=JOB_WORKERS, ffmpeg_workers=FFMPEG_WORKERS,
+                 queue_limit=JOB_QUEUE_LIMIT):
+        self.socketio = socketio
+        self.queue_limit = queue_limit
+        self.ffmpeg_workers = ffmpeg_workers
+
+        self._executor = ThreadPoolExecutor(max_workers=job_workers, thread_name_prefix='job')
+        # Workers start on first use, from a job thread; forking a process with running
+        # threads can copy locks mid-use, so they come from a single-threaded forkserver
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self._process_pool = ProcessPoolExecutor(max_workers=ffmpeg_workers,
+                                                 mp_context=multiprocessing.get_context(start_method))
+        self._cpu_slots = threading.BoundedSemaphore(ffmpeg_workers)
+
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self._emits = queue.Queue()
+        self._pump_started = False
+        self._encodings = {}
+
+        self.batch_size = CAPTION_BATCH_SIZE
+        self.batch_window = CAPTION_BATCH_WINDOW
+
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'captions_emitted': 0,
+            'caption_batches': 0
+        }
+
+        logger.info(f"Job manager initialized ({job_workers} job workers, "
+                    f"{ffmpeg_workers} ffmpeg workers, queue limit {queue_limit})")
+
+    # ---------- submission ----------
+
+    def submit(self, kind, fn, *args, to=None, trace_id=None):
+        """
+        Queue a job
+
+        Args:
+            kind: Job type label, e.g. 'upload' or 'youtube'
+            fn: Callable run on a job thread with *args
+            to: Optional Socket.IO sid/room that receives the job's status events
+            trace_id: Timeline to record the job's spans in (default: the job ID),
+                e.g. an upload session ID so the upload and its processing share one trace
+
+        Returns:
+            Job ID
+
+        Raises:
+            JobQueueFull: if JOB_QUEUE_LIMIT jobs are already waiting
+        """
+        with self._lock:
+            self._prune_finished()
+
+            queued = sum(1 for job in self._jobs.values() if job['state'] == 'queued')
+            if queued >= self.queue_limit:
+                self.stats['rejected'] += 1
+                raise JobQueueFull(f'Server busy: {queued} jobs already queued, try again later')
+
+            job_id = uuid.uuid4().hex[:12]
+            trace = tracing.tracer.start(trace_id or job_id, kind)
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'kind': kind,
+                'state': 'queued',
+                'stage': None,
+                'to': to,
+                'created_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'first_caption_at': None,
+                'trace_id': trace.trace_id if trace else None,
+                'error': None
+            }
+            self.stats['submitted'] += 1
+
+        self._ensure_pump()
+        self._emit_status(job_id)
+        self._executor.submit(self._run, job_id, fn, args, trace)
+
+        logger.info(f"Job {job_id} ({kind}) queued")
+        return job_id
+
+    def _run(self, job_id, fn, args, trace):
+        self._local.job_id = job_id
+        started_at = time.time()
+        self._update(job_id, state='running', started_at=started_at)
+        self._emit_status(job_id)
+
+        job = self.get_job(job_id)
+        try:
+            with tracing.activate(trace):
+                if trace:
+                    trace.add_span_at('job.queued', job['created_at'], started_at, {'job_id': job_id})
+                with tracing.span(f"job.{job['kind']}", job_id=job_id):
+                    fn(*args)
+            self._update(job_id, state='done', finished_at=time.time())
+            with self._lock:
+                self.stats['completed'] += 1
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            self._update(job_id, state='failed', finished_at=time.time(), error=str(e))
+            with self._lock:
+                self.stats['failed'] += 1
+        finally:
+            self._emit_status(job_id)
+            self._local.job_id = None
+
+    # ---------- stages ----------
+
+    def run_cpu(self, fn, *args):
+        """Run a picklable CPU-bound callable (e.g. ffmpeg extraction) on the process pool"""
+        with tracing.span('process_pool', fn=fn.__name__):
+            return self._process_pool.submit(fn, *args).result()
+
+    @contextmanager
+    def cpu_slot(self):
+        """Hold one of the FFMPEG_WORKERS slots while a streaming ffmpeg process runs"""
+        self._cpu_slots.acquire()
+        try:
+            yield
+        finally:
+            self._cpu_slots.release()
+
+    def progress(self, stage, message=None):
+        """Report the current job's stage to its client"""
+        job_id = getattr(self._local, 'job_id', None)
+        if not job_id:
+            return
+
+        self._update(job_id, stage=stage)
+        job = self.get_job(job_id)
+        self.emit('job_progress', {
+            'job_id': job_id,
+            'kind': job['kind'],
+            'stage': stage,
+            'message': message
+        }, to=job['to'])
+
+    def current_job_id(self):
+        """ID of the job running on this thread, if any"""
+        return getattr(self._local, 'job_id', None)
+
+    # ---------- emitting ----------
+
+    def emit(self, event, data, to=None, namespace='/'):
+        """Thread-safe Socket.IO emit; delivered by the pump on the server's event loop"""
+        self._ensure_pump()
+        self._emits.put((event, data, to, namespace))
+
+    def emit_caption(self, caption, to, namespace='/'):
+        """Queue a caption; it is delivered to `to` inside a caption_batch frame"""
+        job_id = getattr(self._local, 'job_id', None)
+        if job_id:
+            self._record_first_caption(job_id)
+        self.emit('caption', caption, to=to, namespace=namespace)
+
+    def _record_first_caption(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job['first_caption_at']:
+                return
+            job['first_caption_at'] = time.time()
+            elapsed = job['first_caption_at'] - job['created_at']
+            kind = job['kind']
+        TIME_TO_FIRST_CAPTION_SECONDS.observe(elapsed, kind=kind)
+
+    def set_encoding(self, room, encoding):
+        """
+        Choose the caption_batch encoding for a room
+
+        Returns:
+            The encoding that will be used ('json' unless msgpack was asked for and is installed)
+        """
+        encoding = encoding if encoding in CAPTION_ENCODINGS else 'json'
+        with self._lock:
+            if encoding == 'json':
+                self._encodings.pop(room, None)
+            else:
+                self._encodings[room] = encoding
+        return encoding
+
+    def _ensure_pump(self):
+        with self._lock:
+            if self._pump_started:
+                return
+            self._pump_started = True
+        self.socketio.start_background_task(self._pump)
+
+    def _pump(self):
+        # (to, namespace) -> [first queued at, captions]
+        pending = {}
+
+        while True:
+            # Idle until something is queued, or until the oldest pending batch is due
+            timeout = PUMP_IDLE_TIMEOUT
+            if pending:
+                oldest = min(queued_at for queued_at, _ in pending.values())
+                timeout = min(timeout, max(0.0, oldest + self.batch_window - time.monotonic()))
+            queued = self._next_emit(timeout)
+
+            now = time.monotonic()
+            for key in [k for k, (queued_at, _) in pending.items()
+                        if now - queued_at >= self.batch_window]:
+                self._flush_captions(key, pending.pop(key)[1])
+            if queued is None:
+                continue
+
+            event, data, to, namespace = queued
+            key = (to, namespace)
+            if event == 'caption':
+                batch = pending.setdefault(key, [time.monotonic(), []])
+                batch[1].append(data)
+                if len(batch[1]) >= self.batch_size:
+                    self._flush_captions(key, pending.pop(key)[1])
+                continue
+
+            # Keep ordering: captions go out before the status that follows them
+            if key in pending:
+                self._flush_captions(key, pending.pop(key)[1])
+            self._send(event, data, to, namespace)
+
+    def _next_emit(self, timeout):
+        """Wait up to timeout seconds for a queued emit; None if there was none"""
+        try:
+            return self._emits.get_nowait()
+        except queue.Empty:
+            pass
+
+        try:
+            if tpool and getattr(self.socketio, 'async_mode', None) == 'eventlet':
+                # Job threads fill the queue, and blocking on it would stall the hub
+                return tpool.execute(self._emits.get, True, timeout)
+            return self._emits.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _flush_captions(self, key, captions):
+        to, namespace = key
+        with self._lock:
+            encoding = self._encodings.get(to, 'json')
+            self.stats['captions_emitted'] += len(captions)
+            self.stats['caption_batches'] += 1
+        self._send('caption_batch', encode_caption_batch(captions, encoding), to, namespace)
+
+    def _send(self, event, data, to, namespace):
+        try:
+            self.socketio.emit(event, data, to=to, namespace=namespace)
+        except Exception as e:
+            logger.error(f"Error emitting {event}: {str(e)}")
+
+    def _emit_status(self, job_id):
+        job = self.get_job(job_id)
+        if job:
+            self.emit('job_status', {
+                'job_id': job_id,
+                'kind': job['kind'],
+                'state': job['state'],
+                'error': job['error']
+            }, to=job['to'])
+
+    # ---------- bookkeeping ----------
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _prune_finished(self):
+        cutoff = time.time() - FINISHED_JOB_TTL
+        for job_id in [j for j, job in self._jobs.items()
+                       if job['finished_at'] and job['finished_at'] < cutoff]:
+            del self._jobs[job_id]
+
+    def get_job(self, job_id):
+        """Return a copy of a job's state, or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def is_active(self, job_id):
+        """True while a job is queued or running"""
+        job = self.get_job(job_id)
+        return bool(job) and job['state'] in ('queued', 'running')
+
+    def get_stats(self):
+        """Queue depth, in-flight count and lifetime counters"""
+        with self._lock:
+            states = [job['state'] for job in self._jobs.values()]
+            return dict(
+                self.stats,
+                queue_depth=states.count('queued'),
+                in_flight=states.count('running'),
+                ffmpeg_workers=self.ffmpeg_workers,
+                queue_limit=self.queue_limit
+            )
@@ -0,0 +1,452 @@
+"""
+Live captioning of microphone and stream audio
+
+Clients connect to the /live Socket.IO namespace, send `start`, then a
+stream of binary `audio` events, and finally `stop`:
+
+    start  {language, spoken_language?, format: 'pcm16' | 'opus', sample_rate?}
+    audio  <bytes>  pcm16: mono s16le at sample_rate; opus: a WebM/Ogg Opus
+                    stream, e.g. MediaRecorder chunks
+    stop
+
+and receive
+
+    live_partial  {captions, language, revision}  the not-yet-stable tail,
+                  replacing the previous partial
+    live_final    {captions, language}            captions that won't change
+    live_ended    {stats}
+
+Each session keeps a rolling buffer of the audio not yet finalized. Every
+LIVE_STEP_SECONDS of new audio that buffer is transcribed again, so
+consecutive windows overlap and a caption is re-recognized with more
+context until LIVE_STABLE_SECONDS of audio follow it, or two windows in a
+row agree on it; it is then final and its audio leaves the buffer, so only
+the unstable tail is sent again.
+
+Live windows are sent on their own Sarvam rate limit (SARVAM_LIVE_RATE_LIMIT),
+and the session cap is derived from it.
+"""
+import os
+import time
+import queue
+import logging
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from audio_processor import AudioProcessor, SAMPLE_RATE, BYTES_PER_SAMPLE, LIVE_INPUT_ARGS
+from vad import VoiceActivityFilter
+from stt_service import SarvamSTTService
+from sarvam_client import SARVAM_LIVE_RATE_LIMIT
+from metrics import LIVE_CAPTION_LATENCY_SECONDS, LIVE_WINDOWS
+
+logger = logging.getLogger(__name__)
+
+# Live captioning configuration
+LIVE_STEP_SECONDS = float(os.getenv('LIVE_STEP_SECONDS', 0.75))  # new audio between windows
+LIVE_STABLE_SECONDS = float(os.getenv('LIVE_STABLE_SECONDS', 1.0))  # audio after a caption before it's final
+LIVE_MAX_WINDOW_SECONDS = float(os.getenv('LIVE_MAX_WINDOW_SECONDS', 10))  # longest window re-sent per step
+LIVE_WORKERS = int(os.getenv('LIVE_WORKERS', 32))  # windows transcribed at once, across all sessions
+# Longest a speaking session waits between windows when every session is speaking
+LIVE_MAX_STEP_SECONDS = float(os.getenv('LIVE_MAX_STEP_SECONDS', 2.5))
+# Sessions the live rate limit can serve within LIVE_MAX_STEP_SECONDS each
+LIVE_MAX_SESSIONS = int(os.getenv('LIVE_MAX_SESSIONS', 0)) or \
+    max(1, int(SARVAM_LIVE_RATE_LIMIT * LIVE_MAX_STEP_SECONDS))
+LIVE_DECODE_FRAME_SECONDS = 0.1  # Opus is decoded in frames this short
+
+LIVE_INPUT_FORMATS = ('pcm16', 'opus')
+
+PCM_BYTES_PER_SECOND = SAMPLE_RATE * BYTES_PER_SAMPLE
+
+
+class LiveSessionLimit(Exception):
+    """Raised when a live session is started while LIVE_MAX_SESSIONS are open"""
+
+
+class LiveSession:
+    """Audio buffer and progress of one live stream"""
+
+    def __init__(self, session_id, engine, language, spoken_language, input_format, sample_rate):
+        self.session_id = session_id
+        self.engine = engine
+        self.language = language
+        self.spoken_language = spoken_language
+        self.asr_language_code = SarvamSTTService.LANGUAGE_CODES[spoken_language]
+        self.input_format = input_format
+        self.sample_rate = sample_rate
+
+        self.lock = threading.Lock()
+        self.buffer = bytearray()     # audio not finalized yet, 16 kHz mono s16le
+        self.buffer_start = 0.0       # stream time of buffer[0]
+        self.received_seconds = 0.0   # stream time of the end of the buffer
+        self.submitted_until = 0.0    # stream time covered by the last window
+        self.checked_bytes = 0        # buffer prefix already run through VAD
+        self.has_speech = False       # speech somewhere in the buffer
+        self.has_partial = False
+        self.previous_partial = []    # texts of the last window's unfinished captions
+        self.last_audio_at = None
+        self.in_flight = False
+        self.stopping = False         # client sent stop, no more audio accepted
+        self.input_done = False       # all audio is in the buffer (Opus may still be decoding after stop)
+        self.closed = False
+        self.revision = 0
+        self._carry = b''             # odd trailing byte of a pcm16 frame
+
+        self.vad = VoiceActivityFilter()
+        self.decoder = None
+        self.started_at = time.time()
+        self.stats = {
+            'audio_seconds': 0.0,
+            'windows': 0,
+            'skipped_windows': 0,
+            'failed_windows': 0,
+            'final_captions': 0
+        }
+
+    def to_pcm(self, data):
+        """Convert a pcm16 frame at the client's sample rate to 16 kHz"""
+        data = self._carry + bytes(data)
+        usable = len(data) - len(data) % BYTES_PER_SAMPLE
+        self._carry = data[usable:]
+        if self.sample_rate == SAMPLE_RATE:
+            return data[:usable]
+
+        samples = np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32)
+        count = int(round(len(samples) * SAMPLE_RATE / float(self.sample_rate)))
+        if not count:
+            return b''
+        positions = np.linspace(0, len(samples) - 1, count)
+        return np.interp(positions, np.arange(len(samples)), samples).astype(np.int16).tobytes()
+
+
+class OpusDecoder:
+    """Feeds a live Opus stream through ffmpeg and hands back 16 kHz PCM as it decodes"""
+
+    def __init__(self, label, on_pcm, on_error, on_end):
+        self._chunks = queue.Queue()
+        self._thread = threading.Thread(target=self._run, args=(label, on_pcm, on_error, on_end),
+                                        daemon=True, name=f"live-decode-{label}")
+        self._thread.start()
+
+    def feed(self, data):
+        self._chunks.put(bytes(data))
+
+    def close(self):
+        self._chunks.put(None)
+
+    def _iter_chunks(self):
+        while True:
+            chunk = self._chunks.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    def _run(self, label, on_pcm, on_error, on_end):
+        try:
+            frames = AudioProcessor.stream_audio_from_chunks(
+                self._iter_chunks(), label=label, frame_seconds=LIVE_DECODE_FRAME_SECONDS,
+                input_args=LIVE_INPUT_ARGS
+            )
+            for _, pcm in frames:
+                on_pcm(pcm)
+        except Exception as e:
+            logger.error(f"Live Opus decoding failed for {label}: {str(e)}")
+            on_error(str(e))
+        finally:
+            on_end()
+
+
+class LiveCaptioner:
+    """Incremental transcription of many live sessions on one shared worker pool
+
+    Audio handlers only append to a session's buffer. Once a session has
+    LIVE_STEP_SECONDS of new audio and no window in flight, its buffer is
+    queued for transcription, so sessions never queue more than one window:
+    when the engine falls behind, windows get longer instead of piling up.
+    Buffers made only of non-speech audio are dropped without an API call.
+    """
+
+    def __init__(self, emit, translate, workers=LIVE_WORKERS, max_sessions=LIVE_MAX_SESSIONS):
+        """
+        Args:
+            emit: Callable(event, data, session_id) delivering an event to a session's client
+            translate: Callable(captions, language, source_language) returning translated captions
+            workers: Windows transcribed at once across all sessions
+            max_sessions: Open sessions allowed at once
+        """
+        self.emit = emit
+        self.translate = translate
+        self.max_sessions = max_sessions
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='live')
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    # ---------- session lifecycle ----------
+
+    def start(self, session_id, engine, language, spoken_language, input_format='pcm16',
+              sample_rate=SAMPLE_RATE):
+        """
+        Open a live session, replacing any earlier one with the same ID
+
+        Args:
+            session_id: Client ID the captions are emitted to
+            engine: STT engine chosen by stt_router
+            language: Caption language key
+            spoken_language: Language key of the speech (ASR runs in it)
+            input_format: 'pcm16' or 'opus'
+            sample_rate: Sample rate of pcm16 input
+
+        Raises:
+            LiveSessionLimit: if LIVE_MAX_SESSIONS sessions are open
+        """
+        self.close(session_id)
+
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                raise LiveSessionLimit(f'Server busy: {len(self._sessions)} live sessions open, try again later')
+            session = LiveSession(session_id, engine, language, spoken_language, input_format, sample_rate)
+            self._sessions[session_id] = session
+
+        if input_format == 'opus':
+            session.decoder = OpusDecoder(
+                session_id,
+                on_pcm=lambda pcm: self._add_pcm(session, pcm),
+                on_error=lambda message: self.emit('live_error', {'message': message}, session_id),
+                on_end=lambda: self._input_done(session)
+            )
+
+        logger.info(f"Live session {session_id} started ({input_format}, {spoken_language} -> {language}, "
+                    f"{engine.name})")
+        return session
+
+    def feed(self, session_id, data):
+        """
+        Append a frame of audio to a session
+
+        Returns:
+            False if the session doesn't exist or is stopping
+        """
+        session = self._get(session_id)
+        if session is None or session.stopping:
+            return False
+
+        if session.decoder:
+            session.decoder.feed(data)
+        else:
+            self._add_pcm(session, session.to_pcm(data))
+        return True
+
+    def stop(self, session_id):
+        """Finalize everything still buffered, then end the session"""
+        session = self._get(session_id)
+        if session is None:
+            return False
+
+        with session.lock:
+            if session.stopping:
+                return True
+            session.stopping = True
+
+        if session.decoder:
+            # The decoder's last PCM arrives asynchronously; the final window follows it
+            session.decoder.close()
+        else:
+            self._input_done(session)
+        return True
+
+    def close(self, session_id):
+        """Drop a session without finalizing, e.g. when its client disconnects"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return
+        with session.lock:
+            session.closed = True
+        if session.decoder:
+            session.decoder.close()
+        logger.info(f"Live session {session_id} closed")
+
+    def _input_done(self, session):
+        with session.lock:
+            session.input_done = True
+        self._schedule(session, final=True)
+
+    def _get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    # ---------- windows ----------
+
+    def _add_pcm(self, session, pcm):
+        if not pcm:
+            return
+        with session.lock:
+            if session.closed:
+                return
+            session.buffer.extend(pcm)
+            seconds = len(pcm) / float(PCM_BYTES_PER_SECOND)
+            session.received_seconds += seconds
+            session.stats['audio_seconds'] += seconds
+            session.last_audio_at = time.monotonic()
+            ready = (not session.in_flight and not session.input_done
+                     and session.received_seconds - session.submitted_until >= LIVE_STEP_SECONDS)
+            if ready:
+                session.in_flight = True
+
+        if ready:
+            self._pool.submit(self._run_window, session, False)
+
+    def _schedule(self, session, final):
+        with session.lock:
+            if session.in_flight or session.closed:
+                # The window in flight picks this up when it finishes
+                return
+            session.in_flight = True
+        self._pool.submit(self._run_window, session, final)
+
+    def _run_window(self, session, final):
+        try:
+            final = self._transcribe_window(session, final) or final
+        except Exception as e:
+            logger.error(f"Live window failed for {session.session_id}: {str(e)}", exc_info=True)
+        finally:
+            with session.lock:
+                session.in_flight = False
+                again = not session.closed and (
+                    session.input_done or session.received_seconds - session.submitted_until >= LIVE_STEP_SECONDS
+                )
+
+        if final:
+            self._end(session)
+        elif again:
+            self._schedule(session, final=session.input_done)
+
+    def _transcribe_window(self, session, final):
+        """
+        Transcribe the session's buffer once and emit final and partial captions
+
+        Returns:
+            True if this was the session's final window
+        """
+        with session.lock:
+            if session.closed:
+                return False
+            final = final or session.input_done
+            pcm = bytes(session.buffer)
+            window_start = session.buffer_start
+            session.submitted_until = session.received_seconds
+            audio_at = session.last_audio_at
+
+            # Only audio added since the last window needs a VAD pass
+            new_samples = np.frombuffer(pcm[session.checked_bytes:], dtype=np.int16)
+            session.checked_bytes = len(pcm)
+
+        if len(new_samples):
+            session.has_speech = session.has_speech or bool(session.vad.speech_mask(new_samples).any())
+
+        window_end = window_start + len(pcm) / float(PCM_BYTES_PER_SECOND)
+
+        if not session.has_speech:
+            # Silence or noise: skip the engine, keep a little audio for the next word's onset
+            LIVE_WINDOWS.inc(outcome='skipped')
+            session.stats['skipped_windows'] += 1
+            self._commit(session, window_end - LIVE_STABLE_SECONDS, partial=False)
+            return final
+
+        LIVE_WINDOWS.inc(outcome='transcribed')
+        session.stats['windows'] += 1
+        result = session.engine.transcribe_window(pcm, window_start, session.asr_language_code)
+
+        if result['status'] != 'success':
+            session.stats['failed_windows'] += 1
+            logger.warning(f"Live window failed for {session.session_id}: {result.get('message')}")
+            if len(pcm) > 2 * LIVE_MAX_WINDOW_SECONDS * PCM_BYTES_PER_SECOND:
+                # Don't let a failing engine grow the buffer without bound
+                self._commit(session, window_end - LIVE_MAX_WINDOW_SECONDS, partial=session.has_partial)
+            return final
+
+        captions = sorted(result['captions'], key=lambda cap: cap['start_time'])
+
+        # Captions with enough audio after them won't change in later windows
+        stable = 0
+        if final:
+            stable = len(captions)
+        else:
+            while stable < len(captions) and captions[stable]['end_time'] <= window_end - LIVE_STABLE_SECONDS:
+                stable += 1
+            # Both windows start at the buffer start, so captions line up by position;
+            # ones the last window ended the same way are final, except the newest, which may still grow
+            while (stable < len(captions) - 1 and stable < len(session.previous_partial)
+                   and captions[stable]['text'] == session.previous_partial[stable]):
+                stable += 1
+            if not stable and captions and window_end - window_start >= LIVE_MAX_WINDOW_SECONDS:
+                # Continuous speech with no stable point: finalize all but the newest caption
+                stable = max(1, len(captions) - 1)
+
+        if stable:
+            finals = self.translate(captions[:stable], session.language, session.spoken_language)
+            session.stats['final_captions'] += len(finals)
+            self.emit('live_final', {'captions': finals, 'language': session.language}, session.session_id)
+            LIVE_CAPTION_LATENCY_SECONDS.observe(time.monotonic() - audio_at, kind='final')
+            self._commit(session, captions[stable - 1]['end_time'], partial=stable < len(captions))
+        elif not captions and window_end - window_start >= LIVE_MAX_WINDOW_SECONDS:
+            # Speech-like noise the engine found no words in
+            self._commit(session, window_end - LIVE_STABLE_SECONDS, partial=False)
+
+        partial = captions[stable:]
+        session.previous_partial = [cap['text'] for cap in partial]
+        if partial or session.has_partial:
+            with session.lock:
+                session.revision += 1
+                revision = session.revision
+                session.has_partial = bool(partial)
+            self.emit('live_partial', {
+                'captions': partial,
+                'language': session.spoken_language,
+                'revision': revision
+            }, session.session_id)
+            LIVE_CAPTION_LATENCY_SECONDS.observe(time.monotonic() - audio_at, kind='partial')
+
+        return final
+
+    def _commit(self, session, until, partial):
+        """Drop buffered audio before stream time `until`; it has been captioned or was silence"""
+        with session.lock:
+            drop = int((until - session.buffer_start) * SAMPLE_RATE) * BYTES_PER_SAMPLE
+            drop = max(0, min(drop, len(session.buffer)))
+            if not drop:
+                return
+            del session.buffer[:drop]
+            session.buffer_start += drop / float(PCM_BYTES_PER_SECOND)
+            session.checked_bytes = max(0, session.checked_bytes - drop)
+            # The next window starts elsewhere, so earlier captions no longer line up
+            session.previous_partial = []
+            # Whatever is left was heard as part of an unfinished caption, or not yet checked
+            session.has_speech = partial
+            session.has_partial = partial
+
+    def _end(self, session):
+        with self._lock:
+            if self._sessions.get(session.session_id) is session:
+                del self._sessions[session.session_id]
+        with session.lock:
+            session.closed = True
+            stats = dict(session.stats, duration_seconds=round(time.time() - session.started_at, 1))
+        self.emit('live_ended', {'stats': stats}, session.session_id)
+        logger.info(f"Live session {session.session_id} ended: {stats}")
+
+    # ---------- stats ----------
+
+    def session_count(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def get_stats(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            'sessions': len(sessions),
+            'max_sessions': self.max_sessions,
+            'buffered_seconds': round(sum(len(s.buffer) for s in sessions) / float(PCM_BYTES_PER_SECOND), 1),
+            'step_seconds': LIVE_STEP_SECONDS,
+            'stable_seconds': LIVE_STABLE_SECONDS
+        }
@@ -0,0 +1,256 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LONG_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def directory_size(path):
+    """Total size of the files under path, in bytes"""
+    total = 0
+    try:
+        for entry in os.scandir(path):
+            if entry.is_dir(follow_symlinks=False):
+                total += directory_size(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                total += entry.stat(follow_symlinks=False).st_size
+    except OSError:
+        pass
+    return total
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. bytes uploaded or API errors"""
+
+    type_name = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in values]
+
+
+class Gauge(_Metric):
+    """Point-in-time value, read from a callback when scraped"""
+
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._callback = None
+
+    def set_function(self, callback):
+        """
+        Read the gauge from callback at scrape time
+
+        callback returns a number, or a dict of label-value tuple -> number
+        for labelled gauges.
+        """
+        self._callback = callback
+
+    def _samples(self):
+        if not self._callback:
+            return []
+        try:
+            values = self._callback()
+        except Exception as e:
+            logger.error(f"Error reading gauge {self.name}: {str(e)}")
+            return []
+
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """Distribution of observed durations in cumulative buckets"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series = {}
+
+    def observe(self, value, count=1, **labels):
+        """Record value, count times (e.g. once per caption in a batch)"""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += count
+            series[1] += value * count
+            series[2] += count
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        with self._lock:
+            series = [(key, list(counts), total, count)
+                      for key, (counts, total, count) in sorted(self._series.items())]
+
+        lines = []
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ('le', _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Holds metrics and renders them in the Prometheus text format"""
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# ---------- uploads ----------
+
+UPLOAD_CHUNK_SECONDS = REGISTRY.register(Histogram(
+    'caption_upload_chunk_seconds', 'Time to receive and store one upload chunk', labels=('mode',)))
+UPLOAD_BYTES = REGISTRY.register(Counter(
+    'caption_upload_bytes_total', 'Upload bytes stored'))
+UPLOAD_FINALIZE_SECONDS = REGISTRY.register(Histogram(
+    'caption_upload_finalize_seconds', 'Time to merge or finalize a completed upload', labels=('mode',),
+    buckets=LONG_BUCKETS))
+
+# ---------- processing ----------
+
+FFMPEG_EXTRACT_SECONDS = REGISTRY.register(Histogram(
+    'caption_ffmpeg_extract_seconds',
+    'Audio extraction to a WAV file, including the YouTube download; streamed decodes are in '
+    'caption_ffmpeg_stream_seconds', labels=('source',), buckets=LONG_BUCKETS))
+FFMPEG_STREAM_SECONDS = REGISTRY.register(Histogram(
+    'caption_ffmpeg_stream_seconds',
+    'Streamed audio decode: time to the first frame (stage "first_frame") and until the stream ends '
+    '(stage "total", paced by transcription)', labels=('source', 'stage'), buckets=LONG_BUCKETS))
+SARVAM_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'caption_sarvam_request_seconds', 'Latency of individual Sarvam API requests', labels=('endpoint',)))
+SARVAM_ERRORS = REGISTRY.register(Counter(
+    'caption_sarvam_errors_total', 'Sarvam API requests that failed or returned an error status',
+    labels=('endpoint',)))
+SARVAM_RETRIES = REGISTRY.register(Counter(
+    'caption_sarvam_retries_total', 'Sarvam API requests retried', labels=('endpoint',)))
+TRANSLATE_CAPTION_SECONDS = REGISTRY.register(Histogram(
+    'caption_translate_seconds', 'Translation latency seen by each caption', labels=('target',)))
+TIME_TO_FIRST_CAPTION_SECONDS = REGISTRY.register(Histogram(
+    'caption_time_to_first_caption_seconds', 'Time from job submission to its first caption',
+    labels=('kind',), buckets=LONG_BUCKETS))
+LANGUAGE_DETECTIONS = REGISTRY.register(Counter(
+    'caption_language_detections_total',
+    'Spoken-language detections; outcome "direct" means ASR ran in the caption language',
+    labels=('language', 'outcome')))
+ASR_REUSED = REGISTRY.register(Counter(
+    'caption_asr_reused_total', 'Jobs that reused a transcription instead of running ASR',
+    labels=('source',)))
+
+# ---------- temporary storage ----------
+
+TEMP_STORAGE_REMOVED = REGISTRY.register(Counter(
+    'caption_temp_storage_removed_total', 'Temporary files and upload sessions removed by the janitor',
+    labels=('reason',)))
+TEMP_STORAGE_REMOVED_BYTES = REGISTRY.register(Counter(
+    'caption_temp_storage_removed_bytes_total', 'Bytes freed by the janitor', labels=('reason',)))
+TEMP_STORAGE_REJECTED = REGISTRY.register(Counter(
+    'caption_temp_storage_rejected_total', 'Uploads and downloads refused because of the disk quota',
+    labels=('kind',)))
+
+# ---------- live captioning ----------
+
+LIVE_CAPTION_LATENCY_SECONDS = REGISTRY.register(Histogram(
+    'caption_live_latency_seconds', 'Time from receiving the newest audio of a live window to its captions',
+    labels=('kind',)))
+LIVE_WINDOWS = REGISTRY.register(Counter(
+    'caption_live_windows_total', 'Live audio windows, by whether they were transcribed or skipped as silence',
+    labels=('outcome',)))
+
+# ---------- state (filled in by the app at scrape time) ----------
+
+JOBS_ACTIVE = REGISTRY.register(Gauge(
+    'caption_jobs_active', 'Jobs queued or running', labels=('state',)))
+LIVE_SESSIONS = REGISTRY.register(Gauge(
+    'caption_live_sessions', 'Live captioning sessions open'))
+TEMP_DISK_BYTES = REGISTRY.register(Gauge(
+    'caption_temp_disk_bytes', 'Bytes used by temporary upload and audio files', labels=('dir',)))
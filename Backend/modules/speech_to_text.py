@@ -1,14 +1,24 @@
 import whisper
 
+# Loaded once per process and shared by every SpeechToText instance
+_model = None
+
+def get_model():
+    """Load the Whisper model on first use and keep it resident"""
+    global _model
+    if _model is None:
+        print(f"📍 Loading Whisper model...")
+        _model = whisper.load_model('base')
+        print(f"✅ Whisper loaded!")
+    return _model
+
 class SpeechToText:
     """OpenAI Whisper - FREE Speech-to-Text"""
     
     def __init__(self, language_code='hi'):
         self.language_code = language_code
-        print(f"📍 Loading Whisper model...")
         try:
-            self.model = whisper.load_model('base')
-            print(f"✅ Whisper loaded!")
+            self.model = get_model()
         except Exception as e:
             print(f"❌ Error: {e}")
             self.model = None
@@ -0,0 +1,250 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Result cache configuration
+RESULT_CACHE_DIR = os.getenv('RESULT_CACHE_DIR', os.path.join('./cache', 'results'))
+RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', 1024 * 1024 * 1024))  # 1GB
+
+# Content IDs become part of filenames
+CONTENT_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+
+# Track IDs are the stored file names without extension
+TRACK_ID_PATTERN = re.compile(r'^[a-z]+-[A-Za-z0-9_-]{1,128}-[0-9a-f]{12}$')
+
+# youtu.be/<id>, watch?v=<id>, embed/<id>, shorts/<id>, v/<id>
+YOUTUBE_ID_PATTERN = re.compile(r'(?:youtu\.be/|[?&]v=|/embed/|/shorts/|/v/)([A-Za-z0-9_-]{11})')
+
+
+class ResultCache:
+    """Content-addressed store of finished caption tracks"""
+
+    def __init__(self, cache_dir=RESULT_CACHE_DIR, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # Serialized exports (SRT, WebVTT, TTML) of stored tracks
+        self.exports_dir = os.path.join(cache_dir, 'exports')
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0
+        }
+
+        Path(self.exports_dir).mkdir(parents=True, exist_ok=True)
+        logger.info(f"Result cache initialized: {cache_dir}")
+
+    @staticmethod
+    def canonical_youtube_id(youtube_url):
+        """Reduce a YouTube URL or bare ID to the 11-character video ID"""
+        youtube_url = (youtube_url or '').strip()
+        if re.match(r'^[A-Za-z0-9_-]{11}$', youtube_url):
+            return youtube_url
+
+        match = YOUTUBE_ID_PATTERN.search(youtube_url)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def track_id(kind, content_id, language, model_version):
+        """Stable ID of one stored caption track, or None for an invalid content ID"""
+        if not content_id or not CONTENT_ID_PATTERN.match(content_id):
+            return None
+        version_tag = hashlib.sha1(model_version.encode('utf-8')).hexdigest()[:12]
+        return f"{kind}-{content_id}-{language}-{version_tag}"
+
+    @staticmethod
+    def is_valid_track_id(track_id):
+        """Track IDs become file names, so only allow the shape track_id() produces"""
+        return bool(track_id) and bool(TRACK_ID_PATTERN.match(track_id))
+
+    def _path(self, kind, content_id, language, model_version):
+        return os.path.join(self.cache_dir, f"{self.track_id(kind, content_id, language, model_version)}.json")
+
+    def get(self, kind, content_id, language, model_version):
+        """
+        Look up a stored caption track
+
+        Args:
+            kind: 'upload' (content hash) or 'youtube' (video ID)
+            content_id: Content hash or canonical video ID
+            language: Caption language key
+            model_version: ASR/translation model version string
+
+        Returns:
+            List of caption dicts, or None on a miss
+        """
+        if not content_id or not CONTENT_ID_PATTERN.match(content_id):
+            return None
+
+        path = self._path(kind, content_id, language, model_version)
+        try:
+            with open(path) as f:
+                captions = json.load(f)['captions']
+            # Touch so eviction drops least recently used tracks first
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.stats['misses'] += 1
+            return None
+
+        with self._lock:
+            self.stats['hits'] += 1
+
+        logger.info(f"Result cache hit: {kind} {content_id} ({language}, {len(captions)} captions)")
+        return captions
+
+    def put(self, kind, content_id, language, model_version, captions, transcribed=False):
+        """Store a finished caption track and evict old tracks beyond max_bytes
+
+        transcribed marks the ASR output itself, as opposed to a translation of
+        it, so find_transcribed can offer it as a translation source.
+        """
+        if not content_id or not CONTENT_ID_PATTERN.match(content_id):
+            return
+
+        path = self._path(kind, content_id, language, model_version)
+        tmp_path = f"{path}.tmp"
+
+        try:
+            with self._lock:
+                with open(tmp_path, 'w') as f:
+                    json.dump({
+                        'kind': kind,
+                        'content_id': content_id,
+                        'language': language,
+                        'model_version': model_version,
+                        'transcribed': transcribed,
+                        'captions': captions
+                    }, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+                self._remove_exports(os.path.basename(path)[:-len('.json')])
+
+                self.stats['stores'] += 1
+                self._evict()
+
+            logger.info(f"Result cache stored: {kind} {content_id} ({language}, {len(captions)} captions)")
+        except Exception as e:
+            logger.error(f"Error writing result cache: {str(e)}")
+
+    def find_transcribed(self, kind, content_id, languages, model_version):
+        """
+        Find the stored ASR track of some content among the given languages
+
+        Returns:
+            Tuple of (language, captions), or None if none of them is ASR output
+        """
+        for language in languages:
+            track = self.get_track(self.track_id(kind, content_id, language, model_version))
+            if track and track.get('transcribed'):
+                # get() counts the hit and refreshes the track for eviction
+                captions = self.get(kind, content_id, language, model_version)
+                if captions is not None:
+                    return language, captions
+        return None
+
+    def _evict(self):
+        """Delete least recently used tracks until the store fits in max_bytes"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.json'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.stats['evictions'] += 1
+                self._remove_exports(os.path.basename(path)[:-len('.json')])
+            except OSError:
+                pass
+
+    def invalidate(self, kind=None, content_id=None, language=None):
+        """
+        Delete stored tracks matching the given filters (all tracks if none)
+
+        Returns:
+            Number of tracks deleted
+        """
+        if content_id and not CONTENT_ID_PATTERN.match(content_id):
+            return 0
+
+        removed = 0
+        with self._lock:
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.json'):
+                    continue
+
+                entry_kind, rest = name.split('-', 1)
+                entry_id, entry_language, _ = rest.rsplit('-', 2)
+
+                if kind and entry_kind != kind:
+                    continue
+                if content_id and entry_id != content_id:
+                    continue
+                if language and entry_language != language:
+                    continue
+
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    removed += 1
+                    self._remove_exports(name[:-len('.json')])
+                except OSError:
+                    pass
+
+        logger.info(f"Result cache invalidated {removed} tracks "
+                    f"(kind={kind}, content_id={content_id}, language={language})")
+        return removed
+
+    def get_track(self, track_id):
+        """
+        Load a stored track by its track ID
+
+        Returns:
+            Dict with kind, content_id, language, model_version and captions, or None
+        """
+        if not self.is_valid_track_id(track_id):
+            return None
+
+        try:
+            with open(os.path.join(self.cache_dir, f"{track_id}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def export_path(self, track_id, fmt):
+        """Path of a track's serialized export in the given format"""
+        return os.path.join(self.exports_dir, f"{track_id}.{fmt}")
+
+    def _remove_exports(self, track_id):
+        # Exports are derived from the track and go stale with it
+        for entry in os.scandir(self.exports_dir):
+            if entry.name.startswith(f"{track_id}."):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def get_stats(self):
+        """Get hit/miss counters and store size"""
+        entries = 0
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.json'):
+                entries += 1
+                total += entry.stat().st_size
+
+        with self._lock:
+            return dict(self.stats, entries=entries, bytes=total, max_bytes=self.max_bytes)
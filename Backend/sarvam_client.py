@@ -0,0 +1,214 @@
+import os
+import time
+import random
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from metrics import SARVAM_REQUEST_SECONDS, SARVAM_ERRORS, SARVAM_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Sarvam API client configuration
+SARVAM_API_BASE_URL = os.getenv('SARVAM_API_BASE_URL', 'https://api.sarvam.ai')
+SARVAM_POOL_SIZE = int(os.getenv('SARVAM_POOL_SIZE', 16))
+SARVAM_RATE_LIMIT = float(os.getenv('SARVAM_RATE_LIMIT', 10))  # requests per second
+SARVAM_RATE_BURST = int(os.getenv('SARVAM_RATE_BURST', 20))
+# Live windows have a budget of their own, so batch jobs can't starve live captions;
+# together the two limits should stay within the account's limit
+SARVAM_LIVE_RATE_LIMIT = float(os.getenv('SARVAM_LIVE_RATE_LIMIT', 5))  # requests per second
+SARVAM_LIVE_RATE_BURST = int(os.getenv('SARVAM_LIVE_RATE_BURST', 5))
+SARVAM_MAX_RETRIES = int(os.getenv('SARVAM_MAX_RETRIES', 3))
+SARVAM_BACKOFF_BASE = float(os.getenv('SARVAM_BACKOFF_BASE', 0.5))  # seconds
+SARVAM_BACKOFF_MAX = float(os.getenv('SARVAM_BACKOFF_MAX', 10))  # seconds
+# Total time one request may take across all its attempts and backoff
+SARVAM_REQUEST_DEADLINE = float(os.getenv('SARVAM_REQUEST_DEADLINE', 120))  # seconds
+
+# Status codes worth retrying
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a token is available
+
+        Returns:
+            Seconds spent waiting
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+
+                delay = (1 - self.tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+
+class SarvamClient:
+    """Shared HTTP client for the Sarvam APIs with pooling, rate limiting and retries"""
+
+    def __init__(self, headers, base_url=SARVAM_API_BASE_URL, pool_size=SARVAM_POOL_SIZE,
+                 rate_limit=SARVAM_RATE_LIMIT, burst=SARVAM_RATE_BURST, max_retries=SARVAM_MAX_RETRIES,
+                 live_rate_limit=SARVAM_LIVE_RATE_LIMIT, live_burst=SARVAM_LIVE_RATE_BURST):
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.rate_limiter = TokenBucket(rate_limit, burst)
+        self.live_rate_limiter = TokenBucket(live_rate_limit, live_burst)
+
+        # Keep-alive pool sized to our worker concurrency
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+        logger.info(f"Sarvam client initialized: {self.base_url} "
+                    f"(pool {pool_size}, {rate_limit} req/s + {live_rate_limit} live req/s, "
+                    f"{max_retries} retries)")
+
+    def url(self, path):
+        """Build an absolute API URL from a path such as '/translate'"""
+        return f"{self.base_url}{path}"
+
+    def post(self, url, live=False, deadline=SARVAM_REQUEST_DEADLINE, **kwargs):
+        """
+        POST to a Sarvam endpoint, retrying transient failures
+
+        Args:
+            url: Absolute endpoint URL
+            live: Count the request against the live budget instead of the batch one
+            deadline: Seconds all attempts together may take; each attempt's
+                timeout is cut to what is left, and no retry starts after it
+            **kwargs: Passed through to requests.Session.post
+
+        Returns:
+            requests.Response of the last attempt
+        """
+        endpoint = urlparse(url).path
+        rate_limiter = self.live_rate_limiter if live else self.rate_limiter
+        rewind = self._rewind_positions(kwargs.get('files'))
+        timeout = kwargs.pop('timeout', None)
+        expires = time.monotonic() + deadline
+
+        attempt = 0
+        while True:
+            rate_limiter.acquire()
+            self._seek(rewind)
+            remaining = max(expires - time.monotonic(), 0.001)
+
+            response = None
+            started = time.perf_counter()
+            try:
+                response = self.session.post(url, timeout=min(timeout or remaining, remaining), **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._record(endpoint, time.perf_counter() - started, error=True)
+                delay = self._backoff(attempt + 1)
+                if attempt >= self.max_retries or time.monotonic() + delay >= expires:
+                    raise
+                logger.warning(f"Sarvam {endpoint} request failed ({type(e).__name__}), retrying")
+            else:
+                failed = response.status_code in RETRY_STATUS_CODES
+                self._record(endpoint, time.perf_counter() - started, error=response.status_code >= 400)
+                delay = self._backoff(attempt + 1, response) if failed else 0.0
+                if not failed or attempt >= self.max_retries or time.monotonic() + delay >= expires:
+                    return response
+                logger.warning(f"Sarvam {endpoint} returned {response.status_code}, retrying")
+
+            attempt += 1
+            self._record_retry(endpoint)
+            time.sleep(delay)
+
+    @staticmethod
+    def _backoff(attempt, response=None):
+        """Full-jitter exponential backoff, honouring Retry-After when present"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                try:
+                    return min(float(retry_after), SARVAM_BACKOFF_MAX)
+                except ValueError:
+                    pass
+
+        return random.uniform(0, min(SARVAM_BACKOFF_MAX, SARVAM_BACKOFF_BASE * (2 ** attempt)))
+
+    @staticmethod
+    def _rewind_positions(files):
+        """Remember file object positions so retries re-send the same bytes"""
+        positions = []
+        for value in (files or {}).values():
+            file_obj = value[1] if isinstance(value, tuple) else value
+            if hasattr(file_obj, 'seek') and hasattr(file_obj, 'tell'):
+                positions.append((file_obj, file_obj.tell()))
+        return positions
+
+    @staticmethod
+    def _seek(positions):
+        for file_obj, position in positions:
+            file_obj.seek(position)
+
+    def _endpoint_stats(self, endpoint):
+        return self._stats.setdefault(endpoint, {
+            'requests': 0,
+            'errors': 0,
+            'retries': 0,
+            'total_latency': 0.0,
+            'max_latency': 0.0
+        })
+
+    def _record(self, endpoint, latency, error=False):
+        with self._stats_lock:
+            stats = self._endpoint_stats(endpoint)
+            stats['requests'] += 1
+            stats['total_latency'] += latency
+            stats['max_latency'] = max(stats['max_latency'], latency)
+            if error:
+                stats['errors'] += 1
+
+        SARVAM_REQUEST_SECONDS.observe(latency, endpoint=endpoint)
+        if error:
+            SARVAM_ERRORS.inc(endpoint=endpoint)
+
+    def _record_retry(self, endpoint):
+        with self._stats_lock:
+            self._endpoint_stats(endpoint)['retries'] += 1
+        SARVAM_RETRIES.inc(endpoint=endpoint)
+
+    def get_stats(self):
+        """Get per-endpoint request, error, retry and latency counters"""
+        with self._stats_lock:
+            return {
+                endpoint: {
+                    'requests': stats['requests'],
+                    'errors': stats['errors'],
+                    'retries': stats['retries'],
+                    'avg_latency': round(stats['total_latency'] / stats['requests'], 4)
+                        if stats['requests'] else 0.0,
+                    'max_latency': round(stats['max_latency'], 4)
+                }
+                for endpoint, stats in self._stats.items()
+            }
@@ -0,0 +1,109 @@
+import logging
+import threading
+from metrics import ASR_REUSED
+
+logger = logging.getLogger(__name__)
+
+
+class SharedTranscription:
+    """One ASR pass whose segments are replayed, in order, to every job that joined it"""
+
+    def __init__(self, key):
+        self.key = key
+        self.followers = 0
+        self.result = None
+        self._segments = []
+        self._done = False
+        self._cond = threading.Condition()
+
+    def publish(self, segment_result):
+        with self._cond:
+            self._segments.append(segment_result)
+            self._cond.notify_all()
+
+    def finish(self, result):
+        with self._cond:
+            self.result = result
+            self._done = True
+            self._cond.notify_all()
+
+    def segments(self):
+        """Yield every segment published so far and then each new one until the pass finishes"""
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self._segments) and not self._done:
+                    self._cond.wait()
+                if index >= len(self._segments):
+                    return
+                segment_result = self._segments[index]
+            index += 1
+            yield segment_result
+
+
+class InFlightTranscriptions:
+    """Deduplicates concurrent ASR of the same content
+
+    The first job for a key runs the transcription; jobs arriving while it
+    is in flight follow it, receiving the same segments as they finish and
+    the same final result, instead of downloading and transcribing again.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'transcriptions': 0,
+            'shared': 0
+        }
+
+    def run(self, key, transcribe, on_segment):
+        """
+        Run transcribe(on_segment) once per in-flight key
+
+        Args:
+            key: Hashable content identity, or None to never share
+            transcribe: Callable(on_segment) that runs ASR and returns the ASR result dict
+            on_segment: Callback for each finished segment, in order
+
+        Returns:
+            ASR result dict
+        """
+        if key is None:
+            return transcribe(on_segment)
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = SharedTranscription(key)
+                self.stats['transcriptions'] += 1
+            else:
+                flight.followers += 1
+                self.stats['shared'] += 1
+
+        if not leader:
+            ASR_REUSED.inc(source='in_flight')
+            logger.info(f"Sharing in-flight transcription of {key}")
+            for segment_result in flight.segments():
+                on_segment(segment_result)
+            return flight.result
+
+        def publish(segment_result):
+            # Followers start translating before the leader does
+            flight.publish(segment_result)
+            on_segment(segment_result)
+
+        result = {'status': 'error', 'message': 'Shared transcription failed'}
+        try:
+            result = transcribe(publish)
+            return result
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.finish(result)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._flights))
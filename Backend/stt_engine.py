@@ -0,0 +1,453 @@
+import os
+import math
+import time
+import wave
+import logging
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import tracing
+from metrics import LANGUAGE_DETECTIONS
+
+logger = logging.getLogger(__name__)
+
+# Segmented transcription configuration
+SEGMENT_SECONDS = int(os.getenv('STT_SEGMENT_SECONDS', 30))
+# Audio shared by neighbouring windows, so a word cut at one window's edge is whole in the other
+SEGMENT_OVERLAP_SECONDS = float(os.getenv('STT_SEGMENT_OVERLAP_SECONDS', 1.0))
+STT_MAX_WORKERS = int(os.getenv('STT_MAX_WORKERS', 4))
+
+# Engine routing: processing seconds per second of audio a job may take
+STT_LATENCY_TARGET = float(os.getenv('STT_LATENCY_TARGET', 0.25))
+
+# An engine whose windows keep failing (e.g. API over quota) is skipped for a while
+STT_ENGINE_FAILURE_THRESHOLD = int(os.getenv('STT_ENGINE_FAILURE_THRESHOLD', 3))
+STT_ENGINE_COOLDOWN = float(os.getenv('STT_ENGINE_COOLDOWN', 60))  # seconds
+
+# Spoken-language identification on the start of the speech, so audio already in
+# a caption language is transcribed in it directly instead of translated
+LANGUAGE_DETECTION = os.getenv('LANGUAGE_DETECTION', 'true').lower() == 'true'
+LANGUAGE_DETECTION_SECONDS = float(os.getenv('LANGUAGE_DETECTION_SECONDS', 15))
+LANGUAGE_DETECTION_MIN_CONFIDENCE = float(os.getenv('LANGUAGE_DETECTION_MIN_CONFIDENCE', 0.6))
+
+# Weight of the newest measurement in the real-time factor average
+RTF_SMOOTHING = 0.3
+
+# 16 kHz mono s16le
+PCM_BYTES_PER_SECOND = 16000 * 2
+
+
+class STTEngine:
+    """
+    Base class for speech-to-text engines
+
+    Subclasses implement _transcribe_pcm (one window of 16 kHz mono PCM) and
+    transcribe_audio (a whole file). Windowing, concurrency, in-order
+    delivery and the latency/health bookkeeping used for routing live here.
+    Engines that infer several windows at once override _transcribe_batch
+    and set batch_size.
+    """
+
+    # Identifies the engine's output in cache keys, e.g. 'saarika:v2'
+    STT_MODEL = None
+
+    name = 'base'
+    # Relative cost of one minute of audio, used to pick among engines that meet the latency target
+    cost_per_minute = 0.0
+    # Initial real-time factor estimate until jobs have been measured
+    default_rtf = 1.0
+    # Concurrent batches per job
+    max_workers = STT_MAX_WORKERS
+    # Windows per inference call
+    batch_size = 1
+
+    def __init__(self):
+        self._engine_lock = threading.Lock()
+        self._rtf = self.default_rtf
+        self._consecutive_failures = 0
+        self._unavailable_until = 0.0
+        self.engine_stats = {
+            'jobs': 0,
+            'windows': 0,
+            'failed_windows': 0,
+            'audio_seconds': 0.0,
+            'processing_seconds': 0.0
+        }
+
+    # ---------- interface ----------
+
+    def transcribe_audio(self, audio_file_path, language_code='en-IN'):
+        """Transcribe a whole audio file; returns the standard result dict"""
+        raise NotImplementedError
+
+    def _transcribe_pcm(self, pcm, offset, language_code, sample_rate=16000, sample_width=2):
+        """Transcribe one window of mono PCM and offset its caption timestamps"""
+        raise NotImplementedError
+
+    def _transcribe_batch(self, windows, language_code):
+        """
+        Transcribe several (offset_seconds, pcm_bytes) windows
+
+        Returns:
+            One result dict per window, in order
+        """
+        return [self._transcribe_pcm(pcm, offset, language_code) for offset, pcm in windows]
+
+    def transcribe_window(self, pcm, offset, language_code):
+        """Transcribe one window of 16 kHz mono PCM right away (e.g. live audio); captions are offset"""
+        return self._transcribe_batch([(offset, pcm)], language_code)[0]
+
+    def detect_language(self, pcm, sample_rate=16000, sample_width=2):
+        """
+        Identify the spoken language of mono PCM
+
+        Returns:
+            Tuple of (language code, e.g. 'hi-IN', probability or None), or
+            None if the engine can't tell
+        """
+        return None
+
+    # ---------- language identification ----------
+
+    def identify_language(self, frames, candidates, default='en-IN'):
+        """
+        Choose the ASR language of a stream from its first LANGUAGE_DETECTION_SECONDS
+
+        Args:
+            frames: Iterable of (offset_seconds, pcm_bytes)
+            candidates: Language codes worth transcribing in directly, e.g. the caption languages
+            default: Language code used when detection is off, unsure or finds another language
+
+        Returns:
+            Tuple of (language code, iterator yielding every frame of the stream)
+        """
+        if not LANGUAGE_DETECTION or not candidates:
+            return default, frames
+
+        frames = iter(frames)
+        probe_bytes = int(LANGUAGE_DETECTION_SECONDS * PCM_BYTES_PER_SECOND)
+        probe = []
+        buffered = 0
+        for offset, pcm in frames:
+            probe.append((offset, pcm))
+            buffered += len(pcm)
+            if buffered >= probe_bytes:
+                break
+        frames = itertools.chain(probe, frames)
+
+        if not probe:
+            return default, frames
+
+        try:
+            detected = self.detect_language(b''.join(pcm for _, pcm in probe)[:probe_bytes])
+        except Exception as e:
+            logger.warning(f"Language detection failed with {self.name}: {str(e)}")
+            detected = None
+
+        if not detected:
+            LANGUAGE_DETECTIONS.inc(language='unknown', outcome='default')
+            return default, frames
+
+        language_code, probability = detected
+        confident = probability is None or probability >= LANGUAGE_DETECTION_MIN_CONFIDENCE
+        chosen = language_code if confident and language_code in candidates else default
+        LANGUAGE_DETECTIONS.inc(language=language_code, outcome='direct' if chosen != default else 'default')
+        logger.info(f"Detected spoken language {language_code} (p={probability}), transcribing in {chosen}")
+        return chosen, frames
+
+    # ---------- windowing ----------
+
+    def transcribe_audio_segmented(self, audio_file_path, language_code='en-IN',
+                                   segment_seconds=None, max_workers=None, overlap_seconds=None):
+        """
+        Transcribe a long WAV file in fixed-length, overlapping windows on a worker pool
+
+        Each caption is kept from one window only: the one whose side of the
+        middle of the overlap its midpoint falls on.
+
+        Args:
+            audio_file_path: Path to WAV file (16 kHz mono from AudioProcessor)
+            language_code: Language code (e.g., 'hi-IN' for Hindi)
+            segment_seconds: Window length in seconds (default: STT_SEGMENT_SECONDS)
+            max_workers: Concurrent batches (default: the engine's max_workers)
+            overlap_seconds: Audio shared by neighbouring windows (default: STT_SEGMENT_OVERLAP_SECONDS)
+
+        Returns:
+            Dictionary with the same shape as transcribe_audio, with caption
+            timestamps relative to the start of the whole file
+        """
+        segment_seconds = segment_seconds or SEGMENT_SECONDS
+        if overlap_seconds is None:
+            overlap_seconds = SEGMENT_OVERLAP_SECONDS
+        # Windows must still advance
+        overlap_seconds = min(overlap_seconds, segment_seconds / 2.0)
+
+        try:
+            if not os.path.exists(audio_file_path):
+                logger.error(f"Audio file not found: {audio_file_path}")
+                return {
+                    'status': 'error',
+                    'message': f'Audio file not found: {audio_file_path}'
+                }
+
+            if not audio_file_path.lower().endswith('.wav'):
+                # Only PCM WAV can be split without re-encoding
+                return self.transcribe_audio(audio_file_path, language_code)
+
+            with wave.open(audio_file_path, 'rb') as wav_file:
+                frame_rate = wav_file.getframerate()
+                total_frames = wav_file.getnframes()
+
+            frames_per_segment = int(segment_seconds * frame_rate)
+            if total_frames <= frames_per_segment:
+                return self.transcribe_audio(audio_file_path, language_code)
+
+            # Counted in frames, as iter_wav_windows steps through them
+            overlap_frames = int(overlap_seconds * frame_rate)
+            step = (frames_per_segment - overlap_frames) / float(frame_rate)
+            windows = max(1, -(-(total_frames - overlap_frames) // (frames_per_segment - overlap_frames)))
+            logger.info(f"Transcribing {windows} segments of {segment_seconds}s "
+                        f"({overlap_seconds}s overlap) with {self.name}: {audio_file_path}")
+
+            # Window k owns captions whose midpoint is past the middle of its overlap with window k-1
+            middle = overlap_frames / (2.0 * frame_rate)
+            cuts = [-math.inf] + [k * step + middle for k in range(1, windows)] + [math.inf]
+            index = 0
+
+            def drop_overlap(result):
+                # Runs in window order, before the results are merged
+                nonlocal index
+                low, high = cuts[index], cuts[index + 1]
+                index += 1
+                result['captions'] = [
+                    caption for caption in result['captions']
+                    if low <= (caption['start_time'] + caption['end_time']) / 2.0 < high
+                ]
+                result['text'] = ' '.join(' '.join(caption['text'].split()) for caption in result['captions'])
+
+            return self.transcribe_stream(
+                self.iter_wav_windows(audio_file_path, segment_seconds, overlap_seconds),
+                language_code,
+                max_workers=max_workers,
+                on_segment=drop_overlap
+            )
+
+        except Exception as e:
+            logger.error(f"Error in segmented transcription: {str(e)}", exc_info=True)
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
+
+    @staticmethod
+    def iter_wav_windows(audio_file_path, segment_seconds=None, overlap_seconds=0.0):
+        """Yield (offset_seconds, pcm_bytes) windows of a WAV file, each sharing overlap_seconds with the next"""
+        with wave.open(audio_file_path, 'rb') as wav_file:
+            frame_rate = wav_file.getframerate()
+            total_frames = wav_file.getnframes()
+            frames_per_segment = int((segment_seconds or SEGMENT_SECONDS) * frame_rate)
+            overlap_frames = int(overlap_seconds * frame_rate)
+            position = 0
+            while True:
+                wav_file.setpos(position)
+                pcm = wav_file.readframes(frames_per_segment)
+                if not pcm:
+                    break
+                yield position / float(frame_rate), pcm
+                position += frames_per_segment - overlap_frames
+                # The rest is already in this window's overlap
+                if position + overlap_frames >= total_frames:
+                    break
+
+    def transcribe_stream(self, frames, language_code='en-IN', max_workers=None, on_segment=None):
+        """
+        Transcribe PCM frames as they are produced (e.g. by AudioProcessor.stream_audio_from_file)
+
+        Frames are grouped into batches of batch_size and submitted to the
+        worker pool as soon as a batch is full, with at most max_workers
+        batches in flight so a fast decoder can't queue the whole file in memory.
+
+        Args:
+            frames: Iterable of (offset_seconds, pcm_bytes) with 16 kHz mono s16le samples
+            language_code: Language code (e.g., 'hi-IN' for Hindi)
+            max_workers: Concurrent batches (default: the engine's max_workers)
+            on_segment: Optional callback receiving each successful frame result,
+                in frame order, as soon as it and all earlier frames are done.
+                Called on the caller's thread.
+
+        Returns:
+            Dictionary with the same shape as transcribe_audio
+        """
+        max_workers = max_workers or self.max_workers
+        started = time.perf_counter()
+
+        try:
+            futures = []
+            reported = 0
+            audio_seconds = 0.0
+
+            def report_ready(block=False):
+                # Hand finished batches to on_segment in order, without gaps
+                nonlocal reported
+                while reported < len(futures) and (block or futures[reported].done()):
+                    results = futures[reported].result()
+                    reported += 1
+                    for result in results:
+                        if on_segment and result['status'] == 'success':
+                            on_segment(result)
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                def submit(batch):
+                    in_flight = [f for f in futures if not f.done()]
+                    if len(in_flight) >= max_workers:
+                        wait(in_flight, return_when=FIRST_COMPLETED)
+
+                    report_ready()
+                    futures.append(executor.submit(tracing.wrap(self._transcribe_batch), batch, language_code))
+
+                batch = []
+                for offset, pcm in frames:
+                    audio_seconds += len(pcm) / float(PCM_BYTES_PER_SECOND)
+                    batch.append((offset, pcm))
+                    if len(batch) >= self.batch_size:
+                        submit(batch)
+                        batch = []
+                if batch:
+                    submit(batch)
+
+                report_ready(block=True)
+                results = [result for f in futures for result in f.result()]
+
+            if not results:
+                return {
+                    'status': 'error',
+                    'message': 'No audio to transcribe'
+                }
+
+            self._record_job(results, audio_seconds, time.perf_counter() - started)
+            logger.info(f"Streamed {len(results)} frames to {self.name} transcription")
+            return self._merge_segment_results(results, language_code)
+
+        except Exception as e:
+            logger.error(f"Error in streaming transcription: {str(e)}", exc_info=True)
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
+
+    def _merge_segment_results(self, results, language_code):
+        """Stitch per-window results back into one transcribe_audio-shaped result"""
+        failed = [r for r in results if r['status'] != 'success']
+        if failed:
+            logger.error(f"{len(failed)}/{len(results)} segments failed")
+            return {
+                'status': 'error',
+                'message': failed[0]['message']
+            }
+
+        captions = []
+        for result in results:
+            captions.extend(result['captions'])
+
+        transcript = ' '.join(r['text'] for r in results if r['text'])
+        confidence = sum(r['confidence'] for r in results) / len(results)
+
+        logger.info(f"Segmented transcription successful. Captions: {len(captions)}, "
+                    f"Confidence: {confidence:.2f}")
+
+        return {
+            'status': 'success',
+            'text': transcript,
+            'confidence': confidence,
+            'captions': captions,
+            'language': language_code,
+            'engine': self.name,
+            'raw_response': [r.get('raw_response') for r in results]
+        }
+
+    # ---------- routing bookkeeping ----------
+
+    def _record_job(self, results, audio_seconds, processing_seconds):
+        failed = sum(1 for r in results if r['status'] != 'success')
+
+        with self._engine_lock:
+            self.engine_stats['jobs'] += 1
+            self.engine_stats['windows'] += len(results)
+            self.engine_stats['failed_windows'] += failed
+
+            if failed:
+                self._consecutive_failures += failed
+                if self._consecutive_failures >= STT_ENGINE_FAILURE_THRESHOLD:
+                    self._unavailable_until = time.monotonic() + STT_ENGINE_COOLDOWN
+                    logger.warning(f"STT engine {self.name} failing, skipping it for {STT_ENGINE_COOLDOWN}s")
+            else:
+                self._consecutive_failures = 0
+
+            if audio_seconds > 0 and not failed:
+                self.engine_stats['audio_seconds'] += audio_seconds
+                self.engine_stats['processing_seconds'] += processing_seconds
+                rtf = processing_seconds / audio_seconds
+                self._rtf = RTF_SMOOTHING * rtf + (1 - RTF_SMOOTHING) * self._rtf
+
+    def estimated_rtf(self):
+        """Smoothed processing seconds per second of audio"""
+        with self._engine_lock:
+            return self._rtf
+
+    def is_available(self):
+        """False while the engine is cooling down after repeated failures"""
+        with self._engine_lock:
+            return time.monotonic() >= self._unavailable_until
+
+    def get_engine_stats(self):
+        """Get routing counters for this engine"""
+        with self._engine_lock:
+            return dict(
+                self.engine_stats,
+                model=self.STT_MODEL,
+                estimated_rtf=round(self._rtf, 4),
+                cost_per_minute=self.cost_per_minute,
+                available=time.monotonic() >= self._unavailable_until
+            )
+
+
+class STTRouter:
+    """Routes jobs to the cheapest available engine that meets a latency target"""
+
+    def __init__(self, engines, latency_target=STT_LATENCY_TARGET):
+        self.engines = [engine for engine in engines if engine is not None]
+        self.latency_target = latency_target
+
+    def select(self, latency_target=None):
+        """
+        Pick an engine for a job
+
+        Args:
+            latency_target: Allowed processing seconds per second of audio
+                (default: STT_LATENCY_TARGET)
+
+        Returns:
+            STTEngine, or None if no engine is configured or all are cooling down
+        """
+        available = [engine for engine in self.engines if engine.is_available()]
+        if not available:
+            return None
+
+        latency_target = latency_target or self.latency_target
+
+        fast_enough = [engine for engine in available if engine.estimated_rtf() <= latency_target]
+        if fast_enough:
+            return min(fast_enough, key=lambda engine: engine.cost_per_minute)
+
+        return min(available, key=lambda engine: engine.estimated_rtf())
+
+    def get_engine(self, name):
+        """Look up a configured engine by name"""
+        return next((engine for engine in self.engines if engine.name == name), None)
+
+    def get_stats(self):
+        """Per-engine routing stats"""
+        return {
+            'latency_target': self.latency_target,
+            'engines': {engine.name: engine.get_engine_stats() for engine in self.engines}
+        }
@@ -1,13 +1,33 @@
 import os
+import io
 import logging
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from translation_cache import TranslationCache
+from sarvam_client import SarvamClient, SARVAM_API_BASE_URL, SARVAM_POOL_SIZE
+from stt_engine import STTEngine, STT_MAX_WORKERS
+from audio_processor import AudioProcessor, TRANSPORT_ENCODINGS
+from caption_segmenter import CaptionSegmenter, caption_segmenter
+import tracing
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-class SarvamSTTService:
+# How audio is encoded for upload: wav, flac (lossless) or opus (speech bitrate)
+STT_TRANSPORT_ENCODING = os.getenv('STT_TRANSPORT_ENCODING', 'flac')
+
+# Relative cost of a minute of audio, for routing against local engines
+SARVAM_COST_PER_MINUTE = float(os.getenv('SARVAM_COST_PER_MINUTE', 1.0))
+
+# Seconds one speech-to-text attempt may take (the client's deadline bounds the retries)
+SARVAM_STT_TIMEOUT = float(os.getenv('SARVAM_STT_TIMEOUT', 60))
+
+# Batch translation configuration (Sarvam translate input limit)
+TRANSLATE_MAX_CHARS = int(os.getenv('TRANSLATE_MAX_CHARS', 1000))
+
+class SarvamSTTService(STTEngine):
     """Handles speech-to-text conversion using Sarvam AI"""
     
     # Language code mappings for Indian languages
@@ -26,11 +46,24 @@ class SarvamSTTService:
     }
     
     # Sarvam API endpoints
-    SPEECH_TO_TEXT_URL = "https://api.sarvam.ai/speech-to-text"
-    TRANSLATE_URL = "https://api.sarvam.ai/translate"
+    SPEECH_TO_TEXT_URL = f"{SARVAM_API_BASE_URL}/speech-to-text"
+    TRANSLATE_URL = f"{SARVAM_API_BASE_URL}/translate"
+    
+    # Model settings (also part of the translation and result cache keys)
+    STT_MODEL = 'saarika:v2'
+    TRANSLATE_MODEL = 'mayura:v1'
+    TRANSLATE_MODE = 'formal'
+    TRANSLATION_VERSION = f"{TRANSLATE_MODEL}/{TRANSLATE_MODE}"
+    MODEL_VERSION = f"{STT_MODEL}+{TRANSLATION_VERSION}"
+    
+    # STT engine routing
+    name = 'sarvam'
+    cost_per_minute = SARVAM_COST_PER_MINUTE
+    default_rtf = 0.05
     
     def __init__(self):
         """Initialize Sarvam AI service"""
+        super().__init__()
         self.api_key = os.getenv('SARVAM_API_KEY')
         
         if not self.api_key:
@@ -42,9 +75,30 @@ class SarvamSTTService:
             'Accept': 'application/json'
         }
         
+        # Shared keep-alive pool, sized so every worker can hold a connection
+        self.client = SarvamClient(self.headers, pool_size=max(SARVAM_POOL_SIZE, STT_MAX_WORKERS))
+        
+        self.transport_encoding = STT_TRANSPORT_ENCODING
+        if self.transport_encoding != 'wav' and self.transport_encoding not in TRANSPORT_ENCODINGS:
+            logger.warning(f"Unknown STT_TRANSPORT_ENCODING '{self.transport_encoding}', sending WAV")
+            self.transport_encoding = 'wav'
+        self.transport_stats = {
+            'uploads': 0,
+            'audio_bytes': 0,
+            'sent_bytes': 0,
+            'fallbacks': 0
+        }
+        
+        try:
+            self.translation_cache = TranslationCache()
+        except Exception as e:
+            logger.error(f"Translation cache disabled: {str(e)}")
+            self.translation_cache = None
+        
         logger.info("Sarvam AI STT Service initialized")
 
     
+    @tracing.traced('stt.file')
     def transcribe_audio(self, audio_file_path, language_code='en-IN'):
         """Transcribe audio file to text
             
@@ -86,28 +140,28 @@ class SarvamSTTService:
             mime_type = mime_types.get(file_ext, 'audio/wav')
             logger.info(f"MIME type: {mime_type}")
             
-            # Prepare file for upload
-            with open(audio_file_path, 'rb') as audio_file:
-                files = {
-                    'file': (os.path.basename(audio_file_path), audio_file, mime_type)
-                }
-                
-                data = {
-                    'language_code': language_code,
-                    'model': 'saarika:v2'
-                }
-                
-                logger.info(f"Sending request to Sarvam API")
-                logger.info(f"Language: {language_code}")
-                
-                # Make request to Sarvam API
-                response = requests.post(
-                    self.SPEECH_TO_TEXT_URL,
-                    headers=self.headers,
-                    files=files,
-                    data=data,
-                    timeout=300
-                )
+            # Compress WAV for the upload when a transport encoding is set
+            encoded = None
+            if file_ext == 'wav' and self.transport_encoding != 'wav':
+                encoded = self._encode_upload(input_path=audio_file_path, audio_bytes=file_size)
+            
+            logger.info(f"Sending request to Sarvam API")
+            logger.info(f"Language: {language_code}")
+            
+            if encoded and encoded[1] != 'audio/wav':
+                payload, mime_type, extension = encoded
+                filename = f"{os.path.splitext(os.path.basename(audio_file_path))[0]}.{extension}"
+                response = self._post_speech_to_text(filename, io.BytesIO(payload), mime_type, language_code)
+            else:
+                # Prepare file for upload
+                with open(audio_file_path, 'rb') as audio_file:
+                    # Make request to Sarvam API
+                    response = self._post_speech_to_text(
+                        os.path.basename(audio_file_path),
+                        audio_file,
+                        mime_type,
+                        language_code
+                    )
             
             logger.info(f"Sarvam API response status: {response.status_code}")
             
@@ -152,55 +206,144 @@ class SarvamSTTService:
                 'message': str(e)
             }
 
-    def translate_text(self, text, target_language='en-IN', source_language='en-IN'):
+    def transcribe_window(self, pcm, offset, language_code):
+        """Transcribe one live window on the live rate limit"""
+        return self._transcribe_pcm(pcm, offset, language_code, live=True)
+
+    @tracing.traced('stt.window')
+    def _transcribe_pcm(self, pcm, offset, language_code, sample_rate=16000, sample_width=2, live=False):
+        """Transcribe one window of mono PCM and offset its caption timestamps"""
+        duration = len(pcm) / float(sample_rate * sample_width)
+
+        try:
+            # Wrap the window as a standalone file in memory. Live windows are short and
+            # latency-bound, so they go as WAV rather than through an encoder subprocess
+            payload, mime_type, extension = self._encode_upload(
+                pcm=pcm, sample_rate=sample_rate, sample_width=sample_width,
+                encoding='wav' if live else None
+            )
+
+            segment_name = f"segment_{int(offset):06d}.{extension}"
+            response = self._post_speech_to_text(segment_name, io.BytesIO(payload), mime_type, language_code,
+                                                 live=live)
+
+            if response.status_code != 200:
+                logger.error(f"Sarvam API error on segment at {offset:.1f}s: {response.text}")
+                return {
+                    'status': 'error',
+                    'message': f"API error: {response.status_code}"
+                }
+
+            result = response.json()
+            captions = self._parse_timestamps(result, language_code)
+
+            for caption in captions:
+                if not caption['start_time'] and not caption['end_time']:
+                    # No word timestamps, so the caption spans the whole window
+                    caption['end_time'] = duration
+                caption['start_time'] += offset
+                caption['end_time'] += offset
+
+            return {
+                'status': 'success',
+                'text': result.get('transcript', ''),
+                'confidence': result.get('confidence', 0.0),
+                'captions': captions,
+                'raw_response': result
+            }
+
+        except requests.exceptions.Timeout:
+            logger.error(f"Sarvam API request timed out on segment at {offset:.1f}s")
+            return {
+                'status': 'error',
+                'message': 'Transcription timed out'
+            }
+        except Exception as e:
+            logger.error(f"Error transcribing segment at {offset:.1f}s: {str(e)}")
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
+
+    @tracing.traced('stt.language_id')
+    def detect_language(self, pcm, sample_rate=16000, sample_width=2):
+        """Identify the spoken language with a speech-to-text request in auto-detect mode"""
+        payload, mime_type, extension = self._encode_upload(
+            pcm=pcm, sample_rate=sample_rate, sample_width=sample_width
+        )
+        response = self._post_speech_to_text(f"language_probe.{extension}", io.BytesIO(payload),
+                                             mime_type, 'unknown')
+
+        if response.status_code != 200:
+            logger.warning(f"Sarvam language detection failed: {response.status_code}")
+            return None
+
+        result = response.json()
+        if not result.get('language_code'):
+            return None
+        return result['language_code'], result.get('language_probability')
+
+    def _encode_upload(self, pcm=None, input_path=None, sample_rate=16000, sample_width=2, audio_bytes=None,
+                       encoding=None):
         """
-        Translate text using Sarvam Translate API
-        
-        Args:
-            text: Text to translate
-            target_language: Target language code
-            source_language: Source language code (default: English)
-            
+        Encode audio with the transport encoding (or encoding), falling back to WAV
+
         Returns:
-            Translated text
+            Tuple of (bytes, MIME type, extension); (None, 'audio/wav', 'wav')
+            when a file couldn't be encoded and should be sent as is
         """
+        audio_bytes = audio_bytes if audio_bytes is not None else len(pcm)
+        encoding = encoding or self.transport_encoding
+
         try:
-            if not text or text.strip() == '':
-                return text
-            
-            logger.info(f"Translating text from {source_language} to {target_language}")
-            logger.info(f"Original text: {text[:100]}...")
-            
-            payload = {
-                'input': text,
-                'source_language_code': source_language,
-                'target_language_code': target_language,
-                'model': 'mayura:v1',
-                'mode': 'formal'
-            }
-            
-            response = requests.post(
-                self.TRANSLATE_URL,
-                headers=self.headers,
-                json=payload,
-                timeout=30
+            encoded = AudioProcessor.encode_for_transport(
+                encoding, pcm=pcm, input_path=input_path,
+                sample_rate=sample_rate, sample_width=sample_width
             )
-            
-            logger.info(f"Translation API response status: {response.status_code}")
-            
-            if response.status_code != 200:
-                logger.error(f"Sarvam Translation API error: {response.text}")
-                return text  # Return original if translation fails
-            
-            result = response.json()
-            translated_text = result.get('translated_text', text)
-            
-            logger.info(f"Translated text: {translated_text[:100]}...")
-            return translated_text
-            
         except Exception as e:
-            logger.error(f"Error translating text: {str(e)}", exc_info=True)
-            return text  # Return original if translation fails
+            logger.warning(f"{encoding} transport encoding failed, sending WAV: {str(e)}")
+            with self._engine_lock:
+                self.transport_stats['fallbacks'] += 1
+            if pcm is None:
+                return None, 'audio/wav', 'wav'
+            encoded = AudioProcessor.encode_for_transport('wav', pcm=pcm, sample_rate=sample_rate,
+                                                          sample_width=sample_width)
+
+        with self._engine_lock:
+            self.transport_stats['uploads'] += 1
+            self.transport_stats['audio_bytes'] += audio_bytes
+            self.transport_stats['sent_bytes'] += len(encoded[0])
+
+        return encoded
+
+    def get_engine_stats(self):
+        """Routing counters plus upload sizes for the transport encoding"""
+        stats = super().get_engine_stats()
+        with self._engine_lock:
+            transport = dict(self.transport_stats, encoding=self.transport_encoding)
+        audio_bytes = transport['audio_bytes']
+        transport['compression_ratio'] = round(transport['sent_bytes'] / audio_bytes, 4) if audio_bytes else None
+        return dict(stats, transport=transport)
+
+    @tracing.traced('sarvam.speech_to_text')
+    def _post_speech_to_text(self, filename, file_obj, mime_type, language_code, live=False):
+        """Send one audio file to the Sarvam speech-to-text endpoint"""
+        files = {
+            'file': (filename, file_obj, mime_type)
+        }
+
+        data = {
+            'language_code': language_code,
+            'model': self.STT_MODEL
+        }
+
+        return self.client.post(
+            self.SPEECH_TO_TEXT_URL,
+            files=files,
+            data=data,
+            timeout=SARVAM_STT_TIMEOUT,
+            live=live
+        )
 
     def transcribe_audio_with_translation(self, audio_file_path, language_code='en-IN'):
         """
@@ -234,11 +377,14 @@ class SarvamSTTService:
                 translated_captions = []
                 english_captions = result.get('captions', [])
                 
-                # For now, apply translation to each caption
-                for caption in english_captions:
-                    translated_caption_text = self.translate_text(caption['text'], language_code, 'en-IN')
+                # Captions are translated as one line each and wrapped again afterwards
+                translated_texts = self.translate_batch(
+                    [' '.join(caption['text'].split()) for caption in english_captions], language_code, 'en-IN'
+                )
+                
+                for caption, translated_caption_text in zip(english_captions, translated_texts):
                     translated_captions.append({
-                        'text': translated_caption_text,
+                        'text': caption_segmenter.wrap_text(translated_caption_text),
                         'start_time': caption['start_time'],
                         'end_time': caption['end_time'],
                         'confidence': caption.get('confidence', 0)
@@ -258,7 +404,8 @@ class SarvamSTTService:
             }
 
     
-    def translate_text(self, text, target_language='en-IN', source_language='en-IN'):
+    @tracing.traced('translate.text')
+    def translate_text(self, text, target_language='en-IN', source_language='en-IN', check_cache=True):
         """
         Translate text using Sarvam Translate API
         
@@ -266,28 +413,24 @@ class SarvamSTTService:
             text: Text to translate
             target_language: Target language code
             source_language: Source language code (default: English)
+            check_cache: Look up the translation cache before calling the API
             
         Returns:
             Translated text
         """
         try:
+            if not text or text.strip() == '':
+                return text
+
             logger.info(f"Translating text from {source_language} to {target_language}")
             logger.info(f"Text to translate (first 60 chars): {text[:60]}")
             
-            payload = {
-                'input': text,
-                'source_language_code': source_language,
-                'target_language_code': target_language,
-                'model': 'mayura:v1',
-                'mode': 'formal'
-            }
+            if check_cache:
+                cached = self._get_cached_translation(text, target_language, source_language)
+                if cached is not None:
+                    return cached
             
-            response = requests.post(
-                self.TRANSLATE_URL,
-                headers=self.headers,
-                json=payload,
-                timeout=30
-            )
+            response = self._post_translate(text, target_language, source_language)
             
             if response.status_code != 200:
                 logger.error(f"Sarvam Translation API error: {response.text}")
@@ -295,6 +438,7 @@ class SarvamSTTService:
             
             result = response.json()
             translated_text = result.get('translated_text', text)
+            self._cache_translation(text, translated_text, target_language, source_language)
             
             logger.info("Translation successful")
             logger.info(f"Translated text (first 60 chars): {translated_text[:60]}")
@@ -304,46 +448,187 @@ class SarvamSTTService:
             logger.error(f"Error translating text: {str(e)}")
             return text  # Return original if translation fails
 
+    @tracing.traced('translate.batch')
+    def translate_batch(self, texts, target_language='en-IN', source_language='en-IN', max_workers=None):
+        """
+        Translate many short texts (e.g. captions) with as few API calls as possible
+
+        Texts are packed newline-separated into requests of at most
+        TRANSLATE_MAX_CHARS characters, sent concurrently and split back on
+        newlines. A batch whose output does not split into the expected number
+        of lines, or whose request fails, is retried one text at a time.
+
+        Args:
+            texts: List of texts to translate
+            target_language: Target language code
+            source_language: Source language code (default: English)
+            max_workers: Concurrent API requests (default: STT_MAX_WORKERS)
+
+        Returns:
+            List of translated texts in the same order as texts
+        """
+        max_workers = max_workers or STT_MAX_WORKERS
+
+        # Newlines are the batch separator, so they can't appear inside a text
+        texts = [' '.join((text or '').split()) for text in texts]
+        translated = list(texts)
+
+        # Only send texts the cache can't answer
+        pending = list(texts)
+        for index, text in enumerate(texts):
+            if text:
+                cached = self._get_cached_translation(text, target_language, source_language)
+                if cached is not None:
+                    translated[index] = cached
+                    pending[index] = ''
+
+        batches = self._pack_translation_batches(pending)
+
+        logger.info(f"Translating {len(texts)} texts in {len(batches)} batches "
+                    f"from {source_language} to {target_language}")
+
+        def translate(batch):
+            return self._translate_packed(
+                [texts[i] for i in batch], target_language, source_language
+            )
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for batch, outputs in zip(batches, executor.map(tracing.wrap(translate), batches)):
+                for index, output in zip(batch, outputs):
+                    translated[index] = output
+
+        return translated
+
+    @staticmethod
+    def _pack_translation_batches(texts):
+        """Group indices of non-empty texts into batches under TRANSLATE_MAX_CHARS"""
+        batches = []
+        current = []
+        current_chars = 0
+
+        for index, text in enumerate(texts):
+            if not text:
+                continue
+
+            # +1 for the newline separator
+            if current and current_chars + len(text) + 1 > TRANSLATE_MAX_CHARS:
+                batches.append(current)
+                current = []
+                current_chars = 0
+
+            current.append(index)
+            current_chars += len(text) + 1
+
+        if current:
+            batches.append(current)
+
+        return batches
+
+    def _translate_packed(self, texts, target_language, source_language):
+        """Translate one packed batch, falling back to per-text calls on failure"""
+        if len(texts) > 1:
+            try:
+                response = self._post_translate('\n'.join(texts), target_language, source_language)
+
+                if response.status_code == 200:
+                    translated_text = response.json().get('translated_text', '')
+                    lines = [line.strip() for line in translated_text.split('\n')]
+
+                    if len(lines) == len(texts):
+                        self._cache_translations(texts, lines, target_language, source_language)
+                        # A blank line means that text was dropped; translate it on its own
+                        return [
+                            line or self.translate_text(text, target_language, source_language, check_cache=False)
+                            for text, line in zip(texts, lines)
+                        ]
+
+                    logger.warning(f"Batch translation returned {len(lines)} lines for "
+                                   f"{len(texts)} texts, falling back to per-text calls")
+                else:
+                    logger.error(f"Sarvam batch translation error: {response.text}")
+
+            except Exception as e:
+                logger.error(f"Error translating batch: {str(e)}")
+
+        # The caller already missed the cache for these texts
+        return [
+            self.translate_text(text, target_language, source_language, check_cache=False)
+            for text in texts
+        ]
+
+    def _get_cached_translation(self, text, target_language, source_language):
+        """Return a cached translation or None"""
+        if not self.translation_cache:
+            return None
+
+        key = TranslationCache.make_key(
+            text, source_language, target_language, self.TRANSLATE_MODEL, self.TRANSLATE_MODE
+        )
+        return self.translation_cache.get(key)
+
+    def _cache_translation(self, text, translated_text, target_language, source_language):
+        """Store a successful translation in the cache"""
+        # A blank line from a packed batch is a failed translation, not a result
+        if not self.translation_cache or not (translated_text or '').strip():
+            return
+
+        key = TranslationCache.make_key(
+            text, source_language, target_language, self.TRANSLATE_MODEL, self.TRANSLATE_MODE
+        )
+        self.translation_cache.put(key, translated_text)
+
+    def _cache_translations(self, texts, translated_texts, target_language, source_language):
+        """Store the successful translations of a batch in the cache, in one write"""
+        if not self.translation_cache:
+            return
+
+        self.translation_cache.put_many(
+            (TranslationCache.make_key(text, source_language, target_language,
+                                       self.TRANSLATE_MODEL, self.TRANSLATE_MODE), translated_text)
+            for text, translated_text in zip(texts, translated_texts)
+            # A blank line from a packed batch is a failed translation, not a result
+            if (translated_text or '').strip()
+        )
+
+    @tracing.traced('sarvam.translate')
+    def _post_translate(self, text, target_language, source_language):
+        """Send one translate request to the Sarvam API"""
+        payload = {
+            'input': text,
+            'source_language_code': source_language,
+            'target_language_code': target_language,
+            'model': self.TRANSLATE_MODEL,
+            'mode': self.TRANSLATE_MODE
+        }
+
+        return self.client.post(
+            self.TRANSLATE_URL,
+            json=payload,
+            timeout=30
+        )
+
     
     @staticmethod
     def _parse_timestamps(api_response, language_code):
-        captions = []
-        try:
-            if 'timestamps' in api_response:
-                timestamps = api_response['timestamps']
-                words_per_caption = 8
-                current_caption = []
-                for ts_item in timestamps:
-                    current_caption.append(ts_item)
-                    if len(current_caption) >= words_per_caption:
-                        caption = {
-                            'text': ' '.join([item.get('word', '') for item in current_caption]),
-                            'start_time': current_caption[0].get('start_time', 0) / 1000.0,  # convert ms to s
-                            'end_time': current_caption[-1].get('end_time', 0) / 1000.0,     # convert ms to s
-                            'confidence': sum([item.get('confidence', 0) for item in current_caption]) / len(current_caption)
-                        }
-                        captions.append(caption)
-                        current_caption = []
-                if current_caption:
-                    caption = {
-                        'text': ' '.join([item.get('word', '') for item in current_caption]),
-                        'start_time': current_caption[0].get('start_time', 0) / 1000.0,
-                        'end_time': current_caption[-1].get('end_time', 0) / 1000.0,
-                        'confidence': sum([item.get('confidence', 0) for item in current_caption]) / len(current_caption)
-                    }
-                    captions.append(caption)
-            else:
-                transcript = api_response.get('transcript', '')
-                if transcript:
-                    captions.append({
-                        'text': transcript,
-                        'start_time': 0,
-                        'end_time': 0,
-                        'confidence': api_response.get('confidence', 0)
-                    })
-        except Exception as e:
-            logger.error(f"Error parsing timestamps: {str(e)}")
-        return captions
+        """Captions from the word timestamps, or one untimed caption of the transcript without usable ones"""
+        if api_response.get('timestamps'):
+            try:
+                words, starts, ends, confidences = CaptionSegmenter.columns_from_sarvam(api_response['timestamps'])
+                captions = caption_segmenter.segment(words, starts, ends, confidences)
+                if captions:
+                    return captions
+            except (ValueError, TypeError, AttributeError) as e:
+                logger.warning(f"Unusable word timestamps, captioning the transcript instead: {str(e)}")
+
+        transcript = (api_response.get('transcript') or '').strip()
+        if not transcript:
+            return []
+        return [{
+            'text': caption_segmenter.wrap_text(transcript),
+            'start_time': 0,
+            'end_time': 0,
+            'confidence': api_response.get('confidence', 0)
+        }]
 
     
     def get_supported_languages(self):
@@ -0,0 +1,356 @@
+import os
+import time
+import logging
+import threading
+from upload_handler import UploadHandler, UPLOAD_DIR, TEMP_CHUNK_DIR
+from audio_processor import AudioProcessor, TEMP_DIR
+from metrics import TEMP_STORAGE_REMOVED, TEMP_STORAGE_REMOVED_BYTES, TEMP_STORAGE_REJECTED
+
+logger = logging.getLogger(__name__)
+
+# Temporary storage configuration
+TEMP_STORAGE_QUOTA_BYTES = int(os.getenv('TEMP_STORAGE_QUOTA_BYTES', 20 * 1024 * 1024 * 1024))  # 20GB
+UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', 24 * 3600))  # seconds without a new chunk
+ORPHAN_FILE_TTL = int(os.getenv('ORPHAN_FILE_TTL', 6 * 3600))  # seconds, for files no job owns
+EVICTION_GRACE = int(os.getenv('TEMP_STORAGE_EVICTION_GRACE', 300))  # seconds since last write
+JANITOR_INTERVAL = int(os.getenv('JANITOR_INTERVAL', 60))  # seconds
+
+# Directories of standalone temp files; upload sessions are directories under TEMP_CHUNK_DIR
+FILE_DIRS = {'uploads': UPLOAD_DIR, 'temp_audio': TEMP_DIR}
+
+
+class StorageQuotaExceeded(Exception):
+    """Raised when new temporary data would not fit in TEMP_STORAGE_QUOTA_BYTES"""
+
+
+class TempStorageJanitor:
+    """Keeps uploads, upload sessions and extracted audio within a disk quota
+
+    Jobs register the files they create with track(). A tracked file belongs
+    to its job while the job is queued or running; once the job finishes,
+    anything it left behind (e.g. after an exception) is deleted on the next
+    sweep. Untracked files, such as those left by a crash or a failed
+    download, are deleted after ORPHAN_FILE_TTL, and upload sessions that
+    receive no chunk for UPLOAD_SESSION_TTL are reaped. When usage exceeds
+    the quota, artifacts no running job owns are evicted oldest first.
+    """
+
+    def __init__(self, is_active, current_owner=None, quota_bytes=TEMP_STORAGE_QUOTA_BYTES,
+                 session_ttl=UPLOAD_SESSION_TTL, orphan_ttl=ORPHAN_FILE_TTL,
+                 eviction_grace=EVICTION_GRACE, interval=JANITOR_INTERVAL):
+        """
+        Args:
+            is_active: Callable(job_id) -> True while the job is queued or running
+            current_owner: Callable returning the job ID of the calling thread, used by track()
+            quota_bytes: Disk quota across uploads, upload sessions and extracted audio
+            session_ttl: Seconds an upload session may go without a new chunk
+            orphan_ttl: Seconds an untracked file may sit unmodified
+            eviction_grace: Artifacts written to more recently than this are never evicted
+            interval: Seconds between sweeps
+        """
+        self.is_active = is_active
+        self.current_owner = current_owner
+        self.quota_bytes = quota_bytes
+        self.session_ttl = session_ttl
+        self.orphan_ttl = orphan_ttl
+        self.eviction_grace = eviction_grace
+        self.interval = interval
+
+        # path -> {'owner': job ID, 'tracked_at': time}
+        self._owners = {}
+        self._lock = threading.Lock()
+        # Bytes in use as of the last scan, and bytes admitted by check_quota since
+        self._usage = None
+        self._admitted = 0
+        # One scan-and-delete pass at a time
+        self._sweep_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.stats = {
+            'sweeps': 0,
+            'removed': 0,
+            'removed_bytes': 0,
+            'rejected': 0
+        }
+
+    def start(self):
+        """Sweep now and then every interval seconds on a background thread"""
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name='temp-storage-janitor')
+        self._thread.start()
+        logger.info(f"Temp storage janitor started (quota {self.quota_bytes} bytes, "
+                    f"sweep every {self.interval}s)")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Temp storage sweep failed: {str(e)}", exc_info=True)
+            if self._stop.wait(self.interval):
+                return
+
+    # ---------- ownership ----------
+
+    def track(self, path, owner=None):
+        """
+        Register a temp file or upload session directory as owned by a job
+
+        Args:
+            path: File under FILE_DIRS, or a session directory under TEMP_CHUNK_DIR
+            owner: Job ID (default: the job running on this thread)
+        """
+        if owner is None and self.current_owner:
+            owner = self.current_owner()
+        if not path or not owner:
+            return
+
+        with self._lock:
+            self._owners[os.path.normpath(path)] = {'owner': owner, 'tracked_at': time.time()}
+
+    def _owner(self, artifact):
+        with self._lock:
+            entry = self._owners.get(artifact['path'])
+        return entry['owner'] if entry else None
+
+    def _forget_missing(self, artifacts):
+        present = {artifact['path'] for artifact in artifacts}
+        with self._lock:
+            for path in [p for p in self._owners if p not in present]:
+                del self._owners[path]
+
+    # ---------- scanning ----------
+
+    def _scan(self):
+        """
+        List every temporary artifact on disk
+
+        Returns:
+            List of dicts with path, dir, session_id (None for plain files),
+            size, reserved (bytes counted against the quota) and modified_at
+        """
+        artifacts = []
+
+        for name, directory in FILE_DIRS.items():
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                artifacts.append({
+                    'path': os.path.normpath(entry.path),
+                    'dir': name,
+                    'session_id': None,
+                    'size': stat.st_size,
+                    'reserved': stat.st_size,
+                    'modified_at': stat.st_mtime
+                })
+
+        try:
+            sessions = list(os.scandir(TEMP_CHUNK_DIR))
+        except OSError:
+            sessions = []
+        for entry in sessions:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            size, modified_at = self._session_usage(entry.path)
+            # A registered session counts its declared size before the chunks arrive
+            metadata = UploadHandler.get_session(entry.name) or {}
+            artifacts.append({
+                'path': os.path.normpath(entry.path),
+                'dir': 'temp_chunks',
+                'session_id': entry.name,
+                'size': size,
+                'reserved': max(size, metadata.get('file_size') or 0),
+                'modified_at': modified_at
+            })
+
+        return artifacts
+
+    @staticmethod
+    def _session_usage(session_dir):
+        """Bytes in a session directory and the time of its latest write"""
+        size = 0
+        modified_at = 0
+        try:
+            modified_at = os.stat(session_dir).st_mtime
+            for entry in os.scandir(session_dir):
+                stat = entry.stat(follow_symlinks=False)
+                size += stat.st_size
+                modified_at = max(modified_at, stat.st_mtime)
+        except OSError:
+            pass
+        return size, modified_at
+
+    # ---------- cleanup ----------
+
+    def sweep(self):
+        """Delete leaked, orphaned and stale artifacts, then evict down to the quota"""
+        with self._sweep_lock:
+            now = time.time()
+            admitted = self._admitted
+            artifacts = self._scan()
+            self._forget_missing(artifacts)
+
+            remaining = []
+            for artifact in artifacts:
+                reason = self._expired(artifact, now)
+                if not reason or not self._remove(artifact, reason):
+                    remaining.append(artifact)
+
+            self._record_usage(self._evict(remaining, 0, now), admitted)
+
+        with self._lock:
+            self.stats['sweeps'] += 1
+
+    def _record_usage(self, usage, admitted):
+        """Cache a scan's total; admissions made before the scan are now on disk"""
+        with self._lock:
+            self._usage = usage
+            self._admitted -= admitted
+
+    def _expired(self, artifact, now):
+        """Why an artifact should be deleted now, or None to keep it"""
+        owner = self._owner(artifact)
+        if owner and self.is_active(owner):
+            return None
+
+        idle = now - artifact['modified_at']
+        if artifact['session_id']:
+            # The client may still resume a session after its processing job ended
+            return 'stale_session' if idle > self.session_ttl else None
+        if owner:
+            # Its job finished without cleaning up, e.g. after an exception
+            return 'leaked'
+        return 'orphaned' if idle > self.orphan_ttl else None
+
+    def _evict(self, artifacts, needed, now):
+        """
+        Delete the oldest unowned artifacts until needed more bytes fit in the quota
+
+        Returns:
+            Bytes in use afterwards
+        """
+        usage = sum(artifact['reserved'] for artifact in artifacts)
+        if usage + needed <= self.quota_bytes:
+            return usage
+
+        candidates = sorted(
+            (artifact for artifact in artifacts if self._evictable(artifact, now)),
+            key=lambda artifact: artifact['modified_at']
+        )
+        for artifact in candidates:
+            if usage + needed <= self.quota_bytes:
+                break
+            if self._remove(artifact, 'quota'):
+                usage -= artifact['reserved']
+
+        return usage
+
+    def _evictable(self, artifact, now):
+        # Files still being written (uploads, downloads) are young by mtime
+        if now - artifact['modified_at'] < self.eviction_grace:
+            return False
+        owner = self._owner(artifact)
+        return not (owner and self.is_active(owner))
+
+    def _remove(self, artifact, reason):
+        """Delete one artifact; True if it is gone"""
+        path = artifact['path']
+        if artifact['session_id']:
+            UploadHandler.cleanup_session(artifact['session_id'])
+        else:
+            AudioProcessor.cleanup_temp_file(path)
+
+        if os.path.exists(path):
+            return False
+
+        with self._lock:
+            self._owners.pop(path, None)
+            self.stats['removed'] += 1
+            self.stats['removed_bytes'] += artifact['size']
+        TEMP_STORAGE_REMOVED.inc(reason=reason)
+        TEMP_STORAGE_REMOVED_BYTES.inc(artifact['size'], reason=reason)
+
+        logger.info(f"Temp storage janitor removed {path} ({reason}, {artifact['size']} bytes)")
+        return True
+
+    # ---------- admission ----------
+
+    def check_quota(self, nbytes=0, kind='upload'):
+        """
+        Make room for nbytes of new temporary data, evicting if needed
+
+        Admission is checked against the totals of the last sweep plus what
+        was admitted since; the disk is only rescanned when those say the
+        data won't fit.
+
+        Args:
+            nbytes: Bytes about to be written (0 if unknown)
+            kind: Label for the rejection metric, e.g. 'upload' or 'youtube'
+
+        Raises:
+            StorageQuotaExceeded: if the data still would not fit
+        """
+        if nbytes > self.quota_bytes:
+            self._reject(kind)
+            raise StorageQuotaExceeded(
+                f'File is larger than the {self.quota_bytes} byte temporary storage quota')
+
+        with self._lock:
+            if self._usage is not None and self._fits(self._usage + self._admitted, nbytes):
+                self._admitted += nbytes
+                return
+
+        with self._sweep_lock:
+            admitted = self._admitted
+            usage = self._evict(self._scan(), nbytes, time.time())
+            self._record_usage(usage, admitted)
+
+        if not self._fits(usage, nbytes):
+            self._reject(kind)
+            raise StorageQuotaExceeded(
+                f'Temporary storage is full ({usage} of {self.quota_bytes} bytes in use), try again later')
+
+        with self._lock:
+            self._admitted += nbytes
+
+    def _fits(self, usage, nbytes):
+        # Unknown sizes still need some free space to start
+        return usage + nbytes <= self.quota_bytes and usage < self.quota_bytes
+
+    def _reject(self, kind):
+        with self._lock:
+            self.stats['rejected'] += 1
+        TEMP_STORAGE_REJECTED.inc(kind=kind)
+
+    def get_stats(self):
+        """Usage per directory, quota, tracked artifacts and lifetime counters"""
+        now = time.time()
+        artifacts = self._scan()
+
+        usage = {name: 0 for name in list(FILE_DIRS) + ['temp_chunks']}
+        for artifact in artifacts:
+            usage[artifact['dir']] += artifact['reserved']
+
+        with self._lock:
+            return dict(
+                self.stats,
+                quota_bytes=self.quota_bytes,
+                used_bytes=sum(usage.values()),
+                usage=usage,
+                artifacts=len(artifacts),
+                tracked=len(self._owners),
+                oldest_age=round(max((now - a['modified_at'] for a in artifacts), default=0), 1)
+            )
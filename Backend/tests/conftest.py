@@ -0,0 +1,54 @@
+import os
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run every test in a scratch directory
+
+    Upload, chunk, audio and cache directories are relative paths, so this
+    keeps tests away from the server's real temp files.
+    """
+    for name in ('uploads', 'temp_chunks', 'temp_audio', 'cache'):
+        (tmp_path / name).mkdir()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('SARVAM_API_KEY', 'test-key')
+    return tmp_path
+
+
+class FakeResponse:
+    def __init__(self, payload=None, status_code=200):
+        self.payload = payload or {}
+        self.status_code = status_code
+        self.text = str(payload)
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def fake_response():
+    return FakeResponse
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """The app module with its janitor thread disabled and job submissions recorded, not run"""
+    import temp_storage
+    monkeypatch.setattr(temp_storage.TempStorageJanitor, 'start', lambda self: None)
+    import app as server
+
+    submitted = []
+
+    def submit(kind, fn, *args, to=None, trace_id=None):
+        submitted.append((kind, fn, args))
+        return f"job{len(submitted)}"
+
+    monkeypatch.setattr(server.job_manager, 'submit', submit)
+    monkeypatch.setattr(server, 'submitted', submitted, raising=False)
+    return server
+
+
+@pytest.fixture
+def client(server):
+    return server.app.test_client()
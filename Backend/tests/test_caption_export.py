@@ -0,0 +1,76 @@
+import os
+import pytest
+from result_cache import ResultCache
+
+CAPTIONS = [{'text': 'hello', 'start_time': 0.0, 'end_time': 1.0, 'confidence': 0.9}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(cache_dir=str(tmp_path / 'results'))
+
+
+def test_track_ids_are_validated(cache):
+    assert cache.get_track('../../etc/passwd') is None
+    assert not ResultCache.is_valid_track_id('upload-abc-hi-xyz')
+    assert ResultCache.is_valid_track_id(ResultCache.track_id('upload', 'abc', 'hi', 'm'))
+
+
+def test_export_rejects_bad_track_id_and_format(server, client, cache, monkeypatch):
+    monkeypatch.setattr(server, 'result_cache', cache)
+    cache.put('upload', 'abc', 'hi', 'm', CAPTIONS)
+    track_id = ResultCache.track_id('upload', 'abc', 'hi', 'm')
+
+    assert client.get('/captions/not-a-track.srt').status_code == 400
+    assert client.get(f'/captions/{track_id}.exe').status_code == 400
+    assert client.get('/captions/upload-missing-hi-0123456789ab.srt').status_code == 404
+    assert not os.listdir(cache.exports_dir)
+
+    response = client.get(f'/captions/{track_id}.srt')
+    assert response.status_code == 200
+    assert b'hello' in response.data
+
+
+@pytest.fixture
+def export(server, client, cache, monkeypatch):
+    monkeypatch.setattr(server, 'result_cache', cache)
+    cache.put('upload', 'abc', 'hi', 'm', CAPTIONS)
+    return f"/captions/{ResultCache.track_id('upload', 'abc', 'hi', 'm')}.vtt"
+
+
+def test_unchanged_export_revalidates_with_304(client, export):
+    first = client.get(export)
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    assert 'max-age' in first.headers['Cache-Control']
+
+    again = client.get(export, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert client.get(export, headers={'If-None-Match': '"stale"'}).status_code == 200
+
+
+def test_restored_track_gets_a_new_etag(client, cache, export):
+    etag = client.get(export).headers['ETag']
+
+    cache.put('upload', 'abc', 'hi', 'm', CAPTIONS + [dict(CAPTIONS[0], start_time=2.0, end_time=3.0)])
+
+    response = client.get(export, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_range_requests_return_partial_content(client, export):
+    full = client.get(export).data
+
+    response = client.get(export, headers={'Range': 'bytes=0-5'})
+    assert response.status_code == 206
+    assert response.data == full[:6] == b'WEBVTT'
+    assert response.headers['Content-Range'] == f'bytes 0-5/{len(full)}'
+    assert response.headers['Accept-Ranges'] == 'bytes'
+
+    tail = client.get(export, headers={'Range': f'bytes={len(full) - 4}-'})
+    assert tail.status_code == 206
+    assert tail.data == full[-4:]
+
+    assert client.get(export, headers={'Range': f'bytes={len(full) + 10}-'}).status_code == 416
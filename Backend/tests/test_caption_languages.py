@@ -0,0 +1,49 @@
+import pytest
+from result_cache import ResultCache
+
+CAPTIONS = [{'text': 'नमस्ते', 'start_time': 0.0, 'end_time': 1.0, 'confidence': 0.9}]
+
+
+@pytest.fixture
+def captioning(server, monkeypatch, workdir):
+    calls = {'translated': [], 'emits': []}
+    monkeypatch.setattr(server, 'result_cache', ResultCache(cache_dir=str(workdir / 'cache' / 'results')))
+    monkeypatch.setattr(server, 'translate_captions', lambda captions, language, source='en':
+                        calls['translated'].append((language, source)) or captions)
+    monkeypatch.setattr(server.job_manager, 'emit', lambda event, data, to=None, **kwargs: None)
+    monkeypatch.setattr(server.job_manager, 'emit_caption',
+                        lambda data, to=None: calls['emits'].append((data['language'], to)))
+    monkeypatch.setattr(server.job_manager, 'progress', lambda stage, message=None: None)
+    return calls
+
+
+class Engine:
+    name = 'fake'
+    STT_MODEL = 'fake:v1'
+
+
+def test_stored_spoken_language_track_is_translated_not_transcribed(server, captioning):
+    # An earlier job transcribed Hindi speech directly and translated it to Tamil
+    server.store_languages('upload', 'abc123', 'room1', Engine(), {'hi': CAPTIONS, 'ta': CAPTIONS},
+                           {'status': 'success', 'captions': CAPTIONS, 'language': 'hi-IN'})
+
+    asr_result, captions = server.caption_languages('upload', 'abc123', ['te', 'bn'], 'room2', Engine(),
+                                                    lambda on_segment, languages=None: pytest.fail('ran ASR'))
+
+    assert asr_result is None
+    assert set(captions) == {'te', 'bn'}
+    # From the Hindi ASR track, not from the Tamil translation
+    assert sorted(captioning['translated']) == [('bn', 'hi'), ('te', 'hi')]
+
+
+def test_translated_tracks_are_not_used_as_a_source(server, captioning):
+    server.store_languages('upload', 'abc123', 'room1', Engine(), {'ta': CAPTIONS}, None)
+    transcribed = []
+
+    def transcribe(on_segment, languages=None):
+        transcribed.append(languages)
+        return {'status': 'success', 'captions': [], 'language': 'en-IN'}
+
+    server.caption_languages('upload', 'abc123', ['te'], 'room2', Engine(), transcribe)
+
+    assert transcribed == [['te']]
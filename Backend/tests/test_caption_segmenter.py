@@ -0,0 +1,78 @@
+import pytest
+from caption_segmenter import CaptionSegmenter
+from stt_service import SarvamSTTService
+
+
+def timed(words, step=0.3):
+    starts = [i * step for i in range(len(words))]
+    ends = [start + step * 0.9 for start in starts]
+    return words, starts, ends
+
+
+def test_lines_break_at_word_boundaries():
+    segmenter = CaptionSegmenter(max_line_chars=20, max_lines=2)
+    words = 'the quick brown fox jumps over'.split()
+
+    captions = segmenter.segment(*timed(words))
+
+    assert [cap['text'] for cap in captions] == ['the quick brown fox\njumps over']
+
+
+def test_captions_needing_more_lines_are_split():
+    segmenter = CaptionSegmenter(max_line_chars=10, max_lines=2)
+    # 'aaaa bbbbbb' is 11 characters, so each line holds one word and each caption two
+    words = ['aaaa', 'bbbbbb', 'cccc', 'dddddd', 'eeee', 'ffffff']
+
+    captions = segmenter.segment(*timed(words))
+
+    for cap in captions:
+        lines = cap['text'].split('\n')
+        assert len(lines) <= 2
+        assert all(len(line) <= 10 for line in lines)
+    assert ' '.join(cap['text'].replace('\n', ' ') for cap in captions) == ' '.join(words)
+    # Split captions keep their own words' timing
+    assert all(a['end_time'] <= b['start_time'] for a, b in zip(captions, captions[1:]))
+
+
+def test_pause_and_sentence_end_break_captions():
+    segmenter = CaptionSegmenter()
+    words = ['Hello', 'there.', 'How', 'are', 'you', 'doing']
+    starts = [0.0, 0.3, 0.6, 0.9, 3.0, 3.3]
+    ends = [0.25, 0.55, 0.85, 1.15, 3.25, 3.55]
+
+    captions = segmenter.segment(words, starts, ends)
+
+    assert [cap['text'] for cap in captions] == ['Hello there.', 'How are', 'you doing']
+
+
+def test_empty_tokens_are_dropped():
+    segmenter = CaptionSegmenter()
+
+    captions = segmenter.segment(['hello', '', ' ', 'world'], [0, 0.2, 0.3, 0.4], [0.2, 0.3, 0.4, 0.6])
+
+    assert captions[0]['text'] == 'hello world'
+
+
+def test_mismatched_columns_raise():
+    with pytest.raises(ValueError):
+        CaptionSegmenter().segment(['a', 'b'], [0.0], [0.5, 1.0])
+    with pytest.raises(ValueError):
+        CaptionSegmenter.columns_from_sarvam({
+            'words': ['a', 'b'], 'start_time_seconds': [0.0], 'end_time_seconds': [0.5, 1.0]
+        })
+
+
+def test_bad_timestamps_fall_back_to_transcript():
+    captions = SarvamSTTService._parse_timestamps({
+        'transcript': 'hello world',
+        'timestamps': {'words': ['hello', 'world'], 'start_time_seconds': [0.0], 'end_time_seconds': [0.5]}
+    }, 'en-IN')
+
+    assert captions == [{'text': 'hello world', 'start_time': 0, 'end_time': 0, 'confidence': 0}]
+
+
+def test_wrap_text_rewraps_translations():
+    segmenter = CaptionSegmenter(max_line_chars=12)
+
+    assert segmenter.wrap_text('one two  three\nfour') == 'one two\nthree four'
+    assert segmenter.wrap_text('   ') == ''
@@ -0,0 +1,40 @@
+import pytest
+
+
+@pytest.fixture
+def emitted(server, monkeypatch):
+    events = []
+    monkeypatch.setattr(server.job_manager, 'emit', lambda event, data, to=None, **kwargs: events.append((event, data, to)))
+    monkeypatch.setattr(server.job_manager, 'emit_caption', lambda data, to=None: events.append(('caption', data, to)))
+    return events
+
+
+def test_upload_without_an_engine_reports_an_error(server, emitted, monkeypatch, workdir):
+    monkeypatch.setattr(server.stt_router, 'select', lambda: None)
+    video = workdir / 'uploads' / 'video.mp4'
+    video.write_bytes(b'data')
+
+    server.process_uploaded_video(str(video), ['hi'], 'session1')
+
+    assert emitted == [('error', {'message': server.NO_STT_ENGINE_MESSAGE}, 'session1')]
+    assert not video.exists()
+
+
+def test_without_the_translator_only_the_source_language_is_captioned(server, emitted, monkeypatch):
+    monkeypatch.setattr(server, 'stt_service', None)
+    captions = [{'text': 'namaste', 'start_time': 0.0, 'end_time': 1.0, 'confidence': 0.9}]
+
+    def transcribe(on_segment, languages=None):
+        on_segment({'captions': captions, 'language': 'hi-IN'})
+        on_segment({'captions': captions, 'language': 'hi-IN'})
+        return {'status': 'success', 'captions': captions + captions, 'language': 'hi-IN'}
+
+    asr_result, by_language = server.caption_languages('upload', None, ['hi', 'ta'], 'room', None, transcribe)
+
+    assert asr_result['status'] == 'success'
+    assert by_language == {'hi': captions + captions}
+    errors = [(data['language'], to) for event, data, to in emitted if event == 'error']
+    # Reported once, to the language's own room
+    assert errors == [('ta', 'room:ta')]
+    with pytest.raises(RuntimeError):
+        server.translate_captions(captions, 'ta', 'hi')
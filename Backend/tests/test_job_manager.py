@@ -0,0 +1,203 @@
+import os
+import time
+import threading
+import pytest
+import job_manager
+from job_manager import JobManager, JobQueueFull
+
+
+class FakeSocketIO:
+    """Runs the emit pump on a real thread and records what it sends"""
+
+    def __init__(self):
+        self.sent = []
+
+    def start_background_task(self, fn):
+        thread = threading.Thread(target=fn, daemon=True)
+        thread.start()
+        return thread
+
+    def emit(self, event, data, to=None, namespace='/'):
+        self.sent.append((event, data, to))
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def socketio():
+    return FakeSocketIO()
+
+
+def test_jobs_beyond_the_queue_limit_are_rejected(socketio):
+    manager = JobManager(socketio, job_workers=1, ffmpeg_workers=1, queue_limit=1)
+    release = threading.Event()
+
+    running = manager.submit('upload', release.wait)
+    wait_for(lambda: manager.get_job(running)['state'] == 'running')
+    queued = manager.submit('upload', lambda: None)
+    with pytest.raises(JobQueueFull):
+        manager.submit('upload', lambda: None)
+
+    stats = manager.get_stats()
+    assert (stats['queue_depth'], stats['in_flight'], stats['rejected']) == (1, 1, 1)
+
+    release.set()
+    wait_for(lambda: not manager.is_active(queued))
+    stats = manager.get_stats()
+    assert (stats['submitted'], stats['completed'], stats['failed']) == (2, 2, 0)
+    assert (stats['queue_depth'], stats['in_flight']) == (0, 0)
+
+
+def test_failed_jobs_are_counted_and_reported(socketio):
+    manager = JobManager(socketio, job_workers=1, ffmpeg_workers=1)
+
+    def fail():
+        raise RuntimeError('boom')
+
+    job_id = manager.submit('youtube', fail, to='room')
+    wait_for(lambda: not manager.is_active(job_id))
+
+    assert manager.get_job(job_id)['error'] == 'boom'
+    assert manager.get_stats()['failed'] == 1
+    wait_for(lambda: any(data.get('state') == 'failed' for event, data, _ in socketio.sent if event == 'job_status'))
+
+
+def test_run_cpu_runs_in_another_process(socketio):
+    manager = JobManager(socketio, job_workers=1, ffmpeg_workers=1)
+
+    assert manager.run_cpu(os.getpid) != os.getpid()
+    # Not forked from a process that has job threads running
+    assert manager._process_pool._mp_context.get_start_method() in ('forkserver', 'spawn')
+    manager._process_pool.shutdown()
+
+
+def test_cpu_slot_bounds_concurrent_holders(socketio):
+    manager = JobManager(socketio, job_workers=1, ffmpeg_workers=1)
+    entered = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with manager.cpu_slot():
+            entered.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    entered.wait(5)
+    assert not manager._cpu_slots.acquire(timeout=0.05)
+
+    release.set()
+    holder.join(5)
+    with manager.cpu_slot():
+        pass
+
+
+def test_idle_pump_blocks_instead_of_polling(socketio, monkeypatch):
+    manager = JobManager(socketio, job_workers=1, ffmpeg_workers=1)
+    waits = []
+    next_emit = manager._next_emit
+    monkeypatch.setattr(manager, '_next_emit', lambda timeout: waits.append(timeout) or next_emit(timeout))
+
+    manager.emit('hello', {}, to='room')
+    wait_for(lambda: socketio.sent)
+    time.sleep(0.2)
+
+    assert socketio.sent == [('hello', {}, 'room')]
+    # One wait for the event, then waiting on the empty queue rather than 20 ms sleeps
+    assert len(waits) <= 3
+    assert all(timeout == job_manager.PUMP_IDLE_TIMEOUT for timeout in waits)
+
+
+# ---------- caption_batch coalescing ----------
+
+def paused_manager(socketio, batch_size=50, batch_window=10.0):
+    """A manager whose pump starts only when run_pump is called, so the queue can be filled first"""
+    manager = JobManager(socketio, job_workers=1, ffmpeg_workers=1)
+    manager.batch_size = batch_size
+    manager.batch_window = batch_window
+    manager._pump_started = True
+    return manager
+
+
+def run_pump(socketio, manager):
+    socketio.start_background_task(manager._pump)
+
+
+def batches(socketio, to=None):
+    return [[c['n'] for c in data['captions']] for event, data, room in socketio.sent
+            if event == 'caption_batch' and to in (None, room)]
+
+
+def test_full_batches_are_sent_without_waiting(socketio):
+    manager = paused_manager(socketio, batch_size=3)
+    for n in range(7):
+        manager.emit_caption({'n': n}, to='room')
+    run_pump(socketio, manager)
+
+    wait_for(lambda: len(batches(socketio)) == 2)
+    time.sleep(0.1)
+    # The seventh waits for its window
+    assert batches(socketio) == [[0, 1, 2], [3, 4, 5]]
+    assert manager.get_stats()['caption_batches'] == 2
+
+
+def test_partial_batch_is_sent_when_its_window_ends(socketio):
+    manager = paused_manager(socketio, batch_window=0.05)
+    manager.emit_caption({'n': 0}, to='room')
+    manager.emit_caption({'n': 1}, to='room')
+    started = time.monotonic()
+    run_pump(socketio, manager)
+
+    wait_for(lambda: batches(socketio))
+    assert batches(socketio) == [[0, 1]]
+    assert time.monotonic() - started >= 0.04
+    assert manager.get_stats()['captions_emitted'] == 2
+
+
+def test_rooms_are_batched_separately_and_keep_order(socketio):
+    manager = paused_manager(socketio, batch_window=0.05)
+    for n in range(6):
+        manager.emit_caption({'n': n}, to='a' if n % 2 else 'b')
+    run_pump(socketio, manager)
+
+    wait_for(lambda: len(batches(socketio)) == 2)
+    assert batches(socketio, 'a') == [[1, 3, 5]]
+    assert batches(socketio, 'b') == [[0, 2, 4]]
+
+
+def test_other_events_flush_their_rooms_captions_first(socketio):
+    manager = paused_manager(socketio)
+    manager.emit_caption({'n': 0}, to='room')
+    manager.emit_caption({'n': 1}, to='other')
+    manager.emit('transcription_complete', {'total_captions': 1}, to='room')
+    run_pump(socketio, manager)
+
+    wait_for(lambda: len(socketio.sent) == 2)
+    assert [(event, room) for event, _, room in socketio.sent] == [
+        ('caption_batch', 'room'), ('transcription_complete', 'room')
+    ]
+    # 'other' still waits for its window
+    assert batches(socketio, 'other') == []
+
+
+def test_msgpack_rooms_get_one_binary_attachment(socketio):
+    msgpack = pytest.importorskip('msgpack')
+    manager = paused_manager(socketio, batch_size=2)
+    assert manager.set_encoding('room', 'msgpack') == 'msgpack'
+    assert manager.set_encoding('plain', 'yaml') == 'json'
+    manager.emit_caption({'n': 0, 'text': 'नमस्ते'}, to='room')
+    manager.emit_caption({'n': 1, 'text': 'hello'}, to='room')
+    run_pump(socketio, manager)
+
+    wait_for(lambda: socketio.sent)
+    event, data, _ = socketio.sent[0]
+    assert (event, data['encoding'], data['count']) == ('caption_batch', 'msgpack', 2)
+    assert msgpack.unpackb(data['data'], raw=False) == [{'n': 0, 'text': 'नमस्ते'}, {'n': 1, 'text': 'hello'}]
@@ -0,0 +1,119 @@
+import pytest
+import stt_engine
+from stt_engine import STTEngine, PCM_BYTES_PER_SECOND
+from stt_service import SarvamSTTService
+
+
+class DetectingEngine(STTEngine):
+    """Transcribes each frame into one caption in whatever language it was asked for"""
+
+    name = 'fake'
+
+    def __init__(self, detected=None, error=None):
+        super().__init__()
+        self.detected = detected
+        self.error = error
+        self.probes = []
+        self.languages = []
+
+    def detect_language(self, pcm, sample_rate=16000, sample_width=2):
+        self.probes.append(len(pcm))
+        if self.error:
+            raise self.error
+        return self.detected
+
+    def _transcribe_pcm(self, pcm, offset, language_code, sample_rate=16000, sample_width=2):
+        self.languages.append(language_code)
+        return {'status': 'success', 'text': language_code, 'confidence': 1.0,
+                'captions': [{'text': language_code, 'start_time': offset, 'end_time': offset + 1, 'confidence': 1.0}]}
+
+
+def frames(seconds=20):
+    return [(float(n), b'\0' * PCM_BYTES_PER_SECOND) for n in range(seconds)]
+
+
+@pytest.mark.parametrize('detected, error, expected', [
+    (('hi-IN', 0.9), None, 'hi-IN'),
+    (('hi-IN', None), None, 'hi-IN'),
+    (('hi-IN', 0.3), None, 'en-IN'),    # not confident enough
+    (('fr-FR', 0.99), None, 'en-IN'),   # not a caption language
+    (None, None, 'en-IN'),              # the engine can't tell
+    (None, RuntimeError('timeout'), 'en-IN'),
+])
+def test_identify_language_falls_back_to_the_default(detected, error, expected):
+    engine = DetectingEngine(detected, error)
+
+    language_code, replay = engine.identify_language(frames(), ['hi-IN', 'ta-IN'])
+
+    assert language_code == expected
+    # Only the probe is sent for detection, and every frame is still transcribed
+    assert engine.probes == [int(stt_engine.LANGUAGE_DETECTION_SECONDS * PCM_BYTES_PER_SECOND)]
+    assert [offset for offset, _ in replay] == [float(n) for n in range(20)]
+
+
+def test_no_candidates_skips_detection():
+    engine = DetectingEngine(('hi-IN', 0.9))
+
+    assert engine.identify_language(frames(), [])[0] == 'en-IN'
+    assert engine.probes == []
+
+
+@pytest.fixture
+def speech(server, monkeypatch):
+    monkeypatch.setattr(server, 'VAD_ENABLED', False)
+    return server
+
+
+def test_detected_language_is_used_for_transcription(speech):
+    engine = DetectingEngine(('ta-IN', 0.95))
+    segments = []
+
+    result = speech.transcribe_speech(engine, frames=iter(frames()), on_segment=segments.append,
+                                      languages=['en', 'ta'])
+
+    assert result['status'] == 'success'
+    assert set(engine.languages) == {'ta-IN'}
+    assert {segment['language'] for segment in segments} == {'ta-IN'}
+
+
+def test_failed_detection_transcribes_in_english(speech):
+    engine = DetectingEngine(error=RuntimeError('timeout'))
+    segments = []
+
+    result = speech.transcribe_speech(engine, frames=iter(frames()), on_segment=segments.append, languages=['ta'])
+
+    assert result['status'] == 'success'
+    assert set(engine.languages) == {'en-IN'}
+    assert {segment['language'] for segment in segments} == {'en-IN'}
+
+
+class StubClient:
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+
+    def post(self, url, files=None, data=None, timeout=None, live=False):
+        self.requests.append(data)
+        return self.response
+
+
+def test_sarvam_detection_asks_for_unknown_language(fake_response):
+    service = SarvamSTTService()
+    service.transport_encoding = 'wav'
+    service.client = StubClient(fake_response({'language_code': 'hi-IN', 'language_probability': 0.87}))
+
+    assert service.detect_language(b'\0' * 320) == ('hi-IN', 0.87)
+    assert service.client.requests[0]['language_code'] == 'unknown'
+
+
+@pytest.mark.parametrize('payload, status_code', [
+    ({'language_code': None}, 200),
+    ({'transcript': 'hello'}, 200),
+    ({'error': 'rate limited'}, 429),
+])
+def test_sarvam_detection_without_an_answer_returns_none(fake_response, payload, status_code):
+    service = SarvamSTTService()
+    service.transport_encoding = 'wav'
+    service.client = StubClient(fake_response(payload, status_code))
+
+    assert service.detect_language(b'\0' * 320) is None
@@ -0,0 +1,100 @@
+import time
+from sarvam_client import SarvamClient
+from stt_service import SarvamSTTService
+from live_captioning import LiveCaptioner, PCM_BYTES_PER_SECOND
+
+
+class ScriptedEngine:
+    name = 'scripted'
+
+    def __init__(self, *windows):
+        self.windows = list(windows)
+        self.sent = []
+
+    def transcribe_window(self, pcm, offset, language_code):
+        self.sent.append((offset, len(pcm) / float(PCM_BYTES_PER_SECOND)))
+        captions = [{'text': text, 'start_time': start, 'end_time': end, 'confidence': 1.0}
+                    for text, start, end in self.windows.pop(0)]
+        return {'status': 'success', 'captions': captions}
+
+
+def live_session(engine, seconds):
+    emitted = []
+    captioner = LiveCaptioner(emit=lambda event, data, sid: emitted.append((event, data)),
+                              translate=lambda captions, language, source: captions, workers=1)
+    session = captioner.start('s1', engine, 'hi', 'hi')
+    add_audio(session, seconds)
+    return captioner, session, emitted
+
+
+def add_audio(session, seconds):
+    session.buffer.extend(b'\x00\x00' * int(seconds * 16000))
+    session.received_seconds += seconds
+    session.last_audio_at = time.monotonic()
+    # Skip the VAD; these windows are speech
+    session.checked_bytes = len(session.buffer)
+    session.has_speech = True
+
+
+def test_captions_two_windows_agree_on_are_final():
+    engine = ScriptedEngine(
+        [('one', 2.1, 2.5), ('two', 2.5, 3.0)],
+        [('one', 2.1, 2.5), ('two', 2.5, 3.2), ('three', 3.2, 3.3)],
+    )
+    captioner, session, emitted = live_session(engine, 3.0)
+
+    captioner._transcribe_window(session, False)
+    assert [event for event, _ in emitted] == ['live_partial']
+
+    add_audio(session, 0.3)
+    captioner._transcribe_window(session, False)
+
+    # Neither caption has LIVE_STABLE_SECONDS of audio after it, but both windows agree on them
+    finals = [data['captions'] for event, data in emitted if event == 'live_final']
+    assert [cap['text'] for cap in finals[0]] == ['one', 'two']
+    assert round(session.buffer_start, 2) == 3.2
+    assert session.previous_partial == ['three']
+
+
+def test_newest_caption_stays_partial_while_it_may_grow():
+    engine = ScriptedEngine(
+        [('one', 2.1, 3.0)],
+        [('one', 2.1, 3.3)],
+    )
+    captioner, session, emitted = live_session(engine, 3.0)
+
+    captioner._transcribe_window(session, False)
+    add_audio(session, 0.3)
+    captioner._transcribe_window(session, False)
+
+    assert [event for event, _ in emitted] == ['live_partial', 'live_partial']
+    assert session.buffer_start == 0
+
+
+def test_live_windows_use_live_budget_and_wav(monkeypatch, fake_response):
+    service = SarvamSTTService()
+    calls = []
+
+    def post(url, live=False, files=None, **kwargs):
+        calls.append((live, files['file'][2]))
+        return fake_response({'transcript': 'hello'})
+
+    monkeypatch.setattr(service.client, 'post', post)
+    monkeypatch.setattr(service, 'transport_encoding', 'flac')
+    monkeypatch.setattr('audio_processor.subprocess.run',
+                        lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError('ffmpeg started')))
+
+    result = service.transcribe_window(b'\x00\x00' * 1600, 5.0, 'hi-IN')
+
+    assert result['status'] == 'success'
+    assert calls == [(True, 'audio/wav')]
+
+
+def test_live_requests_draw_on_their_own_bucket(monkeypatch, fake_response):
+    client = SarvamClient({}, rate_limit=1, burst=1, live_rate_limit=1, live_burst=1)
+    monkeypatch.setattr(client.session, 'post', lambda url, **kwargs: fake_response())
+
+    client.post(client.url('/speech-to-text'))
+    # The batch bucket is empty, the live one isn't
+    assert client.live_rate_limiter.acquire() == 0
+    assert client.rate_limiter.tokens < 1
@@ -0,0 +1,224 @@
+import io
+import os
+import time
+import threading
+from types import SimpleNamespace
+import pytest
+from upload_handler import UploadHandler, TEMP_CHUNK_DIR
+
+
+def new_session(session_id='p1', filename='video.mkv', file_size=8, chunk_size=4):
+    total_chunks = -(-file_size // chunk_size)
+    UploadHandler.create_session(filename, total_chunks, chunk_size, file_size, session_id=session_id)
+    return session_id
+
+
+def put(session_id, index, data):
+    return UploadHandler.put_chunk(session_id, index, io.BytesIO(data))
+
+
+def read_in_background(session_id, **kwargs):
+    result = {'data': b'', 'error': None}
+
+    def run():
+        try:
+            for block in UploadHandler.iter_contiguous_bytes(session_id, poll_interval=0.05, **kwargs):
+                result['data'] += block
+        except Exception as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, result
+
+
+# ---------- iter_contiguous_bytes ----------
+
+def test_reader_follows_chunks_across_finalize():
+    # Progressive ingest starts once chunk 0 is in
+    new_session(file_size=10)
+    put('p1', 0, b'AAAA')
+    thread, result = read_in_background('p1', stall_timeout=5)
+
+    put('p1', 2, b'CC')
+    time.sleep(0.1)
+    assert result['data'] == b'AAAA'
+    assert put('p1', 1, b'BBBB')['status'] == 'success'
+
+    thread.join(2)
+    assert result['error'] is None
+    assert result['data'] == b'AAAABBBBCC'
+
+
+def test_reader_fails_when_session_is_removed():
+    new_session()
+    put('p1', 0, b'AAAA')
+    thread, result = read_in_background('p1', stall_timeout=5)
+    time.sleep(0.1)
+
+    # e.g. reaped by the temp storage janitor; the preallocated tail must not be read as data
+    UploadHandler.cleanup_session('p1')
+    thread.join(2)
+    assert 'removed' in str(result['error'])
+    assert result['data'] == b'AAAA'
+
+
+def test_reader_stops_when_asked():
+    new_session()
+    put('p1', 0, b'AAAA')
+    stop = threading.Event()
+    thread, result = read_in_background('p1', stall_timeout=60, stop=stop)
+    time.sleep(0.1)
+
+    stop.set()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert result['error'] is None
+
+
+def test_reader_gives_up_on_stalled_upload():
+    new_session()
+    put('p1', 0, b'AAAA')
+    thread, result = read_in_background('p1', stall_timeout=0.2)
+    thread.join(2)
+    assert 'stalled' in str(result['error'])
+
+
+# ---------- handoff between the progressive job and the upload ----------
+
+@pytest.fixture
+def progressive(server, client, monkeypatch):
+    """Endpoints plus recording doubles for decoding, ASR and emits"""
+    calls = {'emits': [], 'stored': [], 'fallback': [], 'asr': {'status': 'success', 'captions': []},
+             'captions': {'hi': [{'text': 'a', 'start_time': 0, 'end_time': 1}]}}
+
+    monkeypatch.setattr(server.AudioProcessor, 'stream_audio_from_chunks',
+                        lambda chunks, label=None, stop=None, **kwargs: iter(()))
+    monkeypatch.setattr(server, 'caption_languages',
+                        lambda *args: (calls['asr'], calls['captions']))
+    monkeypatch.setattr(server, 'store_languages',
+                        lambda kind, content_id, room, engine, captions, asr_result=None:
+                        calls['stored'].append((content_id, captions)))
+    monkeypatch.setattr(server, 'process_uploaded_video',
+                        lambda file_path, languages, session_id, content_hash=None:
+                        calls['fallback'].append((file_path, languages)))
+    monkeypatch.setattr(server.job_manager, 'emit',
+                        lambda event, data, to=None, namespace='/': calls['emits'].append((event, to)))
+    monkeypatch.setattr(server.stt_router, 'select', lambda: SimpleNamespace(name='fake'))
+    monkeypatch.setattr(server, 'PROGRESSIVE_INGEST', True)
+
+    response = client.post('/upload/init', json={
+        'filename': 'video.mkv', 'total_chunks': 2, 'chunk_size': 4, 'file_size': 8,
+        'session_id': 'p1', 'languages': ['hi']
+    })
+    assert response.status_code == 200
+    return calls
+
+
+def put_range(client, start, data):
+    return client.put('/upload/p1', data=data, headers={
+        'Content-Range': f'bytes {start}-{start + len(data) - 1}/8',
+        'Content-Type': 'application/octet-stream'
+    })
+
+
+def run_submitted(server, kind):
+    for submitted_kind, fn, args in server.submitted:
+        if submitted_kind == kind:
+            fn(*args)
+            return fn
+    raise AssertionError(f"no {kind} job submitted")
+
+
+def test_registered_before_submit(server, client, progressive, monkeypatch):
+    seen = []
+    submit = server.job_manager.submit
+
+    def checking_submit(kind, fn, *args, **kwargs):
+        seen.append('p1' in server.progressive_uploads)
+        return submit(kind, fn, *args, **kwargs)
+
+    monkeypatch.setattr(server.job_manager, 'submit', checking_submit)
+    put_range(client, 0, b'AAAA')
+    assert seen == [True]
+
+
+def test_transcription_first_then_upload_queues_finish(server, client, progressive):
+    put_range(client, 0, b'AAAA')
+    run_submitted(server, 'progressive_upload')
+    assert progressive['stored'] == []
+
+    response = put_range(client, 4, b'BBBB')
+    assert response.status_code == 200
+    fn = run_submitted(server, 'upload')
+    assert fn is server.finish_progressive_upload
+    assert len(progressive['stored']) == 1
+    assert not os.path.exists(response.get_json()['file_path'])
+    assert 'p1' not in server.progressive_uploads
+
+
+def test_upload_first_then_job_finishes_inline(server, client, progressive):
+    put_range(client, 0, b'AAAA')
+    put_range(client, 4, b'BBBB')
+    assert [kind for kind, _, _ in server.submitted] == ['progressive_upload']
+
+    run_submitted(server, 'progressive_upload')
+    assert len(progressive['stored']) == 1
+    assert 'p1' not in server.progressive_uploads
+
+
+def test_failed_stream_resets_captions_before_fallback(server, client, progressive):
+    progressive['asr'] = {'status': 'error', 'message': 'ffmpeg could not decode the pipe'}
+    put_range(client, 0, b'AAAA')
+    put_range(client, 4, b'BBBB')
+
+    run_submitted(server, 'progressive_upload')
+    assert ('captions_reset', 'p1:hi') in progressive['emits']
+    assert progressive['stored'] == []
+    assert len(progressive['fallback']) == 1
+
+
+def test_failed_stream_without_captions_falls_back_quietly(server, client, progressive):
+    progressive['asr'] = {'status': 'error', 'message': 'ffmpeg could not decode the pipe'}
+    progressive['captions'] = {'hi': []}
+    put_range(client, 0, b'AAAA')
+    run_submitted(server, 'progressive_upload')
+
+    # The upload is still arriving, so the session waits for it
+    assert 'p1' in server.progressive_uploads
+    put_range(client, 4, b'BBBB')
+    run_submitted(server, 'upload')
+    assert progressive['emits'] == []
+    assert len(progressive['fallback']) == 1
+
+
+def test_stalled_upload_is_abandoned_and_cleaned_up(server, client, progressive, monkeypatch):
+    progressive['asr'] = {'status': 'error', 'message': 'Upload stalled at 4/8 bytes'}
+    progressive['captions'] = {'hi': []}
+    monkeypatch.setattr(UploadHandler, 'is_session_stalled', staticmethod(lambda session_id: True))
+    put_range(client, 0, b'AAAA')
+
+    run_submitted(server, 'progressive_upload')
+    assert 'p1' not in server.progressive_uploads
+    assert not os.path.exists(os.path.join(TEMP_CHUNK_DIR, 'p1'))
+    assert ('error', 'p1') in progressive['emits']
+
+
+def test_streams_beyond_the_limit_wait_for_the_complete_file(server, client, progressive, monkeypatch):
+    monkeypatch.setattr(server, 'progressive_slots', threading.BoundedSemaphore(1))
+    server.progressive_slots.acquire()
+    monkeypatch.setattr(server, 'caption_languages', lambda *args: pytest.fail('streamed past the limit'))
+    put_range(client, 0, b'AAAA')
+    run_submitted(server, 'progressive_upload')
+
+    put_range(client, 4, b'BBBB')
+    run_submitted(server, 'upload')
+    assert progressive['emits'] == []
+    assert len(progressive['fallback']) == 1
+
+
+def test_upload_frames_dont_hold_an_ffmpeg_slot(server, monkeypatch):
+    monkeypatch.setattr(server.job_manager, 'cpu_slot', lambda: pytest.fail('took an ffmpeg slot'))
+    monkeypatch.setattr(server, 'transcribe_speech', lambda engine, frames=None, **kwargs: list(frames))
+
+    assert server.transcribe_file(None, None, frames=iter([(0.0, b'pcm')])) == [(0.0, b'pcm')]
@@ -0,0 +1,75 @@
+import os
+import time
+import pytest
+from result_cache import ResultCache
+
+CAPTIONS = [{'text': 'hello', 'start_time': 0.0, 'end_time': 1.0, 'confidence': 0.9}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(cache_dir=str(tmp_path / 'results'))
+
+
+def test_model_version_is_part_of_the_key(cache):
+    cache.put('upload', 'abc123', 'hi', 'model-a', CAPTIONS)
+
+    assert cache.get('upload', 'abc123', 'hi', 'model-a') == CAPTIONS
+    # A new model or segmenter version never sees the old track
+    assert cache.get('upload', 'abc123', 'hi', 'model-b') is None
+    assert cache.stats['hits'] == 1
+    assert cache.stats['misses'] == 1
+
+
+def test_invalidate_by_filter_removes_tracks_and_exports(cache):
+    for kind, content_id, language in (('upload', 'abc', 'hi'), ('upload', 'abc', 'ta'),
+                                       ('youtube', 'dQw4w9WgXcQ', 'hi')):
+        cache.put(kind, content_id, language, 'm', CAPTIONS)
+    track_id = ResultCache.track_id('upload', 'abc', 'hi', 'm')
+    open(cache.export_path(track_id, 'srt'), 'w').close()
+
+    assert cache.invalidate(content_id='abc', language='hi') == 1
+    assert cache.get('upload', 'abc', 'hi', 'm') is None
+    assert not os.path.exists(cache.export_path(track_id, 'srt'))
+    assert cache.get('upload', 'abc', 'ta', 'm') == CAPTIONS
+
+    assert cache.invalidate(kind='youtube') == 1
+    assert cache.invalidate() == 1
+    assert cache.invalidate(content_id='../etc') == 0
+
+
+def test_storing_again_drops_stale_exports(cache):
+    cache.put('upload', 'abc', 'hi', 'm', CAPTIONS)
+    track_id = ResultCache.track_id('upload', 'abc', 'hi', 'm')
+    open(cache.export_path(track_id, 'vtt'), 'w').close()
+
+    cache.put('upload', 'abc', 'hi', 'm', CAPTIONS + CAPTIONS)
+
+    assert not os.path.exists(cache.export_path(track_id, 'vtt'))
+    assert len(cache.get_track(track_id)['captions']) == 2
+
+
+def test_least_recently_used_tracks_are_evicted(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path / 'results'), max_bytes=400)
+    cache.put('upload', 'old', 'hi', 'm', CAPTIONS)
+    cache.put('upload', 'used', 'hi', 'm', CAPTIONS)
+    stale = time.time() - 60
+    for content_id in ('old', 'used'):
+        path = cache._path('upload', content_id, 'hi', 'm')
+        os.utime(path, (stale, stale))
+    cache.get('upload', 'used', 'hi', 'm')
+
+    cache.put('upload', 'new', 'hi', 'm', CAPTIONS)
+
+    assert cache.get('upload', 'old', 'hi', 'm') is None
+    assert cache.get('upload', 'used', 'hi', 'm') == CAPTIONS
+    assert cache.stats['evictions'] == 1
+
+
+def test_find_transcribed_skips_translated_tracks(cache):
+    cache.put('upload', 'abc', 'en', 'm', CAPTIONS)
+    cache.put('upload', 'abc', 'hi', 'm', CAPTIONS, transcribed=True)
+
+    assert cache.find_transcribed('upload', 'abc', ['en', 'hi', 'ta'], 'm') == ('hi', CAPTIONS)
+    assert cache.find_transcribed('upload', 'abc', ['en', 'ta'], 'm') is None
+    assert cache.find_transcribed('upload', 'other', ['hi'], 'm') is None
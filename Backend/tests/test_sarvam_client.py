@@ -0,0 +1,138 @@
+import io
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+import sarvam_client
+from sarvam_client import SarvamClient, TokenBucket
+
+URL = 'https://sarvam.test/speech-to-text'
+
+
+class ScriptedAdapter(BaseAdapter):
+    """Answers each request with the next scripted status (or raises it, for exceptions)"""
+
+    def __init__(self, script):
+        super().__init__()
+        self.script = list(script)
+        self.requests = []
+
+    def send(self, request, timeout=None, **kwargs):
+        self.requests.append((request, timeout))
+        step = self.script.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        status, headers = step if isinstance(step, tuple) else (step, {})
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response._content = b'{}'
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(sarvam_client.time, 'sleep', delays.append)
+    return delays
+
+
+def client_with(script, **kwargs):
+    client = SarvamClient({'api-subscription-key': 'test'}, base_url='https://sarvam.test',
+                          rate_limit=0, live_rate_limit=0, **kwargs)
+    adapter = ScriptedAdapter(script)
+    client.session.mount('https://sarvam.test', adapter)
+    return client, adapter
+
+
+def test_throttling_and_server_errors_are_retried(sleeps):
+    client, adapter = client_with([429, 503, 200], max_retries=3)
+
+    response = client.post(URL, json={})
+
+    assert response.status_code == 200
+    assert len(adapter.requests) == 3
+    assert client.get_stats()['/speech-to-text']['retries'] == 2
+    assert client.get_stats()['/speech-to-text']['errors'] == 2
+
+
+def test_client_errors_and_exhausted_retries_return_the_response(sleeps):
+    client, adapter = client_with([400], max_retries=3)
+    assert client.post(URL, json={}).status_code == 400
+    assert sleeps == []
+
+    client, adapter = client_with([500, 500], max_retries=1)
+    assert client.post(URL, json={}).status_code == 500
+    assert len(adapter.requests) == 2
+
+
+def test_retry_after_is_honoured(sleeps):
+    client, _ = client_with([(429, {'Retry-After': '2'}), (429, {'Retry-After': '999'}), 200], max_retries=3)
+
+    client.post(URL, json={})
+
+    # Capped at SARVAM_BACKOFF_MAX
+    assert sleeps == [2.0, sarvam_client.SARVAM_BACKOFF_MAX]
+
+
+def test_backoff_is_jittered_within_the_exponential_bound(monkeypatch):
+    bounds = []
+    monkeypatch.setattr(sarvam_client.random, 'uniform', lambda low, high: bounds.append((low, high)) or high)
+
+    delays = [SarvamClient._backoff(attempt) for attempt in range(1, 8)]
+
+    assert all(low == 0 for low, _ in bounds)
+    assert delays == [min(sarvam_client.SARVAM_BACKOFF_MAX, sarvam_client.SARVAM_BACKOFF_BASE * 2 ** a)
+                      for a in range(1, 8)]
+
+
+def test_connection_errors_are_retried_then_raised(sleeps):
+    client, adapter = client_with([requests.exceptions.ConnectionError('reset'), 200], max_retries=2)
+    assert client.post(URL, json={}).status_code == 200
+
+    client, adapter = client_with([requests.exceptions.Timeout('slow')] * 2, max_retries=1)
+    with pytest.raises(requests.exceptions.Timeout):
+        client.post(URL, json={})
+    assert len(adapter.requests) == 2
+
+
+def test_retries_stop_at_the_deadline(sleeps):
+    client, adapter = client_with([(503, {'Retry-After': '5'}), 200], max_retries=3)
+
+    response = client.post(URL, json={}, timeout=60, deadline=3)
+
+    # The backoff would end past the deadline, so the 503 is returned
+    assert response.status_code == 503
+    assert len(adapter.requests) == 1
+    # The attempt's timeout was cut to the deadline
+    assert adapter.requests[0][1] <= 3
+
+
+def test_file_uploads_are_rewound_between_attempts(sleeps):
+    client, adapter = client_with([502, 200], max_retries=1)
+    audio = io.BytesIO(b'RIFFdata')
+
+    client.post(URL, files={'file': ('a.wav', audio, 'audio/wav')})
+
+    assert all(b'RIFFdata' in request.body for request, _ in adapter.requests)
+
+
+def test_token_bucket_spends_the_burst_then_waits(monkeypatch):
+    now = [100.0]
+    slept = []
+    monkeypatch.setattr(sarvam_client.time, 'monotonic', lambda: now[0])
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(sarvam_client.time, 'sleep', sleep)
+    bucket = TokenBucket(rate=2, burst=3)
+
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert slept == [pytest.approx(0.5)]
+    assert TokenBucket(rate=0, burst=1).acquire() == 0.0
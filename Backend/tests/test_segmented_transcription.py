@@ -0,0 +1,154 @@
+import time
+import wave
+import threading
+from stt_engine import STTEngine, PCM_BYTES_PER_SECOND
+
+
+class SecondsEngine(STTEngine):
+    """Captions every second of audio it hears, named by its time in the file"""
+
+    name = 'fake'
+    max_workers = 2
+
+    def __init__(self):
+        super().__init__()
+        self.windows = []
+
+    def transcribe_audio(self, audio_file_path, language_code='en-IN'):
+        raise AssertionError('expected segmented transcription')
+
+    def _transcribe_pcm(self, pcm, offset, language_code, sample_rate=16000, sample_width=2):
+        duration = len(pcm) / float(PCM_BYTES_PER_SECOND)
+        self.windows.append((offset, duration))
+        # One caption per second of this window (the tests' offsets are whole seconds)
+        captions = [
+            {'text': f"s{round(offset) + t}", 'start_time': offset + t, 'end_time': offset + t + 0.8, 'confidence': 1.0}
+            for t in range(int(duration))
+        ]
+        return {'status': 'success', 'text': ' '.join(c['text'] for c in captions), 'confidence': 1.0,
+                'captions': captions}
+
+
+def write_wav(path, seconds):
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(b'\0' * int(seconds * PCM_BYTES_PER_SECOND))
+
+
+def test_overlapping_windows_are_stitched_without_duplicates(tmp_path):
+    audio = tmp_path / 'audio.wav'
+    write_wav(audio, 25)
+    engine = SecondsEngine()
+
+    result = engine.transcribe_audio_segmented(str(audio), segment_seconds=10, overlap_seconds=2)
+
+    assert result['status'] == 'success'
+    # Windows advance by 8 s and the last one reaches the end of the file
+    assert sorted(engine.windows) == [(0.0, 10.0), (8.0, 10.0), (16.0, 9.0)]
+    texts = [caption['text'] for caption in result['captions']]
+    assert texts == [f"s{second}" for second in range(25)]
+    assert result['text'] == ' '.join(texts)
+    assert [c['start_time'] for c in result['captions']] == sorted(c['start_time'] for c in result['captions'])
+
+
+def test_without_overlap_windows_tile_the_file(tmp_path):
+    audio = tmp_path / 'audio.wav'
+    write_wav(audio, 25)
+    engine = SecondsEngine()
+
+    result = engine.transcribe_audio_segmented(str(audio), segment_seconds=10, overlap_seconds=0)
+
+    assert sorted(engine.windows) == [(0.0, 10.0), (10.0, 10.0), (20.0, 5.0)]
+    assert [caption['text'] for caption in result['captions']] == [f"s{second}" for second in range(25)]
+
+
+# ---------- transcribe_stream ----------
+
+class ScriptedEngine(STTEngine):
+    """Each window finishes when its event is set; tracks how many windows run at once"""
+
+    name = 'scripted'
+
+    def __init__(self, max_workers=3, fail_at=None):
+        super().__init__()
+        self.max_workers = max_workers
+        self.fail_at = fail_at
+        self.release = {}
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def _transcribe_pcm(self, pcm, offset, language_code, sample_rate=16000, sample_width=2):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            self.release.setdefault(offset, threading.Event()).wait(5)
+            if offset == self.fail_at:
+                raise RuntimeError(f'window {offset} failed')
+            return {'status': 'success', 'text': str(offset), 'confidence': 1.0,
+                    'captions': [{'text': str(offset), 'start_time': offset, 'end_time': offset + 1, 'confidence': 1.0}]}
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def frames(count, produced=None):
+    for index in range(count):
+        if produced is not None:
+            produced.append(index)
+        yield float(index), b'\0' * PCM_BYTES_PER_SECOND
+
+
+def release_in_reverse(engine, count):
+    # Later windows finish first
+    for offset in reversed(range(count)):
+        engine.release.setdefault(float(offset), threading.Event()).set()
+        time.sleep(0.01)
+
+
+def test_segments_are_delivered_in_order_when_windows_finish_out_of_order():
+    engine = ScriptedEngine(max_workers=4)
+    delivered = []
+    threading.Thread(target=release_in_reverse, args=(engine, 4)).start()
+
+    result = engine.transcribe_stream(frames(4), on_segment=lambda r: delivered.append(r['text']))
+
+    assert delivered == ['0.0', '1.0', '2.0', '3.0']
+    assert [c['start_time'] for c in result['captions']] == [0.0, 1.0, 2.0, 3.0]
+
+
+def test_frames_are_read_no_further_than_the_in_flight_bound():
+    engine = ScriptedEngine(max_workers=2)
+    produced = []
+    outcome = {}
+    runner = threading.Thread(target=lambda: outcome.update(engine.transcribe_stream(frames(6, produced))))
+    runner.start()
+
+    time.sleep(0.2)
+    # Two windows in flight, and the third frame read and waiting for a worker
+    assert engine.running == 2
+    assert produced == [0, 1, 2]
+
+    for offset in range(6):
+        engine.release.setdefault(float(offset), threading.Event()).set()
+    runner.join(5)
+    assert engine.peak == 2
+    assert outcome['status'] == 'success'
+
+
+def test_a_failed_window_fails_the_stream():
+    engine = ScriptedEngine(max_workers=2, fail_at=1.0)
+    delivered = []
+    for offset in range(3):
+        engine.release[float(offset)] = threading.Event()
+        engine.release[float(offset)].set()
+
+    result = engine.transcribe_stream(frames(3), on_segment=lambda r: delivered.append(r['text']))
+
+    assert result['status'] == 'error'
+    assert 'window 1.0 failed' in result['message']
+    # Windows before the failure were already delivered
+    assert delivered == ['0.0']
@@ -0,0 +1,112 @@
+import time
+import threading
+import pytest
+from shared_transcription import InFlightTranscriptions
+
+
+def start_follower(flights, key, received):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(flights.run(key, pytest.fail, received.append)))
+    thread.start()
+    return thread, result
+
+
+def wait_for_followers(flights, key, count=1):
+    while True:
+        with flights._lock:
+            if flights._flights[key].followers >= count:
+                return
+        time.sleep(0.001)
+
+
+def test_followers_share_the_leaders_segments_and_result():
+    flights = InFlightTranscriptions()
+    started, release = threading.Event(), threading.Event()
+    leader_segments, follower_segments = [], []
+
+    def transcribe(on_segment):
+        on_segment({'index': 0})
+        started.set()
+        release.wait(5)
+        on_segment({'index': 1})
+        return {'status': 'success', 'text': 'done'}
+
+    leader = threading.Thread(target=flights.run, args=('key', transcribe, leader_segments.append))
+    leader.start()
+    started.wait(5)
+    follower, result = start_follower(flights, 'key', follower_segments)
+    wait_for_followers(flights, 'key')
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    # The follower joined late but still got every segment, in order
+    assert leader_segments == follower_segments == [{'index': 0}, {'index': 1}]
+    assert result == {'status': 'success', 'text': 'done'}
+    assert flights.get_stats() == {'transcriptions': 1, 'shared': 1, 'in_flight': 0}
+
+
+def test_every_follower_gets_the_segments():
+    flights = InFlightTranscriptions()
+    started, release = threading.Event(), threading.Event()
+    received = [[] for _ in range(3)]
+
+    def transcribe(on_segment):
+        started.set()
+        release.wait(5)
+        for index in range(3):
+            on_segment({'index': index})
+        return {'status': 'success'}
+
+    leader = threading.Thread(target=flights.run, args=('key', transcribe, lambda segment: None))
+    leader.start()
+    started.wait(5)
+    followers = [start_follower(flights, 'key', segments)[0] for segments in received]
+    wait_for_followers(flights, 'key', 3)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert received == [[{'index': 0}, {'index': 1}, {'index': 2}]] * 3
+
+
+def test_leader_failure_reaches_followers_as_an_error_result():
+    flights = InFlightTranscriptions()
+    started, release = threading.Event(), threading.Event()
+    follower_segments = []
+
+    def transcribe(on_segment):
+        on_segment({'index': 0})
+        started.set()
+        release.wait(5)
+        raise RuntimeError('ffmpeg died')
+
+    errors = []
+
+    def lead():
+        try:
+            flights.run('key', transcribe, lambda segment: None)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    started.wait(5)
+    follower, result = start_follower(flights, 'key', follower_segments)
+    wait_for_followers(flights, 'key')
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert [str(e) for e in errors] == ['ffmpeg died']
+    assert follower_segments == [{'index': 0}]
+    assert result['status'] == 'error'
+    # The failed flight is gone, so the next job transcribes afresh
+    assert flights.run('key', lambda on_segment: {'status': 'success'}, None) == {'status': 'success'}
+
+
+def test_no_key_never_shares():
+    flights = InFlightTranscriptions()
+
+    assert flights.run(None, lambda on_segment: {'status': 'success'}, None) == {'status': 'success'}
+    assert flights.get_stats()['transcriptions'] == 0
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+import pytest
+
+CAPTIONS = [{'text': 'नमस्ते', 'start_time': 0.0, 'end_time': 1.0, 'confidence': 0.9}]
+
+
+@pytest.fixture
+def clients(server, monkeypatch):
+    """Two Socket.IO test clients; captions are sent straight away instead of through the pump"""
+    monkeypatch.setattr(server.job_manager, 'emit_caption',
+                        lambda caption, to, namespace='/': server.job_manager._flush_captions((to, namespace), [caption]))
+    monkeypatch.setattr(server.job_manager, 'emit',
+                        lambda event, data, to=None, namespace='/': server.job_manager._send(event, data, to, namespace))
+    first = server.socketio.test_client(server.app)
+    second = server.socketio.test_client(server.app)
+    first.get_received()
+    second.get_received()
+    yield first, second
+    first.disconnect()
+    second.disconnect()
+
+
+def events(client, name=None):
+    return [(event['name'], event['args'][0]) for event in client.get_received()
+            if name is None or event['name'] == name]
+
+
+def caption_texts(client):
+    return [caption['text'] for _, batch in events(client, 'caption_batch') for caption in batch['captions']]
+
+
+def test_session_captions_reach_only_that_sessions_clients(server, clients):
+    first, second = clients
+    assert first.emit('join_session', {'session_id': 's1', 'languages': ['hi']}, callback=True)['status'] == 'success'
+    assert second.emit('join_session', {'session_id': 's2'}, callback=True)['status'] == 'success'
+
+    server.emit_captions(CAPTIONS, 'hi', 's1')
+    server.emit_transcription_complete(1, 'hi', 's1:hi')
+
+    assert caption_texts(first) == ['नमस्ते']
+    assert events(second) == []
+
+
+def test_clients_get_only_the_languages_they_joined(server, clients):
+    first, second = clients
+    first.emit('join_session', {'session_id': 's1', 'languages': ['hi']}, callback=True)
+    second.emit('join_session', {'session_id': 's1', 'languages': ['ta']}, callback=True)
+
+    server.emit_captions(CAPTIONS, 'ta', 's1')
+
+    assert events(first) == []
+    assert caption_texts(second) == ['नमस्ते']
+
+
+def test_leaving_a_session_stops_its_events(server, clients):
+    first, _ = clients
+    first.emit('join_session', {'session_id': 's1', 'languages': ['hi']}, callback=True)
+    assert first.emit('leave_session', {'session_id': 's1'}, callback=True) == {'status': 'success'}
+
+    server.emit_captions(CAPTIONS, 'hi', 's1')
+    server.job_manager.emit('job_status', {'state': 'done'}, to='s1')
+
+    assert events(first) == []
+
+
+def test_invalid_session_ids_join_nothing(clients):
+    first, _ = clients
+
+    assert first.emit('join_session', {'session_id': '../s1'}, callback=True)['status'] == 'error'
+    assert first.emit('join_session', {'session_id': 's1', 'languages': ['xx']}, callback=True)['status'] == 'error'
+
+
+def test_youtube_requests_get_private_rooms(server, clients, monkeypatch):
+    first, second = clients
+    monkeypatch.setattr(server.stt_router, 'select', lambda: SimpleNamespace(name='fake', STT_MODEL='fake:v1'))
+    monkeypatch.setattr(server, 'result_cache', None)
+    video = {'videoId': 'https://youtu.be/dQw4w9WgXcQ', 'languages': ['hi']}
+
+    first.emit('youtube_video', video)
+    second.emit('youtube_video', video)
+    first_room = events(first, 'status')[0][1]['room']
+    second_room = events(second, 'status')[0][1]['room']
+
+    # Same video, separate rooms, so each client only gets its own job's captions
+    assert first_room.startswith('youtube-') and first_room != second_room
+    server.emit_captions(CAPTIONS, 'hi', first_room)
+    assert caption_texts(first) == ['नमस्ते']
+    assert events(second) == []
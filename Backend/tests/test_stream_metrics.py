@@ -0,0 +1,32 @@
+def stream_counts(server, source):
+    return {key: series[2] for key, series in server.FFMPEG_STREAM_SECONDS._series.items()
+            if key[0] == source}
+
+
+def test_streamed_decode_records_first_frame_and_total(server):
+    before = stream_counts(server, 'file')
+    frames = list(server.timed_stream(iter_frames(3), 'file'))
+
+    assert len(frames) == 3
+    after = stream_counts(server, 'file')
+    for stage in ('first_frame', 'total'):
+        assert after[('file', stage)] == before.get(('file', stage), 0) + 1
+
+
+def test_abandoned_stream_closes_decoder(server):
+    closed = []
+    frames = server.timed_stream(iter_frames(3, closed), 'upload')
+
+    next(frames)
+    frames.close()
+
+    assert closed == [True]
+
+
+def iter_frames(count, closed=None):
+    try:
+        for i in range(count):
+            yield i * 0.5, b'\x00\x00'
+    finally:
+        if closed is not None:
+            closed.append(True)
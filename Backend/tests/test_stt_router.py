@@ -0,0 +1,46 @@
+import time
+from stt_engine import STTEngine, STTRouter
+
+
+class FakeEngine(STTEngine):
+    def __init__(self, name, rtf, cost):
+        super().__init__()
+        self.name = name
+        self._rtf = rtf
+        self.cost_per_minute = cost
+
+    def cool_down(self, seconds=60):
+        self._unavailable_until = time.monotonic() + seconds
+
+
+def test_cheapest_engine_within_the_latency_target():
+    cheap = FakeEngine('cheap', rtf=0.4, cost=0.1)
+    pricey = FakeEngine('pricey', rtf=0.1, cost=1.0)
+    slow = FakeEngine('slow', rtf=2.0, cost=0.0)
+
+    assert STTRouter([pricey, cheap, slow], latency_target=0.5).select() is cheap
+    assert STTRouter([pricey, cheap, slow], latency_target=0.5).select(latency_target=0.2) is pricey
+
+
+def test_lowest_rtf_when_no_engine_meets_the_target():
+    slow = FakeEngine('slow', rtf=2.0, cost=0.0)
+    slower = FakeEngine('slower', rtf=3.0, cost=0.0)
+
+    assert STTRouter([slower, slow], latency_target=0.5).select() is slow
+
+
+def test_cooling_down_engines_are_skipped():
+    fast = FakeEngine('fast', rtf=0.1, cost=0.0)
+    backup = FakeEngine('backup', rtf=0.3, cost=1.0)
+    fast.cool_down()
+
+    assert not fast.is_available()
+    assert STTRouter([fast, backup], latency_target=0.5).select() is backup
+
+
+def test_none_when_no_engine_is_available():
+    engine = FakeEngine('only', rtf=0.1, cost=0.0)
+    engine.cool_down()
+
+    assert STTRouter([None, None]).select() is None
+    assert STTRouter([engine]).select() is None
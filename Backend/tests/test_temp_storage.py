@@ -0,0 +1,108 @@
+import os
+import time
+import pytest
+from upload_handler import UploadHandler, UPLOAD_DIR, TEMP_CHUNK_DIR
+from audio_processor import TEMP_DIR
+from temp_storage import TempStorageJanitor, StorageQuotaExceeded
+
+
+def write_file(directory, name, size, age=0):
+    path = os.path.normpath(os.path.join(directory, name))
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    if age:
+        modified_at = time.time() - age
+        os.utime(path, (modified_at, modified_at))
+    return path
+
+
+def janitor(active=(), **kwargs):
+    kwargs.setdefault('quota_bytes', 1000)
+    kwargs.setdefault('eviction_grace', 60)
+    kwargs.setdefault('orphan_ttl', 3600)
+    kwargs.setdefault('session_ttl', 3600)
+    return TempStorageJanitor(is_active=lambda job_id: job_id in active, **kwargs)
+
+
+def test_leaked_file_of_finished_job_is_removed():
+    owned = write_file(UPLOAD_DIR, 'owned.mp4', 10)
+    leaked = write_file(TEMP_DIR, 'leaked.wav', 10)
+    storage = janitor(active={'job1'})
+    storage.track(owned, owner='job1')
+    storage.track(leaked, owner='job2')
+
+    storage.sweep()
+
+    assert os.path.exists(owned)
+    assert not os.path.exists(leaked)
+    assert storage.stats['removed'] == 1
+
+
+def test_orphans_and_stale_sessions_expire():
+    orphan = write_file(UPLOAD_DIR, 'orphan.mp4', 10, age=7200)
+    recent = write_file(UPLOAD_DIR, 'recent.mp4', 10)
+    UploadHandler.create_session('video.mp4', 1, 10, 10, session_id='stale')
+    stale = os.path.join(TEMP_CHUNK_DIR, 'stale')
+    for path in [stale] + [os.path.join(stale, name) for name in os.listdir(stale)]:
+        os.utime(path, (time.time() - 7200,) * 2)
+
+    janitor().sweep()
+
+    assert not os.path.exists(orphan)
+    assert os.path.exists(recent)
+    assert not os.path.isdir(stale)
+    assert UploadHandler.get_session('stale') is None
+
+
+def test_eviction_removes_oldest_unowned_first():
+    oldest = write_file(UPLOAD_DIR, 'oldest.mp4', 400, age=600)
+    older = write_file(TEMP_DIR, 'older.wav', 400, age=500)
+    owned = write_file(UPLOAD_DIR, 'owned.mp4', 400, age=900)
+    young = write_file(UPLOAD_DIR, 'young.mp4', 100)
+    storage = janitor(active={'job1'})
+    storage.track(owned, owner='job1')
+
+    storage.sweep()
+
+    # 1300 bytes against a 1000 byte quota: only the oldest evictable file goes
+    assert not os.path.exists(oldest)
+    assert os.path.exists(older)
+    assert os.path.exists(owned)
+    assert os.path.exists(young)
+
+
+def test_check_quota_admits_from_cached_totals(monkeypatch):
+    write_file(UPLOAD_DIR, 'a.mp4', 300)
+    storage = janitor()
+    storage.sweep()
+
+    scans = []
+    scan = storage._scan
+    monkeypatch.setattr(storage, '_scan', lambda: scans.append(1) or scan())
+
+    storage.check_quota(300)
+    write_file(UPLOAD_DIR, 'b.mp4', 300)
+    storage.check_quota(300)
+    write_file(UPLOAD_DIR, 'c.mp4', 300)
+    assert scans == []
+
+    # The cached totals say 900 + 200 won't fit; a rescan agrees and rejects
+    with pytest.raises(StorageQuotaExceeded):
+        storage.check_quota(200)
+    assert len(scans) == 1
+    assert storage.stats['rejected'] == 1
+
+
+def test_check_quota_rescans_and_evicts_when_cache_is_full():
+    old = write_file(UPLOAD_DIR, 'old.mp4', 800, age=600)
+    storage = janitor()
+    storage.sweep()
+
+    storage.check_quota(500)
+
+    assert not os.path.exists(old)
+
+
+def test_check_quota_rejects_files_larger_than_quota():
+    with pytest.raises(StorageQuotaExceeded):
+        janitor().check_quota(1001)
@@ -0,0 +1,80 @@
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import tracing
+from tracing import Tracer
+
+
+def test_wrapped_pool_calls_record_into_the_callers_trace():
+    trace = Tracer().start('job1', 'upload')
+
+    @tracing.traced('worker.step')
+    def step():
+        return tracing.current_trace()
+
+    with tracing.activate(trace), tracing.span('job.upload'):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            seen = [pool.submit(tracing.wrap(step)).result() for _ in range(2)]
+            unwrapped = pool.submit(step).result()
+
+    assert seen == [trace, trace]
+    # Without wrap the worker thread has no current trace
+    assert unwrapped is None
+
+    events = [e for e in trace.to_chrome_trace()['traceEvents'] if e['ph'] == 'X']
+    parent = next(e for e in events if e['name'] == 'job.upload')
+    children = [e for e in events if e['name'] == 'worker.step']
+    assert len(children) == 2
+    for child in children:
+        # Drawn on the worker's own row, inside the job span
+        assert child['tid'] != parent['tid']
+        assert parent['ts'] <= child['ts'] and child['ts'] + child['dur'] <= parent['ts'] + parent['dur']
+    names = {e['args']['name'] for e in trace.to_chrome_trace()['traceEvents'] if e['ph'] == 'M'}
+    assert any(name.startswith('MainThread') for name in names)
+
+
+def test_spans_outside_a_trace_are_no_ops():
+    assert tracing.wrap(len) is len
+    with tracing.span('nothing'):
+        assert tracing.current_trace() is None
+
+
+def test_sampling_is_deterministic_by_crc32():
+    tracer = Tracer(sample_rate=0.25)
+    ids = [f"session{n}" for n in range(400)]
+
+    chosen = [trace_id for trace_id in ids if tracer.sampled(trace_id)]
+
+    assert chosen == [trace_id for trace_id in ids if zlib.crc32(trace_id.encode()) % 10000 < 2500]
+    assert 0.15 < len(chosen) / len(ids) < 0.35
+    assert all(tracer.start(trace_id, 'upload') is None for trace_id in ids if trace_id not in chosen)
+    # The upload and its job share one trace
+    assert tracer.start(chosen[0], 'upload') is tracer.start(chosen[0], 'job')
+    assert not Tracer(sample_rate=0).sampled('anything')
+
+
+def test_oldest_traces_are_dropped():
+    tracer = Tracer(max_traces=2)
+    for trace_id in ('a', 'b', 'c'):
+        tracer.start(trace_id, 'upload')
+
+    assert [summary['trace_id'] for summary in tracer.recent()] == ['c', 'b']
+    assert tracer.get('a') is None
+
+
+def test_traces_endpoints(server, client, monkeypatch):
+    tracer = Tracer()
+    monkeypatch.setattr(tracing, 'tracer', tracer)
+    trace = tracer.start('session1', 'upload')
+    with tracing.activate(trace), tracing.span('upload.finalize', chunks=3):
+        pass
+
+    listing = client.get('/traces').get_json()
+    assert listing['sample_rate'] == 1.0
+    assert [(t['trace_id'], t['kind'], t['spans']) for t in listing['traces']] == [('session1', 'upload', 1)]
+
+    chrome = client.get('/traces/session1').get_json()
+    event = next(e for e in chrome['traceEvents'] if e['ph'] == 'X')
+    assert (event['name'], event['cat'], event['args']) == ('upload.finalize', 'upload', {'chunks': 3})
+    assert chrome['otherData']['trace_id'] == 'session1'
+
+    assert client.get('/traces/unknown').status_code == 404
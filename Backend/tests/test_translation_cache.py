@@ -0,0 +1,106 @@
+import time
+import translation_cache
+from translation_cache import TranslationCache
+from stt_service import SarvamSTTService
+
+
+def make_key(text, target='hi-IN'):
+    return TranslationCache.make_key(text, 'en-IN', target, 'mayura:v1', 'formal')
+
+
+def test_hit_and_miss(tmp_path):
+    cache = TranslationCache(db_path=str(tmp_path / 't.db'))
+
+    assert cache.get(make_key('hello')) is None
+    cache.put(make_key('hello'), 'नमस्ते')
+
+    assert cache.get(make_key('hello')) == 'नमस्ते'
+    # Whitespace differences share an entry, other targets don't
+    assert cache.get(make_key('  hello ')) == 'नमस्ते'
+    assert cache.get(make_key('hello', target='ta-IN')) is None
+
+    stats = cache.get_stats()
+    assert stats['memory_hits'] == 2
+    assert stats['misses'] == 2
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / 't.db')
+    TranslationCache(db_path=path).put(make_key('hello'), 'नमस्ते')
+
+    cache = TranslationCache(db_path=path)
+    assert cache.get(make_key('hello')) == 'नमस्ते'
+    assert cache.get_stats()['disk_hits'] == 1
+
+
+def test_expired_entries_miss(tmp_path):
+    cache = TranslationCache(db_path=str(tmp_path / 't.db'), ttl=10)
+    cache.put(make_key('hello'), 'नमस्ते')
+    cache._memory[make_key('hello')] = ('नमस्ते', time.time() - 60)
+    cache._db.execute('UPDATE translations SET created_at = ?', (time.time() - 60,))
+
+    assert cache.get(make_key('hello')) is None
+
+
+def test_memory_lru_eviction(tmp_path):
+    cache = TranslationCache(db_path=str(tmp_path / 't.db'), memory_size=2)
+    for text in ('a', 'b', 'c'):
+        cache.put(make_key(text), text.upper())
+
+    assert list(cache._memory) == [make_key('b'), make_key('c')]
+    # Evicted from memory, still on disk
+    assert cache.get(make_key('a')) == 'A'
+    assert cache.get_stats()['disk_hits'] == 1
+
+
+def test_disk_eviction_drops_oldest_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(translation_cache, 'EVICTION_INTERVAL', 1)
+    cache = TranslationCache(db_path=str(tmp_path / 't.db'), max_rows=2)
+    for text in ('a', 'b', 'c'):
+        cache.put(make_key(text), text.upper())
+        time.sleep(0.01)
+
+    rows = {key for (key,) in cache._db.execute('SELECT key FROM translations')}
+    assert rows == {make_key('b'), make_key('c')}
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_packed_batch_skips_blank_lines(fake_response):
+    service = SarvamSTTService()
+    requests_sent = []
+
+    class Client:
+        def post(self, url, json=None, timeout=None):
+            requests_sent.append(json['input'])
+            if '\n' in json['input']:
+                return fake_response({'translated_text': 'एक\n  \nतीन'})
+            return fake_response({'translated_text': 'दो'})
+
+    service.client = Client()
+    result = service.translate_batch(['one', 'two', 'three'], 'hi-IN')
+
+    assert result == ['एक', 'दो', 'तीन']
+    # The dropped line was retried alone, and nothing blank was cached
+    assert requests_sent == ['one\ntwo\nthree', 'two']
+    assert service._get_cached_translation('two', 'hi-IN', 'en-IN') == 'दो'
+    assert service.translation_cache._db.execute(
+        "SELECT COUNT(*) FROM translations WHERE trim(translated_text) = ''").fetchone()[0] == 0
+
+
+def test_put_many_commits_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(translation_cache, 'EVICTION_INTERVAL', 2)
+    cache = TranslationCache(db_path=str(tmp_path / 't.db'), max_rows=2)
+    commits = []
+    db = cache._db
+    cache._db = type('Tracked', (), {
+        'executemany': lambda self, *args: db.executemany(*args),
+        'execute': lambda self, *args: db.execute(*args),
+        'commit': lambda self: commits.append(1) or db.commit(),
+    })()
+
+    cache.put_many([(make_key(text), text.upper()) for text in ('a', 'b', 'c')])
+
+    assert [cache.get(make_key(text)) for text in ('a', 'b', 'c')] == ['A', 'B', 'C']
+    # One commit for the rows; crossing EVICTION_INTERVAL ran one eviction pass
+    assert len(commits) == 2
+    assert db.execute('SELECT COUNT(*) FROM translations').fetchone()[0] == 2
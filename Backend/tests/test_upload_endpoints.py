@@ -0,0 +1,68 @@
+import io
+import pytest
+from upload_handler import UploadHandler
+
+
+@pytest.fixture
+def session(client):
+    response = client.post('/upload/init', json={
+        'filename': 'video.avi', 'total_chunks': 3, 'chunk_size': 4, 'file_size': 10, 'session_id': 's1'
+    })
+    assert response.status_code == 200
+    return 's1'
+
+
+def put_range(client, session_id, content_range, data):
+    return client.put(f'/upload/{session_id}', data=data, headers={
+        'Content-Range': content_range, 'Content-Type': 'application/octet-stream'
+    })
+
+
+def put_multipart(client, session_id, index, data):
+    return client.put(f'/upload/{session_id}/chunks/{index}', data={
+        'file': (io.BytesIO(data), 'blob')
+    }, content_type='multipart/form-data')
+
+
+def received(session_id):
+    return UploadHandler.get_session_status(session_id)['received']
+
+
+def test_init_requires_file_size(client):
+    response = client.post('/upload/init', json={'filename': 'video.avi', 'total_chunks': 3, 'chunk_size': 4})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('content_range, data', [
+    ('bytes 4-7/12', b'XXXX'),       # a different total than the session's
+    ('bytes 4-7/*', b'XXXX'),        # no total
+    ('bytes 0-7/10', b'AAAAAAAA'),   # overlaps chunk 1
+    ('bytes 0-1/10', b'AA'),         # short non-final chunk
+    ('bytes 2-5/10', b'AAAA'),       # off the chunk grid
+])
+def test_range_endpoint_rejects_bad_ranges(client, session, content_range, data):
+    put_range(client, session, 'bytes 4-7/10', b'XXXX')
+
+    response = put_range(client, session, content_range, data)
+    assert response.status_code == 416
+    assert received(session) == '010'
+
+
+def test_multipart_endpoint_rejects_overlapping_and_short_chunks(client, session):
+    assert put_multipart(client, session, 1, b'XXXX').status_code == 200
+
+    assert put_multipart(client, session, 0, b'AAAAAAAA').status_code == 400
+    assert put_multipart(client, session, 0, b'AA').status_code == 400
+    assert put_multipart(client, session, 2, b'CCCC').status_code == 400
+    assert received(session) == '010'
+
+
+def test_mixed_endpoints_complete_and_queue_processing(client, server, session):
+    assert put_range(client, session, 'bytes 8-9/10', b'CC').status_code == 200
+    assert put_multipart(client, session, 1, b'BBBB').status_code == 200
+
+    response = put_range(client, session, 'bytes 0-3/10', b'AAAA')
+    assert response.status_code == 200
+    with open(response.get_json()['file_path'], 'rb') as f:
+        assert f.read() == b'AAAABBBBCC'
+    assert [kind for kind, _, _ in server.submitted] == ['upload']
@@ -0,0 +1,130 @@
+import io
+import os
+import hashlib
+from werkzeug.datastructures import FileStorage
+from upload_handler import UploadHandler, TEMP_CHUNK_DIR, PARTIAL_FILENAME
+
+
+def new_session(session_id='s1', file_size=10, chunk_size=4):
+    total_chunks = -(-file_size // chunk_size)
+    return UploadHandler.create_session('video.mp4', total_chunks, chunk_size, file_size, session_id=session_id)
+
+
+def put(session_id, index, data):
+    return UploadHandler.put_chunk(session_id, index, io.BytesIO(data))
+
+
+def partial_bytes(session_id):
+    with open(os.path.join(TEMP_CHUNK_DIR, session_id, PARTIAL_FILENAME), 'rb') as f:
+        return f.read()
+
+
+def test_create_session_validates_grid():
+    assert UploadHandler.create_session('video.mp4', 3, 4, None)['status'] == 'error'
+    assert UploadHandler.create_session('video.mp4', 2, 4, 10)['status'] == 'error'
+    assert UploadHandler.create_session('notes.txt', 3, 4, 10)['status'] == 'error'
+
+    result = new_session()
+    assert result['status'] == 'success'
+    assert result['received'] == '000'
+    assert result['resumed'] is False
+
+
+def test_resume_reports_received_chunks():
+    new_session()
+    assert put('s1', 1, b'XXXX')['status'] == 'chunk_received'
+
+    resumed = new_session()
+    assert resumed['resumed'] is True
+    assert resumed['received'] == '010'
+    assert put('s1', 1, b'YYYY')['duplicate'] is True
+    assert partial_bytes('s1')[4:8] == b'XXXX'
+
+
+def test_long_chunk_cannot_overwrite_its_neighbour():
+    new_session()
+    put('s1', 1, b'XXXX')
+
+    result = put('s1', 0, b'AAAAAAAA')
+    assert result['status'] == 'error'
+    assert 'longer than 4 bytes' in result['message']
+    assert UploadHandler.get_session_status('s1')['received'] == '010'
+    assert partial_bytes('s1')[4:8] == b'XXXX'
+
+
+def test_chunks_must_be_exact_length():
+    new_session()
+
+    # Short non-final chunk
+    assert put('s1', 0, b'AA')['status'] == 'error'
+    # Last chunk is the 2-byte remainder, not a full chunk
+    assert put('s1', 2, b'BBBB')['status'] == 'error'
+    assert UploadHandler.get_session_status('s1')['received'] == '000'
+
+
+def test_out_of_order_upload_completes():
+    new_session()
+    assert put('s1', 2, b'CC')['status'] == 'chunk_received'
+    assert put('s1', 0, b'AAAA')['status'] == 'chunk_received'
+
+    result = put('s1', 1, b'BBBB')
+    assert result['status'] == 'success'
+    assert result['content_hash']
+    with open(result['file_path'], 'rb') as f:
+        assert f.read() == b'AAAABBBBCC'
+    assert not os.path.exists(os.path.join(TEMP_CHUNK_DIR, 's1'))
+
+
+def legacy_chunk(index, data, chunk_size=4, file_size=10):
+    return UploadHandler.handle_chunk_upload(
+        FileStorage(stream=io.BytesIO(data), filename='blob'), index, 3, 'legacy', 'video.mp4',
+        chunk_size=chunk_size, file_size=file_size
+    )
+
+
+def test_legacy_upload_takes_grid_from_first_chunk():
+    assert legacy_chunk(1, b'XXXX')['status'] == 'chunk_received'
+
+    # A different chunk_size would move chunk 0 over chunk 1
+    assert legacy_chunk(0, b'AAAAAAAA', chunk_size=8)['status'] == 'error'
+    assert legacy_chunk(0, b'AAAAAAAA')['status'] == 'error'
+    assert partial_bytes('legacy')[4:8] == b'XXXX'
+
+    assert legacy_chunk(0, b'AAAA')['status'] == 'chunk_received'
+    result = legacy_chunk(2, b'CC')
+    assert result['status'] == 'success'
+    with open(result['file_path'], 'rb') as f:
+        assert f.read() == b'AAAAXXXXCC'
+
+
+def test_legacy_upload_without_file_size_merges_chunk_files():
+    for index, data in enumerate([b'AAAA', b'BBBB']):
+        result = UploadHandler.handle_chunk_upload(
+            FileStorage(stream=io.BytesIO(data), filename='blob'), index, 2, 'merge', 'video.mp4',
+            chunk_size=4
+        )
+    assert result['status'] == 'success'
+    with open(result['file_path'], 'rb') as f:
+        assert f.read() == b'AAAABBBB'
+
+
+def test_content_hash_depends_only_on_the_bytes():
+    new_session('a', chunk_size=4)
+    for index, data in ((1, b'BBBB'), (0, b'AAAA'), (2, b'CC')):
+        first = put('a', index, data)
+    new_session('b', chunk_size=8)
+    put('b', 1, b'CC')
+    second = put('b', 0, b'AAAABBBB')
+
+    assert first['content_hash'] == second['content_hash'] == hashlib.sha256(b'AAAABBBBCC').hexdigest()
+
+
+def test_chunk_file_uploads_are_hashed_too():
+    for index, data in ((0, b'AAAA'), (1, b'BBBB')):
+        UploadHandler.handle_chunk_upload(FileStorage(stream=io.BytesIO(data), filename='blob'), index, 3,
+                                          'files', 'video.mp4')
+    result = UploadHandler.handle_chunk_upload(FileStorage(stream=io.BytesIO(b'CC'), filename='blob'), 2, 3,
+                                               'files', 'video.mp4')
+
+    assert result['status'] == 'success'
+    assert result['content_hash'] == hashlib.sha256(b'AAAABBBBCC').hexdigest()
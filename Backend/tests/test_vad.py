@@ -0,0 +1,56 @@
+import numpy as np
+from vad import VoiceActivityFilter, SAMPLE_RATE
+
+
+def tone(seconds, amplitude=8000):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / float(SAMPLE_RATE)
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.int16)
+
+
+def windows(samples, seconds=1.0):
+    size = int(seconds * SAMPLE_RATE)
+    for start in range(0, len(samples), size):
+        yield start / float(SAMPLE_RATE), samples[start:start + size].tobytes()
+
+
+def speech_filter():
+    # 25 ms frames tile one-second windows exactly
+    return VoiceActivityFilter(frame_ms=25, padding_seconds=0, min_silence_seconds=0.5)
+
+
+def test_filter_keeps_only_speech():
+    vad = speech_filter()
+    audio = np.concatenate([silence(1), tone(1), silence(2), tone(1)])
+
+    kept = list(vad.filter(windows(audio)))
+
+    assert [offset for offset, _ in kept] == [0.0, 1.0]
+    assert sum(len(pcm) for _, pcm in kept) == 2 * SAMPLE_RATE * 2
+    assert vad.finished
+    assert (vad.audio_seconds, vad.speech_seconds) == (5.0, 2.0)
+
+
+def test_captions_map_back_to_source_time():
+    vad = speech_filter()
+    audio = np.concatenate([silence(1), tone(1), silence(2), tone(1)])
+    list(vad.filter(windows(audio)))
+
+    captions = vad.remap_captions([
+        {'text': 'first', 'start_time': 0.2, 'end_time': 1.0},
+        {'text': 'second', 'start_time': 1.0, 'end_time': 1.8},
+    ])
+
+    # An end on the span boundary stays with the first span; the next start moves past the gap
+    assert [(round(c['start_time'], 3), round(c['end_time'], 3)) for c in captions] == [(1.2, 2.0), (4.0, 4.8)]
+
+
+def test_times_before_any_speech_are_unchanged():
+    vad = speech_filter()
+    list(vad.filter(windows(silence(2))))
+
+    assert vad.to_original(0.5) == 0.5
+    assert vad.speech_seconds == 0
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+import pytest
+import whisper_engine
+from whisper_engine import WhisperSTTEngine
+from stt_engine import PCM_BYTES_PER_SECOND
+
+
+class FakeModel:
+    """faster-whisper stand-in returning fixed segments, relative to the audio it is given"""
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.calls = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append((audio, kwargs))
+        return iter(self.segments), None
+
+
+def segment(start, end, text, words=None):
+    words = [SimpleNamespace(start=s, end=e, word=w, probability=0.9) for s, e, w in words or []]
+    return SimpleNamespace(start=start, end=end, text=text, avg_logprob=-0.1, words=words)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(whisper_engine, '_models', {})
+    return WhisperSTTEngine(model_name='fake', compute_type='int8', batch_size=2)
+
+
+def install(model):
+    whisper_engine._models[('fake', 'int8')] = ('faster-whisper-batched', model)
+
+
+def test_word_timestamps_go_through_the_caption_segmenter(engine, tmp_path):
+    model = FakeModel([segment(0.0, 3.0, 'Hello there. How are you', words=[
+        (0.0, 0.3, ' Hello'), (0.3, 0.6, ' there.'), (0.6, 0.9, ' How'), (2.5, 2.7, ' are'), (2.7, 3.0, ' you'),
+    ])])
+    install(model)
+    audio = tmp_path / 'audio.wav'
+    audio.write_bytes(b'')
+
+    result = engine.transcribe_audio(str(audio), 'hi-IN')
+
+    assert result['status'] == 'success'
+    # Split at the sentence end and the pause, not one caption per Whisper segment
+    assert [cap['text'] for cap in result['captions']] == ['Hello there.', 'How', 'are you']
+    assert model.calls[0][1]['word_timestamps'] is True
+    assert model.calls[0][1]['language'] == 'hi'
+
+
+def test_segments_without_words_are_spread_by_length():
+    words = WhisperSTTEngine._spread_words(1.0, 3.0, 'ab abcd ab', 0.5)
+
+    assert [(round(start, 3), round(end, 3), word) for start, end, word, _ in words] == [
+        (1.0, 1.5, 'ab'), (1.5, 2.5, 'abcd'), (2.5, 3.0, 'ab')
+    ]
+
+
+def test_batched_captions_return_to_the_window_they_start_in(engine):
+    second = PCM_BYTES_PER_SECOND
+    model = FakeModel([
+        segment(0.5, 1.5, 'first'),
+        segment(3.0, 4.0, 'ignored', words=[(3.0, 3.5, ' second')]),
+    ])
+    install(model)
+    windows = [(10.0, b'\0' * 2 * second), (12.0, b'\0' * 2 * second)]
+
+    results = engine._transcribe_batch(windows, 'en-IN')
+
+    # One inference call for both contiguous windows
+    assert len(model.calls) == 1
+    assert [[(cap['text'], cap['start_time']) for cap in r['captions']] for r in results] == [
+        [('first', 10.5)], [('second', 13.0)]
+    ]
+
+
+def test_int8_quantization_converts_whisper_linear_layers():
+    torch = pytest.importorskip('torch')
+    whisper_model = pytest.importorskip('whisper.model')
+    model = torch.nn.Sequential(whisper_model.Linear(4, 4), torch.nn.ReLU(), whisper_model.Linear(4, 2))
+
+    model, quantized = whisper_engine.quantize_int8(model)
+
+    assert quantized == 2
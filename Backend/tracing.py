@@ -0,0 +1,207 @@
+import os
+import time
+import zlib
+import logging
+import threading
+import functools
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    from greenlet import getcurrent as _current_greenlet
+except ImportError:
+    _current_greenlet = None
+
+logger = logging.getLogger(__name__)
+
+# Tracing configuration
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 1.0))  # fraction of jobs traced, 0 disables
+TRACE_MAX_TRACES = int(os.getenv('TRACE_MAX_TRACES', 200))  # most recent timelines kept
+TRACE_MAX_SPANS = int(os.getenv('TRACE_MAX_SPANS', 20000))  # per timeline; later spans are dropped
+
+_current = contextvars.ContextVar('trace', default=None)
+
+
+def _task_id():
+    # Greenlets share an OS thread under eventlet, so key rows by greenlet when possible
+    return id(_current_greenlet()) if _current_greenlet else threading.get_ident()
+
+
+class Trace:
+    """Timeline of spans for one job (or one upload plus its processing job)"""
+
+    def __init__(self, trace_id, kind):
+        self.trace_id = trace_id
+        self.kind = kind
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self._spans = []
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def add_span(self, name, start, end, args=None):
+        """Record a finished span with perf_counter start/end times"""
+        task = _task_id()
+        with self._lock:
+            if len(self._spans) >= TRACE_MAX_SPANS:
+                self.dropped += 1
+                return
+            tid = self._tasks.setdefault(task, (len(self._tasks) + 1, threading.current_thread().name))[0]
+            self._spans.append((name, start - self._origin, end - start, tid, args))
+
+    def add_span_at(self, name, started_at, ended_at, args=None):
+        """Record a span from wall-clock (time.time) start/end times"""
+        offset = time.perf_counter() - time.time()
+        self.add_span(name, started_at + offset, ended_at + offset, args)
+
+    def duration(self):
+        with self._lock:
+            return max((start + dur for _, start, dur, _, _ in self._spans), default=0.0)
+
+    def summary(self):
+        with self._lock:
+            spans = len(self._spans)
+        return {
+            'trace_id': self.trace_id,
+            'kind': self.kind,
+            'started_at': self.started_at,
+            'duration_seconds': round(self.duration(), 4),
+            'spans': spans,
+            'dropped_spans': self.dropped
+        }
+
+    def to_chrome_trace(self):
+        """Chrome trace-event JSON (chrome://tracing, Perfetto, speedscope)"""
+        with self._lock:
+            spans = list(self._spans)
+            tasks = list(self._tasks.values())
+
+        events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': f"{name} #{tid}"}}
+            for tid, name in tasks
+        ]
+        events.extend(
+            {
+                'name': name,
+                'cat': name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': round(start * 1e6, 1),
+                'dur': round(dur * 1e6, 1),
+                'pid': 1,
+                'tid': tid,
+                'args': args or {}
+            }
+            for name, start, dur, tid, args in spans
+        )
+
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': self.summary()
+        }
+
+
+class Tracer:
+    """Keeps the most recent sampled traces"""
+
+    def __init__(self, sample_rate=TRACE_SAMPLE_RATE, max_traces=TRACE_MAX_TRACES):
+        self.sample_rate = sample_rate
+        self.max_traces = max_traces
+        self._traces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sampled(self, trace_id):
+        """Deterministic per ID, so every request of an upload session agrees"""
+        if self.sample_rate >= 1:
+            return True
+        return (zlib.crc32(str(trace_id).encode('utf-8')) % 10000) < self.sample_rate * 10000
+
+    def start(self, trace_id, kind):
+        """
+        Return the trace for trace_id, creating it if sampled
+
+        Returns:
+            Trace, or None if the ID isn't sampled
+        """
+        if not trace_id or not self.sampled(trace_id):
+            return None
+
+        with self._lock:
+            trace = self._traces.get(trace_id)
+            if trace is None:
+                trace = self._traces[trace_id] = Trace(trace_id, kind)
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            else:
+                self._traces.move_to_end(trace_id)
+            return trace
+
+    def get(self, trace_id):
+        with self._lock:
+            return self._traces.get(trace_id)
+
+    def recent(self, limit=50):
+        """Summaries of the newest traces, newest first"""
+        with self._lock:
+            traces = list(self._traces.values())[-limit:]
+        return [trace.summary() for trace in reversed(traces)]
+
+
+tracer = Tracer()
+
+
+def current_trace():
+    return _current.get()
+
+
+@contextmanager
+def activate(trace):
+    """Make trace the current trace for the with block (no-op for None)"""
+    if trace is None:
+        yield
+        return
+    token = _current.set(trace)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name, **args):
+    """Time the with block as a span of the current trace, if any"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(name, started, time.perf_counter(), args or None)
+
+
+def traced(name):
+    """Decorator form of span()"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def wrap(fn):
+    """Carry the current trace into fn when it runs on another thread (e.g. a pool worker)"""
+    trace = _current.get()
+    if trace is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with activate(trace):
+            return fn(*args, **kwargs)
+    return wrapper
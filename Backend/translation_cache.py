@@ -0,0 +1,192 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Translation cache configuration
+CACHE_DIR = "./cache"
+TRANSLATION_CACHE_PATH = os.getenv('TRANSLATION_CACHE_PATH', os.path.join(CACHE_DIR, 'translations.db'))
+TRANSLATION_CACHE_MEMORY_SIZE = int(os.getenv('TRANSLATION_CACHE_MEMORY_SIZE', 10000))
+TRANSLATION_CACHE_MAX_ROWS = int(os.getenv('TRANSLATION_CACHE_MAX_ROWS', 500000))
+TRANSLATION_CACHE_TTL = int(os.getenv('TRANSLATION_CACHE_TTL', 30 * 24 * 3600))  # 30 days
+
+# How many writes between disk eviction passes
+EVICTION_INTERVAL = 1000
+
+
+class TranslationCache:
+    """Two-tier translation cache: in-process LRU backed by a SQLite store"""
+
+    def __init__(self, db_path=TRANSLATION_CACHE_PATH, memory_size=TRANSLATION_CACHE_MEMORY_SIZE,
+                 max_rows=TRANSLATION_CACHE_MAX_ROWS, ttl=TRANSLATION_CACHE_TTL):
+        self.db_path = db_path
+        self.memory_size = memory_size
+        self.max_rows = max_rows
+        self.ttl = ttl
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0
+        }
+
+        Path(os.path.dirname(db_path) or '.').mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS translations ('
+            'key TEXT PRIMARY KEY, '
+            'translated_text TEXT NOT NULL, '
+            'created_at REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS idx_created_at ON translations (created_at)')
+        self._db.commit()
+
+        logger.info(f"Translation cache initialized: {db_path}")
+
+    @staticmethod
+    def normalize(text):
+        """Collapse whitespace so trivially different captions share an entry"""
+        return ' '.join((text or '').split())
+
+    @staticmethod
+    def make_key(text, source_language, target_language, model, mode):
+        """Build the cache key for a translation request"""
+        raw = '\x1f'.join([TranslationCache.normalize(text), source_language, target_language, model, mode])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached translation
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Translated text or None on a miss
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                translated_text, created_at = entry
+                if now - created_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return translated_text
+                del self._memory[key]
+
+            try:
+                row = self._db.execute(
+                    'SELECT translated_text, created_at FROM translations WHERE key = ?', (key,)
+                ).fetchone()
+            except Exception as e:
+                logger.error(f"Error reading translation cache: {str(e)}")
+                row = None
+
+            if row is not None and now - row[1] < self.ttl:
+                self._remember(key, row[0], row[1])
+                self.stats['disk_hits'] += 1
+                return row[0]
+
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, key, translated_text):
+        """
+        Store a translation in both tiers
+
+        Args:
+            key: Key from make_key
+            translated_text: Translated text to store
+        """
+        self.put_many([(key, translated_text)])
+
+    def put_many(self, items):
+        """
+        Store several translations in both tiers with a single disk commit
+
+        Args:
+            items: Iterable of (key from make_key, translated text)
+        """
+        now = time.time()
+        rows = [(key, translated_text, now) for key, translated_text in items]
+        if not rows:
+            return
+
+        with self._lock:
+            for key, translated_text, _ in rows:
+                self._remember(key, translated_text, now)
+
+            try:
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO translations (key, translated_text, created_at) VALUES (?, ?, ?)',
+                    rows
+                )
+                self._db.commit()
+
+                previous = self._writes
+                self._writes += len(rows)
+                if self._writes // EVICTION_INTERVAL != previous // EVICTION_INTERVAL:
+                    self._evict_disk(now)
+            except Exception as e:
+                logger.error(f"Error writing translation cache: {str(e)}")
+
+    def _remember(self, key, translated_text, created_at):
+        """Insert into the in-memory LRU, evicting the least recently used entry"""
+        self._memory[key] = (translated_text, created_at)
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now):
+        """Drop expired rows, then the oldest rows beyond max_rows"""
+        expired = self._db.execute(
+            'DELETE FROM translations WHERE created_at < ?', (now - self.ttl,)
+        ).rowcount
+
+        overflow = self._db.execute('SELECT COUNT(*) FROM translations').fetchone()[0] - self.max_rows
+        if overflow > 0:
+            self._db.execute(
+                'DELETE FROM translations WHERE key IN '
+                '(SELECT key FROM translations ORDER BY created_at LIMIT ?)', (overflow,)
+            )
+        else:
+            overflow = 0
+
+        self._db.commit()
+        self.stats['evictions'] += expired + overflow
+
+        if expired or overflow:
+            logger.info(f"Translation cache evicted {expired} expired and {overflow} oldest entries")
+
+    def get_stats(self):
+        """Get cache hit/miss counters and sizes"""
+        with self._lock:
+            try:
+                disk_entries = self._db.execute('SELECT COUNT(*) FROM translations').fetchone()[0]
+            except Exception:
+                disk_entries = None
+
+            hits = self.stats['memory_hits'] + self.stats['disk_hits']
+            lookups = hits + self.stats['misses']
+
+            return dict(
+                self.stats,
+                memory_entries=len(self._memory),
+                disk_entries=disk_entries,
+                hit_rate=round(hits / lookups, 4) if lookups else 0.0
+            )
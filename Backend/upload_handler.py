@@ -1,7 +1,14 @@
 import os
+import re
+import time
+import shutil
+import hashlib
 import logging
+import threading
 from pathlib import Path
 from werkzeug.utils import secure_filename
+from metrics import UPLOAD_CHUNK_SECONDS, UPLOAD_BYTES, UPLOAD_FINALIZE_SECONDS
+import tracing
 import uuid
 import json
 
@@ -12,11 +19,56 @@ UPLOAD_DIR = "./uploads"
 TEMP_CHUNK_DIR = "./temp_chunks"
 ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'mov', 'avi', 'mkv', 'flv', 'wmv', 'webm', 'm4v', 'mpg', 'mpeg', '3gp'}
 MAX_FILE_SIZE = 5 * 1024 * 1024 * 1024  # 5GB
+COPY_BUFFER_SIZE = 1024 * 1024  # 1MB
+PARTIAL_FILENAME = "upload.part"
+SESSION_FILENAME = "session.json"
+COMPLETION_MARKER = "completing"
+PROGRESSIVE_MARKER = "progressive"
+PROGRESSIVE_POLL_INTERVAL = 0.5  # seconds between checks of a progressive reader's stop event
+PROGRESSIVE_STALL_TIMEOUT = int(os.getenv('PROGRESSIVE_STALL_TIMEOUT', 600))  # seconds
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
 
 # Create directories if they don't exist
 Path(UPLOAD_DIR).mkdir(exist_ok=True)
 Path(TEMP_CHUNK_DIR).mkdir(exist_ok=True)
 
+
+class ChunkLengthError(Exception):
+    """Raised when a chunk body is longer than its slot in the chunk grid"""
+
+
+class SessionProgress:
+    """Chunk arrivals of one session, for a progressive reader in this process
+    
+    Chunk writes, finalization and cleanup notify the reader directly, so it
+    waits on a condition instead of polling the session directory.
+    """
+    
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.received = set()
+        self.contiguous = 0
+        # None while uploading, then 'complete' or 'removed'
+        self.state = None
+    
+    def add(self, chunk_indices):
+        with self.cond:
+            self.received.update(chunk_indices)
+            while self.contiguous in self.received:
+                self.contiguous += 1
+            self.cond.notify_all()
+    
+    def end(self, state):
+        with self.cond:
+            self.state = self.state or state
+            self.cond.notify_all()
+
+
+# Session ID -> SessionProgress of its progressive reader
+_progress = {}
+_progress_lock = threading.Lock()
+
+
 class UploadHandler:
     """Handles video file uploads with chunking support"""
     
@@ -39,16 +91,24 @@ class UploadHandler:
         return is_valid
     
     @staticmethod
-    def handle_chunk_upload(file, chunk_index, total_chunks, session_id, filename=None):
+    @tracing.traced('upload.chunk')
+    def handle_chunk_upload(file, chunk_index, total_chunks, session_id, filename=None,
+                            chunk_size=None, file_size=None):
         """
         Handle a single chunk upload
         
+        When the client sends its nominal chunk_size, the chunk is written
+        straight into a preallocated partial file at chunk_index * chunk_size,
+        so finishing the upload is a rename instead of a copy.
+        
         Args:
             file: File object from request
             chunk_index: Current chunk number (0-indexed)
             total_chunks: Total number of chunks
             session_id: Unique session identifier for this upload
             filename: Original filename (from form data)
+            chunk_size: Bytes per chunk (all chunks except the last), optional
+            file_size: Total file size in bytes, used to preallocate, optional
             
         Returns:
             Dictionary with upload status
@@ -62,6 +122,18 @@ class UploadHandler:
                     'message': 'No file provided'
                 }
             
+            if not UploadHandler.is_valid_session_id(session_id):
+                return {
+                    'status': 'error',
+                    'message': 'Invalid session_id'
+                }
+            
+            if not 0 <= chunk_index < total_chunks:
+                return {
+                    'status': 'error',
+                    'message': f'chunk_index must be between 0 and {total_chunks - 1}'
+                }
+            
             # Use provided filename if available, otherwise use file.filename
             actual_filename = filename if filename else file.filename
             logger.info(f"Actual filename to validate: {actual_filename}")
@@ -77,52 +149,659 @@ class UploadHandler:
             session_dir = os.path.join(TEMP_CHUNK_DIR, session_id)
             Path(session_dir).mkdir(exist_ok=True)
             
-            # Save chunk
-            chunk_filename = f"chunk_{chunk_index:06d}"
-            chunk_path = os.path.join(session_dir, chunk_filename)
-            
-            # Write chunk to file
-            file.save(chunk_path)
-            chunk_size = os.path.getsize(chunk_path)
-            
-            logger.info(f"Chunk {chunk_index + 1}/{total_chunks} uploaded ({chunk_size} bytes) - Session: {session_id}")
-            
-            # Check if all chunks are uploaded
-            if chunk_index + 1 == total_chunks:
-                # All chunks uploaded, merge them
-                final_file = UploadHandler.merge_chunks(
-                    session_id, 
-                    total_chunks, 
-                    actual_filename
+            started = time.perf_counter()
+            if chunk_size and file_size:
+                # The first chunk fixes the grid; later chunks must agree with it
+                metadata = UploadHandler._legacy_session(
+                    session_id, actual_filename, total_chunks, chunk_size, file_size
                 )
+                if metadata.get('status') == 'error':
+                    return metadata
+                chunk_size = metadata['chunk_size']
+                expected = UploadHandler.expected_chunk_length(metadata, chunk_index)
                 
-                if final_file:
-                    return {
-                        'status': 'success',
-                        'message': 'File upload complete',
-                        'file_path': final_file,
-                        'chunks_processed': total_chunks
-                    }
-                else:
-                    return {
-                        'status': 'error',
-                        'message': 'Failed to merge chunks'
-                    }
+                # Write chunk in place at its byte offset
+                bytes_written = UploadHandler.write_chunk_at_offset(
+                    file.stream,
+                    session_id,
+                    chunk_index * chunk_size,
+                    metadata['file_size'],
+                    length=expected
+                )
+                if bytes_written != expected:
+                    return UploadHandler._incomplete_chunk(session_id, chunk_index, bytes_written, expected)
             else:
+                # Without a known file size the grid can't be checked, so keep chunks in separate files
+                chunk_size = None
+                # Save chunk
+                chunk_filename = f"chunk_{chunk_index:06d}"
+                chunk_path = os.path.join(session_dir, chunk_filename)
+                
+                # Write chunk to file
+                file.save(chunk_path)
+                bytes_written = os.path.getsize(chunk_path)
+            
+            logger.info(f"Chunk {chunk_index + 1}/{total_chunks} uploaded ({bytes_written} bytes) - Session: {session_id}")
+            
+            # Complete once every chunk has arrived, in whatever order
+            UploadHandler.mark_chunk_received(session_id, chunk_index)
+            UPLOAD_CHUNK_SECONDS.observe(time.perf_counter() - started,
+                                         mode='in_place' if chunk_size else 'chunk_file')
+            UPLOAD_BYTES.inc(bytes_written)
+            return UploadHandler._complete_if_ready(
+                session_id,
+                chunk_index,
+                total_chunks,
+                actual_filename,
+                chunk_size=chunk_size
+            )
+        
+        except ChunkLengthError as e:
+            logger.error(f"Rejected chunk {chunk_index} - Session: {session_id}: {str(e)}")
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
+        
+        except Exception as e:
+            logger.error(f"Error handling chunk upload: {str(e)}", exc_info=True)
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
+    
+    @staticmethod
+    def is_valid_session_id(session_id):
+        """Session IDs become directory names, so only allow a safe charset"""
+        return bool(session_id) and bool(SESSION_ID_PATTERN.match(session_id))
+    
+    @staticmethod
+    def expected_chunk_length(metadata, chunk_index):
+        """Exact byte length of a chunk: chunk_size, or the remainder for the last chunk"""
+        chunk_size = metadata['chunk_size']
+        return min(chunk_size, metadata['file_size'] - chunk_index * chunk_size)
+    
+    @staticmethod
+    def _incomplete_chunk(session_id, chunk_index, bytes_written, expected):
+        # A dropped connection leaves a short chunk; don't mark it received
+        logger.error(f"Chunk {chunk_index} incomplete: {bytes_written}/{expected} bytes - Session: {session_id}")
+        return {
+            'status': 'error',
+            'message': f'Chunk {chunk_index} incomplete: got {bytes_written} of {expected} bytes'
+        }
+    
+    @staticmethod
+    def _legacy_session(session_id, filename, total_chunks, chunk_size, file_size):
+        """Metadata of an in-place /upload session, registering it on its first chunk
+        
+        Returns:
+            Session metadata, or an error dict if the request disagrees with it
+        """
+        metadata = UploadHandler.get_session(session_id)
+        if not metadata:
+            result = UploadHandler.create_session(
+                filename, total_chunks, chunk_size, file_size=file_size, session_id=session_id
+            )
+            if result['status'] == 'error':
+                return result
+            metadata = UploadHandler.get_session(session_id)
+        
+        if (metadata['total_chunks'], metadata['chunk_size'], metadata['file_size']) != \
+                (total_chunks, chunk_size, file_size):
+            return {
+                'status': 'error',
+                'message': 'total_chunks, chunk_size and file_size must match the first chunk of the session'
+            }
+        return metadata
+    
+    @staticmethod
+    def create_session(filename, total_chunks, chunk_size, file_size, languages=None, session_id=None):
+        """
+        Register a resumable upload session
+        
+        Args:
+            filename: Original filename
+            total_chunks: Total number of chunks
+            chunk_size: Bytes per chunk (all chunks except the last)
+            file_size: Total file size in bytes; fixes the chunk grid for the whole session
+            languages: Caption languages for processing after upload (default Hindi)
+            session_id: Client-chosen session ID to resume, optional
+            
+        Returns:
+            Dictionary with upload status and session_id
+        """
+        try:
+            if not UploadHandler.validate_file_extension(filename):
+                return {
+                    'status': 'error',
+                    'message': f'File type not allowed. Only video files are accepted. Got: {filename}'
+                }
+            
+            if total_chunks <= 0 or chunk_size <= 0:
+                return {
+                    'status': 'error',
+                    'message': 'total_chunks and chunk_size must be positive'
+                }
+            
+            if not file_size or file_size <= 0:
+                return {
+                    'status': 'error',
+                    'message': 'file_size is required and must be positive'
+                }
+            if file_size > MAX_FILE_SIZE:
+                return {
+                    'status': 'error',
+                    'message': 'File too large. Maximum file size is 5GB.'
+                }
+            if total_chunks != -(-file_size // chunk_size):
+                return {
+                    'status': 'error',
+                    'message': 'total_chunks does not match file_size and chunk_size'
+                }
+            
+            languages = list(languages or ['hi'])
+            session_id = session_id or uuid.uuid4().hex
+            if not UploadHandler.is_valid_session_id(session_id):
+                return {
+                    'status': 'error',
+                    'message': 'Invalid session_id'
+                }
+            
+            # Resuming an existing session keeps its original parameters
+            existing = UploadHandler.get_session(session_id)
+            if existing:
+                return dict(UploadHandler.get_session_status(session_id), resumed=True)
+            
+            session_dir = os.path.join(TEMP_CHUNK_DIR, session_id)
+            Path(session_dir).mkdir(exist_ok=True)
+            
+            metadata = {
+                'session_id': session_id,
+                'filename': filename,
+                'total_chunks': total_chunks,
+                'chunk_size': chunk_size,
+                'file_size': file_size,
+                'language': languages[0],
+                'languages': languages,
+                'created_at': time.time()
+            }
+            
+            # Write then rename so readers never see a half-written file
+            tmp_path = os.path.join(session_dir, f"{SESSION_FILENAME}.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(metadata, f)
+            os.replace(tmp_path, os.path.join(session_dir, SESSION_FILENAME))
+            
+            logger.info(f"Upload session created: {session_id} ({total_chunks} chunks of {chunk_size} bytes)")
+            
+            return dict(UploadHandler.get_session_status(session_id), resumed=False)
+        
+        except Exception as e:
+            logger.error(f"Error creating upload session: {str(e)}", exc_info=True)
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
+    
+    @staticmethod
+    def get_session(session_id):
+        """Load a session's metadata, or None if it doesn't exist"""
+        if not UploadHandler.is_valid_session_id(session_id):
+            return None
+        
+        session_path = os.path.join(TEMP_CHUNK_DIR, session_id, SESSION_FILENAME)
+        try:
+            with open(session_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    @staticmethod
+    def get_session_status(session_id):
+        """
+        Report which chunks of a session have been received
+        
+        Returns:
+            Dictionary with a '0'/'1' bitmap string of received chunks
+        """
+        metadata = UploadHandler.get_session(session_id)
+        if not metadata:
+            return {
+                'status': 'error',
+                'message': 'Upload session not found'
+            }
+        
+        total_chunks = metadata['total_chunks']
+        received = UploadHandler.get_received_chunks(session_id)
+        bitmap = ''.join('1' if i in received else '0' for i in range(total_chunks))
+        
+        return {
+            'status': 'success',
+            'session_id': session_id,
+            'total_chunks': total_chunks,
+            'chunk_size': metadata['chunk_size'],
+            'received_chunks': len(received),
+            'received': bitmap,
+            'complete': len(received) == total_chunks
+        }
+    
+    @staticmethod
+    @tracing.traced('upload.chunk')
+    def put_chunk(session_id, chunk_index, stream):
+        """
+        Idempotently store one chunk of a registered session
+        
+        Args:
+            session_id: Session identifier from create_session
+            chunk_index: Chunk number (0-indexed)
+            stream: Readable binary stream with the chunk data
+            
+        Returns:
+            Dictionary with upload status ('success' once the file is complete)
+        """
+        try:
+            metadata = UploadHandler.get_session(session_id)
+            if not metadata:
+                return {
+                    'status': 'error',
+                    'message': 'Upload session not found'
+                }
+            
+            total_chunks = metadata['total_chunks']
+            if not 0 <= chunk_index < total_chunks:
+                return {
+                    'status': 'error',
+                    'message': f'chunk_index must be between 0 and {total_chunks - 1}'
+                }
+            
+            if chunk_index in UploadHandler.get_received_chunks(session_id):
+                logger.info(f"Chunk {chunk_index} already received - Session: {session_id}")
                 return {
                     'status': 'chunk_received',
-                    'message': f'Chunk {chunk_index + 1}/{total_chunks} received',
-                    'chunk_index': chunk_index
+                    'message': f'Chunk {chunk_index + 1}/{total_chunks} already received',
+                    'chunk_index': chunk_index,
+                    'duplicate': True
+                }
+            
+            if not metadata.get('file_size'):
+                return {
+                    'status': 'error',
+                    'message': 'Upload session has no file_size, start a new session'
                 }
+            
+            started = time.perf_counter()
+            expected = UploadHandler.expected_chunk_length(metadata, chunk_index)
+            bytes_written = UploadHandler.write_chunk_at_offset(
+                stream,
+                session_id,
+                chunk_index * metadata['chunk_size'],
+                metadata['file_size'],
+                length=expected
+            )
+            if bytes_written != expected:
+                return UploadHandler._incomplete_chunk(session_id, chunk_index, bytes_written, expected)
+            
+            logger.info(f"Chunk {chunk_index + 1}/{total_chunks} stored ({bytes_written} bytes) - Session: {session_id}")
+            
+            UploadHandler.mark_chunk_received(session_id, chunk_index)
+            UPLOAD_CHUNK_SECONDS.observe(time.perf_counter() - started, mode='in_place')
+            UPLOAD_BYTES.inc(bytes_written)
+            return UploadHandler._complete_if_ready(
+                session_id,
+                chunk_index,
+                total_chunks,
+                metadata['filename'],
+                chunk_size=metadata['chunk_size']
+            )
+        
+        except ChunkLengthError as e:
+            logger.error(f"Rejected chunk {chunk_index} - Session: {session_id}: {str(e)}")
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
         
         except Exception as e:
-            logger.error(f"Error handling chunk upload: {str(e)}", exc_info=True)
+            logger.error(f"Error storing chunk: {str(e)}", exc_info=True)
             return {
                 'status': 'error',
                 'message': str(e)
             }
     
     @staticmethod
+    def mark_chunk_received(session_id, chunk_index):
+        """Record a fully written chunk with a marker file"""
+        marker_path = os.path.join(TEMP_CHUNK_DIR, session_id, f"received_{chunk_index:06d}")
+        
+        # Write then rename, as concurrent retries of a chunk may both get here
+        tmp_path = f"{marker_path}.tmp{uuid.uuid4().hex[:8]}"
+        open(tmp_path, 'w').close()
+        os.replace(tmp_path, marker_path)
+        
+        progress = _progress.get(session_id)
+        if progress:
+            progress.add([chunk_index])
+    
+    @staticmethod
+    def get_received_chunks(session_id):
+        """Return the set of chunk indices received for a session"""
+        session_dir = os.path.join(TEMP_CHUNK_DIR, session_id)
+        try:
+            names = os.listdir(session_dir)
+        except OSError:
+            return set()
+        return {int(name[9:]) for name in names if name.startswith('received_') and '.tmp' not in name}
+    
+    @staticmethod
+    def get_content_hash(file_path):
+        """
+        Content hash of an uploaded file: SHA-256 of its bytes, read in order
+        
+        It depends on the content alone, so the same video uploaded with
+        another chunk size, or through chunk files, gets the same hash.
+        
+        Returns:
+            Hex digest, or None if the file can't be read
+        """
+        content_hash = hashlib.sha256()
+        try:
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+                    content_hash.update(block)
+        except OSError as e:
+            logger.error(f"Error hashing {file_path}: {str(e)}")
+            return None
+        return content_hash.hexdigest()
+    
+    @staticmethod
+    def claim_progressive_ingest(session_id):
+        """Mark a session as being decoded progressively; True only for the first caller"""
+        marker_path = os.path.join(TEMP_CHUNK_DIR, session_id, PROGRESSIVE_MARKER)
+        try:
+            os.close(os.open(marker_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except OSError:
+            return False
+    
+    @staticmethod
+    def read_session_header(session_id, size=65536):
+        """Read the leading bytes of a session's partial file (chunk 0 must be in)"""
+        metadata = UploadHandler.get_session(session_id)
+        if not metadata or 0 not in UploadHandler.get_received_chunks(session_id):
+            return b''
+        
+        size = min(size, metadata['chunk_size'])
+        partial_path = os.path.join(TEMP_CHUNK_DIR, session_id, PARTIAL_FILENAME)
+        with open(partial_path, 'rb') as f:
+            return f.read(size)
+    
+    @staticmethod
+    def iter_contiguous_bytes(session_id, poll_interval=PROGRESSIVE_POLL_INTERVAL,
+                              stall_timeout=PROGRESSIVE_STALL_TIMEOUT, stop=None):
+        """
+        Yield a session's file bytes in order as contiguous chunks arrive
+        
+        The partial file is opened once, so reading continues across the
+        rename done by finalize_partial_file.
+        
+        Args:
+            session_id: Session identifier (must have file_size)
+            poll_interval: Seconds between checks of stop while waiting for chunks
+            stall_timeout: Give up after this long without new data
+            stop: Optional threading.Event; once set, iteration ends quietly
+            
+        Yields:
+            Blocks of bytes of at most COPY_BUFFER_SIZE
+            
+        Raises:
+            Exception: if the upload stalls or the session is removed before it completes
+        """
+        metadata = UploadHandler.get_session(session_id)
+        if not metadata or not metadata.get('file_size'):
+            raise Exception('Progressive ingest needs a session with a known file_size')
+        
+        chunk_size = metadata['chunk_size']
+        file_size = metadata['file_size']
+        partial_path = os.path.join(TEMP_CHUNK_DIR, session_id, PARTIAL_FILENAME)
+        
+        # Register before listing, so no chunk lands unseen in between
+        progress = SessionProgress()
+        with _progress_lock:
+            _progress[session_id] = progress
+        
+        try:
+            if UploadHandler.get_session(session_id) is None:
+                raise Exception('Upload session was removed before it completed')
+            progress.add(UploadHandler.get_received_chunks(session_id))
+            
+            position = 0
+            # Unbuffered: read-ahead would cache preallocated zeros past the contiguous end
+            with open(partial_path, 'rb', buffering=0) as partial_file:
+                while position < file_size:
+                    with progress.cond:
+                        deadline = time.time() + stall_timeout
+                        while True:
+                            if progress.state == 'removed':
+                                raise Exception('Upload session was removed before it completed')
+                            if progress.state == 'complete':
+                                available = file_size
+                            else:
+                                available = min(progress.contiguous * chunk_size, file_size)
+                            if available > position:
+                                break
+                            if stop is not None and stop.is_set():
+                                return
+                            remaining = deadline - time.time()
+                            if remaining <= 0:
+                                raise Exception(f'Upload stalled at {position}/{file_size} bytes')
+                            progress.cond.wait(min(poll_interval, remaining))
+                    
+                    partial_file.seek(position)
+                    while position < available:
+                        block = partial_file.read(min(COPY_BUFFER_SIZE, available - position))
+                        if not block:
+                            break
+                        position += len(block)
+                        yield block
+        finally:
+            with _progress_lock:
+                if _progress.get(session_id) is progress:
+                    del _progress[session_id]
+    
+    @staticmethod
+    def is_session_stalled(session_id, stall_timeout=PROGRESSIVE_STALL_TIMEOUT):
+        """True if a session is gone or has had no chunk written for stall_timeout seconds"""
+        session_dir = os.path.join(TEMP_CHUNK_DIR, session_id)
+        try:
+            last_write = max(entry.stat().st_mtime for entry in os.scandir(session_dir))
+        except (OSError, ValueError):
+            return True
+        return time.time() - last_write > stall_timeout
+    
+    @staticmethod
+    def _end_progress(session_id, state):
+        """Tell a progressive reader the session is 'complete' or 'removed'"""
+        progress = _progress.get(session_id)
+        if progress:
+            progress.end(state)
+    
+    @staticmethod
+    def _complete_if_ready(session_id, chunk_index, total_chunks, filename, chunk_size=None):
+        """Finalize the upload if every chunk is in and no other request got there first
+        
+        chunk_size is set for in-place uploads and None for chunk files to merge.
+        """
+        if len(UploadHandler.get_received_chunks(session_id)) < total_chunks:
+            return {
+                'status': 'chunk_received',
+                'message': f'Chunk {chunk_index + 1}/{total_chunks} received',
+                'chunk_index': chunk_index
+            }
+        
+        # Exclusive create, so concurrent final chunks finalize exactly once
+        marker_path = os.path.join(TEMP_CHUNK_DIR, session_id, COMPLETION_MARKER)
+        try:
+            os.close(os.open(marker_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return {
+                'status': 'chunk_received',
+                'message': 'Upload is already being finalized',
+                'chunk_index': chunk_index
+            }
+        
+        if chunk_size:
+            with UPLOAD_FINALIZE_SECONDS.time(mode='in_place'):
+                final_file = UploadHandler.finalize_partial_file(session_id, filename)
+        else:
+            with UPLOAD_FINALIZE_SECONDS.time(mode='merge'):
+                final_file = UploadHandler.merge_chunks(session_id, total_chunks, filename)
+        
+        if final_file:
+            # One sequential read; chunks arrive in any order, so they can't be hashed as they're written
+            content_hash = UploadHandler.get_content_hash(final_file)
+            return {
+                'status': 'success',
+                'message': 'File upload complete',
+                'file_path': final_file,
+                'chunks_processed': total_chunks,
+                'content_hash': content_hash
+            }
+        else:
+            # Let a retried chunk attempt finalization again
+            try:
+                os.remove(marker_path)
+            except OSError:
+                pass
+            return {
+                'status': 'error',
+                'message': 'Failed to merge chunks'
+            }
+    
+    @staticmethod
+    def write_chunk_at_offset(stream, session_id, offset, file_size=None, length=None):
+        """
+        Stream a chunk into the session's partial file at a byte offset
+        
+        Args:
+            stream: Readable binary stream with the chunk data
+            session_id: Session identifier
+            offset: Byte offset of the chunk in the final file
+            file_size: Total file size, used to preallocate the partial file
+            length: Exact size of the chunk's slot; nothing is written past it
+            
+        Returns:
+            Number of bytes written
+            
+        Raises:
+            ChunkLengthError: if the stream holds more than length bytes
+        """
+        partial_path = os.path.join(TEMP_CHUNK_DIR, session_id, PARTIAL_FILENAME)
+        fd = os.open(partial_path, os.O_RDWR | os.O_CREAT, 0o644)
+        
+        try:
+            if file_size and os.fstat(fd).st_size < file_size:
+                UploadHandler._preallocate(fd, file_size)
+            
+            written = 0
+            while length is None or written < length:
+                size = COPY_BUFFER_SIZE if length is None else min(COPY_BUFFER_SIZE, length - written)
+                buffer = stream.read(size)
+                if not buffer:
+                    break
+                view = memoryview(buffer)
+                while view:
+                    count = os.pwrite(fd, view, offset + written)
+                    view = view[count:]
+                    written += count
+            
+            # A longer body would spill into the next chunk's bytes
+            if length is not None and written == length and stream.read(1):
+                raise ChunkLengthError(f'Chunk at offset {offset} is longer than {length} bytes')
+            
+            return written
+        finally:
+            os.close(fd)
+    
+    @staticmethod
+    def _preallocate(fd, size):
+        """Reserve disk space for the final file up front"""
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except (AttributeError, OSError):
+            # Not supported on this platform/filesystem, fall back to a sparse file
+            os.ftruncate(fd, size)
+    
+    @staticmethod
+    @tracing.traced('upload.finalize')
+    def finalize_partial_file(session_id, original_filename):
+        """
+        Move a fully written partial file into the uploads directory
+        
+        Args:
+            session_id: Session identifier
+            original_filename: Original filename
+            
+        Returns:
+            Path to final file or None if failed
+        """
+        try:
+            session_dir = os.path.join(TEMP_CHUNK_DIR, session_id)
+            partial_path = os.path.join(session_dir, PARTIAL_FILENAME)
+            
+            unique_id = str(uuid.uuid4())[:8]
+            file_ext = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else 'mp4'
+            final_filename = secure_filename(f"video_{unique_id}.{file_ext}")
+            final_path = os.path.join(UPLOAD_DIR, final_filename)
+            
+            # Rename within the same filesystem, no data is copied
+            shutil.move(partial_path, final_path)
+            UploadHandler._end_progress(session_id, 'complete')
+            UploadHandler.cleanup_session(session_id)
+            
+            final_size = os.path.getsize(final_path)
+            logger.info(f"File upload finalized: {final_filename} ({final_size} bytes)")
+            
+            return final_path
+        
+        except Exception as e:
+            logger.error(f"Error finalizing upload: {str(e)}", exc_info=True)
+            return None
+    
+    @staticmethod
+    def _copy_file_into(src_path, dst_fd):
+        """Append a file to dst_fd using kernel-side copies where available"""
+        with open(src_path, 'rb') as src:
+            remaining = os.fstat(src.fileno()).st_size
+            
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst_fd, remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                return
+            except (AttributeError, OSError):
+                pass
+            
+            try:
+                offset = os.fstat(src.fileno()).st_size - remaining
+                while remaining > 0:
+                    copied = os.sendfile(dst_fd, src.fileno(), offset, remaining)
+                    if copied == 0:
+                        break
+                    offset += copied
+                    remaining -= copied
+                return
+            except (AttributeError, OSError):
+                pass
+            
+            # Portable fallback with a bounded buffer
+            src.seek(os.fstat(src.fileno()).st_size - remaining)
+            with os.fdopen(os.dup(dst_fd), 'ab') as dst:
+                shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+    
+    @staticmethod
+    @tracing.traced('upload.merge')
     def merge_chunks(session_id, total_chunks, original_filename):
         """
         Merge all chunks into a single file
@@ -158,17 +837,14 @@ class UploadHandler:
                         raise Exception(f"Chunk {chunk_index} is missing")
                     
                     # Append chunk to final file
-                    with open(chunk_path, 'rb') as chunk_file:
-                        final_file.write(chunk_file.read())
+                    UploadHandler._copy_file_into(chunk_path, final_file.fileno())
                     
                     # Clean up chunk file
                     os.remove(chunk_path)
             
             # Clean up session directory
-            try:
-                os.rmdir(session_dir)
-            except:
-                pass
+            UploadHandler._end_progress(session_id, 'complete')
+            UploadHandler.cleanup_session(session_id)
             
             final_size = os.path.getsize(final_path)
             logger.info(f"File merge complete: {final_filename} ({final_size} bytes)")
@@ -182,6 +858,8 @@ class UploadHandler:
     @staticmethod
     def cleanup_session(session_id):
         """Clean up temporary files for a session"""
+        # A reader still waiting for chunks must not take the missing session as a finished one
+        UploadHandler._end_progress(session_id, 'removed')
         try:
             session_dir = os.path.join(TEMP_CHUNK_DIR, session_id)
             if os.path.exists(session_dir):
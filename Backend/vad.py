@@ -0,0 +1,171 @@
+import os
+import bisect
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Voice activity detection configuration
+VAD_ENABLED = os.getenv('VAD_ENABLED', 'true').lower() == 'true'
+VAD_FRAME_MS = int(os.getenv('VAD_FRAME_MS', 30))
+VAD_MARGIN_DB = float(os.getenv('VAD_MARGIN_DB', 12))  # above the noise floor
+VAD_MIN_THRESHOLD_DB = float(os.getenv('VAD_MIN_THRESHOLD_DB', -55))  # dBFS
+VAD_MAX_THRESHOLD_DB = float(os.getenv('VAD_MAX_THRESHOLD_DB', -35))  # dBFS
+VAD_PADDING_SECONDS = float(os.getenv('VAD_PADDING_SECONDS', 0.3))
+VAD_MIN_SILENCE_SECONDS = float(os.getenv('VAD_MIN_SILENCE_SECONDS', 1.0))
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2
+
+# Process-wide totals for /health
+_totals = {'audio_seconds': 0.0, 'speech_seconds': 0.0}
+_totals_lock = threading.Lock()
+
+
+def get_vad_stats():
+    """Seconds of audio seen and kept by all filters in this process"""
+    with _totals_lock:
+        audio = _totals['audio_seconds']
+        speech = _totals['speech_seconds']
+    return {
+        'enabled': VAD_ENABLED,
+        'audio_seconds': round(audio, 1),
+        'speech_seconds': round(speech, 1),
+        'skipped_ratio': round(1 - speech / audio, 4) if audio else 0.0
+    }
+
+
+class VoiceActivityFilter:
+    """
+    Drops non-speech audio before ASR and maps caption times back
+
+    filter() takes (offset_seconds, pcm_bytes) windows of 16 kHz mono s16le
+    and yields windows of the same length containing only speech, on a
+    compressed timeline. Every kept span is recorded in an offset map so
+    to_original() can turn compressed times back into times in the source.
+    """
+
+    def __init__(self, frame_ms=VAD_FRAME_MS, margin_db=VAD_MARGIN_DB,
+                 padding_seconds=VAD_PADDING_SECONDS, min_silence_seconds=VAD_MIN_SILENCE_SECONDS):
+        self.frame_samples = SAMPLE_RATE * frame_ms // 1000
+        self.margin_db = margin_db
+        self.padding_frames = int(round(padding_seconds * 1000 / frame_ms))
+        self.min_silence_frames = int(round(min_silence_seconds * 1000 / frame_ms))
+
+        self.noise_floor_db = None
+
+        # Offset map: compressed start -> original start, one entry per kept span
+        self._compressed_starts = []
+        self._original_starts = []
+
+        self.audio_seconds = 0.0
+        self.speech_seconds = 0.0
+        self.finished = False
+
+    def speech_mask(self, samples):
+        """
+        Classify each VAD frame of a window as speech or not
+
+        Args:
+            samples: int16 NumPy array
+
+        Returns:
+            Boolean array, one entry per frame (the last partial frame included)
+        """
+        num_frames = -(-len(samples) // self.frame_samples)
+        padded = np.zeros(num_frames * self.frame_samples, dtype=np.float32)
+        padded[:len(samples)] = samples
+        frames = padded.reshape(num_frames, self.frame_samples) / 32768.0
+
+        # Frame RMS in dBFS
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+
+        # Track the quietest background level seen so far
+        floor = float(np.percentile(energy_db, 10))
+        self.noise_floor_db = floor if self.noise_floor_db is None else min(self.noise_floor_db, floor)
+        threshold = np.clip(self.noise_floor_db + self.margin_db, VAD_MIN_THRESHOLD_DB, VAD_MAX_THRESHOLD_DB)
+
+        mask = energy_db > threshold
+
+        # Keep pauses shorter than min_silence so sentences aren't chopped up
+        edges = np.diff(np.concatenate(([1], mask.astype(np.int8), [1])))
+        gap_starts = np.flatnonzero(edges == -1)
+        gap_ends = np.flatnonzero(edges == 1)
+        for start, end in zip(gap_starts, gap_ends):
+            if end - start < self.min_silence_frames and 0 < start and end < len(mask):
+                mask[start:end] = True
+
+        # Pad speech so word onsets and tails survive
+        if self.padding_frames and mask.any():
+            kernel = np.ones(2 * self.padding_frames + 1, dtype=np.int32)
+            mask = np.convolve(mask.astype(np.int32), kernel, mode='same') > 0
+
+        return mask
+
+    def filter(self, windows):
+        """
+        Yield speech-only windows on the compressed timeline
+
+        Args:
+            windows: Iterable of (offset_seconds, pcm_bytes)
+        """
+        buffer = bytearray()
+        window_bytes = None
+        emitted = 0.0  # compressed offset of the next yielded window
+
+        for offset, pcm in windows:
+            window_bytes = window_bytes or len(pcm)
+            samples = np.frombuffer(pcm, dtype=np.int16)
+            self.audio_seconds += len(samples) / float(SAMPLE_RATE)
+            if len(samples) == 0:
+                continue
+
+            mask = self.speech_mask(samples)
+
+            # Runs of speech frames -> sample ranges
+            edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+            starts = np.flatnonzero(edges == 1) * self.frame_samples
+            ends = np.minimum(np.flatnonzero(edges == -1) * self.frame_samples, len(samples))
+
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                self._compressed_starts.append(self.speech_seconds)
+                self._original_starts.append(offset + start / float(SAMPLE_RATE))
+                self.speech_seconds += (end - start) / float(SAMPLE_RATE)
+                buffer.extend(samples[start:end].tobytes())
+
+            while len(buffer) >= window_bytes:
+                yield emitted, bytes(buffer[:window_bytes])
+                del buffer[:window_bytes]
+                emitted += window_bytes / float(SAMPLE_RATE * BYTES_PER_SAMPLE)
+
+        if buffer:
+            yield emitted, bytes(buffer)
+
+        self.finished = True
+        with _totals_lock:
+            _totals['audio_seconds'] += self.audio_seconds
+            _totals['speech_seconds'] += self.speech_seconds
+
+        if self.audio_seconds:
+            logger.info(f"VAD kept {self.speech_seconds:.1f}s of {self.audio_seconds:.1f}s "
+                        f"({100 * (1 - self.speech_seconds / self.audio_seconds):.0f}% skipped)")
+
+    def to_original(self, seconds, is_end=False):
+        """
+        Map a time on the compressed timeline to the source timeline
+
+        An end time exactly on a span boundary stays in the earlier span.
+        """
+        search = bisect.bisect_left if is_end else bisect.bisect_right
+        index = search(self._compressed_starts, seconds) - 1
+        if index < 0:
+            return seconds
+        return self._original_starts[index] + (seconds - self._compressed_starts[index])
+
+    def remap_captions(self, captions):
+        """Rewrite caption start/end times in place from compressed to source time"""
+        for caption in captions:
+            caption['start_time'] = self.to_original(caption['start_time'])
+            caption['end_time'] = self.to_original(caption['end_time'], is_end=True)
+        return captions
@@ -0,0 +1,293 @@
+import os
+import math
+import logging
+import threading
+import numpy as np
+from stt_engine import STTEngine, PCM_BYTES_PER_SECOND
+from caption_segmenter import caption_segmenter
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# Local Whisper configuration
+WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'base')
+WHISPER_COMPUTE_TYPE = os.getenv('WHISPER_COMPUTE_TYPE', 'int8')  # int8 | float32
+WHISPER_BATCH_SIZE = int(os.getenv('WHISPER_BATCH_SIZE', 4))
+WHISPER_CPU_THREADS = int(os.getenv('WHISPER_CPU_THREADS', 0))  # 0 = library default
+WHISPER_COST_PER_MINUTE = float(os.getenv('WHISPER_COST_PER_MINUTE', 0.0))
+
+# Sarvam-style codes whose Whisper language differs from the prefix
+WHISPER_LANGUAGES = {
+    'od': None,  # Odia isn't a Whisper language; let it detect
+}
+
+# (model name, compute type) -> loaded model, one per process
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_model(model_name=WHISPER_MODEL, compute_type=WHISPER_COMPUTE_TYPE):
+    """
+    Load a Whisper model once per process and keep it resident
+
+    Uses faster-whisper (CTranslate2, native int8 on CPU) when installed,
+    otherwise openai-whisper with dynamic int8 quantization of its Linear layers.
+
+    Returns:
+        Tuple of (backend name, model)
+    """
+    key = (model_name, compute_type)
+
+    with _models_lock:
+        if key in _models:
+            return _models[key]
+
+        try:
+            from faster_whisper import WhisperModel
+            try:
+                from faster_whisper import BatchedInferencePipeline
+            except ImportError:
+                BatchedInferencePipeline = None
+
+            model = WhisperModel(
+                model_name,
+                device='cpu',
+                compute_type=compute_type,
+                cpu_threads=WHISPER_CPU_THREADS
+            )
+            if BatchedInferencePipeline:
+                loaded = ('faster-whisper-batched', BatchedInferencePipeline(model=model))
+            else:
+                loaded = ('faster-whisper', model)
+
+        except ImportError:
+            import torch
+            import whisper
+
+            if WHISPER_CPU_THREADS:
+                torch.set_num_threads(WHISPER_CPU_THREADS)
+
+            model = whisper.load_model(model_name, device='cpu')
+            if compute_type == 'int8':
+                model, quantized = quantize_int8(model)
+                if not quantized:
+                    logger.warning(f"int8 quantization left Whisper {model_name} unchanged, running float32")
+            loaded = ('openai-whisper', model)
+
+        _models[key] = loaded
+        logger.info(f"Whisper model loaded: {model_name} ({compute_type}, {loaded[0]})")
+        return loaded
+
+
+def quantize_int8(model):
+    """
+    Dynamic int8 quantization of an openai-whisper model's Linear layers
+
+    quantize_dynamic matches module types exactly, and openai-whisper builds its
+    layers from a Linear subclass (it only casts the weight to the input dtype,
+    a no-op in float32), so those are turned into plain nn.Linear first.
+
+    Returns:
+        Tuple of (model, number of layers quantized)
+    """
+    import torch
+    import whisper.model
+    from torch.ao.nn.quantized.dynamic import Linear as QuantizedLinear
+
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model, sum(1 for module in model.modules() if isinstance(module, QuantizedLinear))
+
+
+class WhisperSTTEngine(STTEngine):
+    """Local CPU speech-to-text with a resident Whisper model"""
+
+    name = 'whisper'
+    cost_per_minute = WHISPER_COST_PER_MINUTE
+    default_rtf = 0.5
+    # One inference at a time per process; batching provides the parallelism
+    max_workers = 1
+
+    def __init__(self, model_name=WHISPER_MODEL, compute_type=WHISPER_COMPUTE_TYPE,
+                 batch_size=WHISPER_BATCH_SIZE, preload=False):
+        super().__init__()
+        self.model_name = model_name
+        self.compute_type = compute_type
+        self.batch_size = max(1, batch_size)
+        self.STT_MODEL = f"whisper-{model_name}/{compute_type}"
+
+        # The model isn't safe to run from several threads at once
+        self._infer_lock = threading.Lock()
+
+        if preload:
+            load_model(model_name, compute_type)
+
+        logger.info(f"Whisper STT engine initialized ({model_name}, {compute_type}, batch {self.batch_size})")
+
+    @staticmethod
+    def _whisper_options(language_code):
+        """Map a language code to Whisper (language, task)"""
+        prefix = (language_code or 'en-IN').split('-')[0]
+
+        # The pipeline asks for English captions and translates them afterwards
+        if prefix == 'en':
+            return None, 'translate'
+        return WHISPER_LANGUAGES.get(prefix, prefix), 'transcribe'
+
+    @tracing.traced('whisper.infer')
+    def _infer(self, audio, language_code):
+        """
+        Run the model on a file path or float32 16 kHz samples
+
+        Returns:
+            List of timed words as (start_seconds, end_seconds, word, confidence)
+        """
+        backend, model = load_model(self.model_name, self.compute_type)
+        language, task = self._whisper_options(language_code)
+
+        with self._infer_lock:
+            if backend == 'openai-whisper':
+                result = model.transcribe(audio, language=language, task=task, verbose=None, fp16=False,
+                                          word_timestamps=True)
+                segments = [
+                    (s['start'], s['end'], s['text'], s.get('avg_logprob', 0.0),
+                     [(w['start'], w['end'], w['word'], w.get('probability', 0.0)) for w in s.get('words') or []])
+                    for s in result['segments']
+                ]
+            else:
+                kwargs = {'batch_size': self.batch_size} if backend == 'faster-whisper-batched' else {}
+                segments, _ = model.transcribe(audio, language=language, task=task, word_timestamps=True,
+                                               **kwargs)
+                segments = [
+                    (s.start, s.end, s.text, s.avg_logprob,
+                     [(w.start, w.end, w.word, w.probability) for w in s.words or []])
+                    for s in segments
+                ]
+
+        words = []
+        for start, end, text, avg_logprob, segment_words in segments:
+            words.extend(segment_words or self._spread_words(start, end, text, min(1.0, math.exp(avg_logprob))))
+        return words
+
+    @staticmethod
+    def _spread_words(start, end, text, confidence):
+        """Words of a segment without word timestamps, timed evenly by length across it"""
+        tokens = text.split()
+        total = float(sum(len(token) for token in tokens))
+        words = []
+        position = start
+        for token in tokens:
+            duration = (end - start) * len(token) / total
+            words.append((position, position + duration, token, confidence))
+            position += duration
+        return words
+
+    def _captions(self, words):
+        """Group timed words into captions under the CAPTION_* limits"""
+        if not words:
+            return []
+        starts, ends, texts, confidences = zip(*words)
+        return caption_segmenter.segment(list(texts), starts, ends, confidences)
+
+    @tracing.traced('stt.language_id')
+    def detect_language(self, pcm, sample_rate=16000, sample_width=2):
+        """Identify the spoken language with Whisper's language-ID head"""
+        backend, model = load_model(self.model_name, self.compute_type)
+        audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+        with self._infer_lock:
+            if backend == 'openai-whisper':
+                import whisper
+                mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), model.dims.n_mels)
+                _, probs = model.detect_language(mel.to(model.device))
+                language = max(probs, key=probs.get)
+                probability = probs[language]
+            else:
+                # Segments are decoded lazily, so this only runs detection
+                _, info = model.transcribe(audio)
+                language, probability = info.language, info.language_probability
+
+        return f"{language}-IN", probability
+
+    def transcribe_audio(self, audio_file_path, language_code='en-IN'):
+        """Transcribe a whole audio file"""
+        try:
+            if not os.path.exists(audio_file_path):
+                return {
+                    'status': 'error',
+                    'message': f'Audio file not found: {audio_file_path}'
+                }
+
+            captions = self._captions(self._infer(audio_file_path, language_code))
+            return dict(self._to_result(captions, 0.0), language=language_code, engine=self.name)
+
+        except Exception as e:
+            logger.error(f"Whisper transcription error: {str(e)}", exc_info=True)
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
+
+    def _transcribe_pcm(self, pcm, offset, language_code, sample_rate=16000, sample_width=2):
+        """Transcribe one window of mono PCM and offset its caption timestamps"""
+        return self._transcribe_batch([(offset, pcm)], language_code)[0]
+
+    def _transcribe_batch(self, windows, language_code):
+        """
+        Transcribe windows in as few inference calls as possible
+
+        Contiguous windows are joined into one array, so the batched
+        pipeline decodes their 30-second chunks together; captions are then
+        handed back to the window they start in.
+        """
+        try:
+            results = []
+            for run in self._contiguous_runs(windows):
+                run_offset = run[0][0]
+                audio = np.frombuffer(b''.join(pcm for _, pcm in run), dtype=np.int16).astype(np.float32) / 32768.0
+                captions = self._captions(self._infer(audio, language_code))
+
+                bounds = [offset - run_offset for offset, _ in run[1:]] + [math.inf]
+                per_window = [[] for _ in run]
+                for caption in captions:
+                    index = next(i for i, bound in enumerate(bounds) if caption['start_time'] < bound)
+                    per_window[index].append(caption)
+
+                results.extend(self._to_result(window_captions, run_offset) for window_captions in per_window)
+
+            return results
+
+        except Exception as e:
+            logger.error(f"Whisper batch error at {windows[0][0]:.1f}s: {str(e)}", exc_info=True)
+            return [{'status': 'error', 'message': str(e)} for _ in windows]
+
+    @staticmethod
+    def _contiguous_runs(windows):
+        """Split (offset, pcm) windows into runs with no gap between them"""
+        runs = []
+        for offset, pcm in windows:
+            if runs:
+                last_offset, last_pcm = runs[-1][-1]
+                if abs(last_offset + len(last_pcm) / float(PCM_BYTES_PER_SECOND) - offset) < 1e-3:
+                    runs[-1].append((offset, pcm))
+                    continue
+            runs.append([(offset, pcm)])
+        return runs
+
+    @staticmethod
+    def _to_result(captions, offset):
+        captions = [
+            dict(caption, start_time=caption['start_time'] + offset, end_time=caption['end_time'] + offset)
+            for caption in captions
+        ]
+
+        return {
+            'status': 'success',
+            'text': ' '.join(' '.join(caption['text'].split()) for caption in captions),
+            'confidence': sum(c['confidence'] for c in captions) / len(captions) if captions else 0.0,
+            'captions': captions,
+            'raw_response': None
+        }
@@ -5,6 +5,8 @@ import LanguageSelector from './components/LanguageSelector'; // This import is
 // Backend server URL
 const BACKEND_URL = 'http://localhost:8080';
 const CHUNK_SIZE = 5 * 1024 * 1024; // 5MB
+const PARALLEL_CHUNKS = 4;
+const MAX_CHUNK_RETRIES = 3;
 
 // --- GLOBAL STYLES ---
 const GlobalStyles = () => (
@@ -250,6 +252,7 @@ const GlobalStyles = () => (
       margin: 0 0 15px 0;
       text-shadow: 2px 2px 4px rgba(0, 0, 0, 0.2);
       word-wrap: break-word;
+      white-space: pre-line;
     }
 
     .caption-timestamp {
@@ -346,35 +349,79 @@ const VideoUploader = ({ onVideoSelected, socket, language }) => {
         return;
     }
     const totalChunks = Math.ceil(file.size / CHUNK_SIZE);
-    const sessionId = `${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
-
-    for (let i = 0; i < totalChunks; i++) {
-      const start = i * CHUNK_SIZE;
-      const end = Math.min(start + CHUNK_SIZE, file.size);
-      const chunk = file.slice(start, end);
-
-      const formData = new FormData();
-      formData.append('file', chunk);
-      formData.append('chunk_index', i.toString());
-      formData.append('total_chunks', totalChunks.toString());
-      formData.append('session_id', sessionId);
-      formData.append('filename', file.name);
-      formData.append('language', lang);
-
-      try {
-        const response = await fetch(`${BACKEND_URL}/upload`, { 
-            method: 'POST', 
-            body: formData,
-            credentials: 'include' 
-        });
-        if (!response.ok) { 
-            console.error("Chunk upload failed");
-            break;
-        }
-      } catch (error) {
-        console.error("Upload error:", error);
-        break;
+
+    // Reuse the session for the same file so an interrupted upload resumes
+    const resumeKey = `upload:${file.name}:${file.size}:${file.lastModified}`;
+    const sessionId = localStorage.getItem(resumeKey) ||
+      `${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
+    localStorage.setItem(resumeKey, sessionId);
+
+    try {
+      const initResponse = await fetch(`${BACKEND_URL}/upload/init`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({
+            session_id: sessionId,
+            filename: file.name,
+            file_size: file.size,
+            chunk_size: CHUNK_SIZE,
+            total_chunks: totalChunks,
+            language: lang
+          }),
+          credentials: 'include'
+      });
+      const session = await initResponse.json();
+      if (!initResponse.ok) {
+          console.error("Upload init failed:", session.message);
+          return;
       }
+
+      // Captions and status for this upload are only sent to the session's room
+      const joined = await socket.emitWithAck('join_session', { session_id: sessionId });
+      if (joined.status !== 'success') {
+          console.error("Could not join upload session:", joined.message);
+          return;
+      }
+
+      // Only send the chunks the server doesn't have yet
+      const pending = [];
+      for (let i = 0; i < totalChunks; i++) {
+        if (session.received[i] !== '1') pending.push(i);
+      }
+
+      const uploadChunk = async (i) => {
+        const start = i * CHUNK_SIZE;
+        const end = Math.min(start + CHUNK_SIZE, file.size);
+
+        for (let attempt = 0; attempt < MAX_CHUNK_RETRIES; attempt++) {
+          try {
+            // Raw body with Content-Range, no multipart encoding
+            const response = await fetch(`${BACKEND_URL}/upload/${sessionId}`, {
+                method: 'PUT',
+                headers: {
+                  'Content-Type': 'application/octet-stream',
+                  'Content-Range': `bytes ${start}-${end - 1}/${file.size}`
+                },
+                body: file.slice(start, end),
+                credentials: 'include'
+            });
+            if (response.ok) return;
+          } catch (error) {
+            console.error(`Chunk ${i} upload error:`, error);
+          }
+        }
+        throw new Error(`Chunk ${i} failed after ${MAX_CHUNK_RETRIES} attempts`);
+      };
+
+      const worker = async () => {
+        while (pending.length > 0) {
+          await uploadChunk(pending.shift());
+        }
+      };
+      await Promise.all(Array.from({ length: PARALLEL_CHUNKS }, worker));
+      localStorage.removeItem(resumeKey);
+    } catch (error) {
+      console.error("Upload error:", error);
     }
   };
 
@@ -483,6 +530,22 @@ const VideoPlayer = ({ videoSource, videoType, onTimeUpdate }) => {
 };
 
 // --- CAPTION DISPLAY ---
+const formatTime = (s) => {
+  if (!s && s !== 0) return '0:00';
+  const m = Math.floor(s / 60);
+  const sec = Math.floor(s % 60);
+  const ms = Math.floor((s % 1) * 100);
+  return `${m}:${sec.toString().padStart(2, '0')}.${ms.toString().padStart(2, '0')}`;
+};
+
+// Memoized so playback time updates only re-render the rows whose highlight changes
+const CaptionHistoryItem = React.memo(({ caption, active }) => (
+  <div className={`caption-item ${active ? 'highlight' : ''}`}>
+    <span className="time-badge">{formatTime(caption.start_time)}</span>
+    <p className="caption-text">{caption.text}</p>
+  </div>
+));
+
 const CaptionDisplay = ({ captions, currentTime }) => {
   const [currentCaption, setCurrentCaption] = useState(null);
   const containerRef = useRef(null);
@@ -502,14 +565,6 @@ const CaptionDisplay = ({ captions, currentTime }) => {
     }
   }, [captions]);
 
-  const formatTime = (s) => {
-    if (!s && s !== 0) return '0:00';
-    const m = Math.floor(s / 60);
-    const sec = Math.floor(s % 60);
-    const ms = Math.floor((s % 1) * 100);
-    return `${m}:${sec.toString().padStart(2, '0')}.${ms.toString().padStart(2, '0')}`;
-  };
-
   return (
     <div className="caption-display-container">
       <h3>📝 Real-Time Captions</h3>
@@ -532,11 +587,12 @@ const CaptionDisplay = ({ captions, currentTime }) => {
         {captions.length === 0 ? (
             <p className="empty-message">No captions yet.</p>
         ) : (
-            captions.map((c, i) => (
-              <div key={i} className={`caption-item ${currentCaption === c ? 'highlight' : ''}`}>
-                <span className="time-badge">{formatTime(c.start_time)}</span>
-                <p className="caption-text">{c.text}</p>
-              </div>
+            captions.map((c) => (
+              <CaptionHistoryItem
+                key={`${c.start_time}|${c.text}`}
+                caption={c}
+                active={currentCaption === c}
+              />
             ))
         )}
       </div>
@@ -573,15 +629,23 @@ export default function App() {
         setServerStatus(`Connection Error: ${error.message}`);
     });
     
-    newSocket.on('new_caption', (c) =>
+    // Captions arrive coalesced, so each frame is a single state update
+    newSocket.on('caption_batch', (batch) => {
+      if (batch.encoding !== 'json') {
+        console.error(`Unsupported caption_batch encoding: ${batch.encoding}`);
+        return;
+      }
       setCaptions((prev) => {
-        const exists = prev.some(
-          (cap) => cap.start_time === c.start_time && cap.text === c.text
-        );
-        if (exists) return prev;
-        return [...prev, c].sort((a, b) => a.start_time - b.start_time)
-      })
-    );
+        const seen = new Set(prev.map((cap) => `${cap.start_time}|${cap.text}`));
+        const fresh = batch.captions.filter((c) => !seen.has(`${c.start_time}|${c.text}`));
+        if (fresh.length === 0) return prev;
+        return [...prev, ...fresh].sort((a, b) => a.start_time - b.start_time);
+      });
+    });
+    // Sent before a failed job's captions are re-sent from scratch
+    newSocket.on('captions_reset', () => {
+      setCaptions([]);
+    });
     newSocket.on('status', (statusMessage) => {
         console.log('Server Status:', statusMessage);
         setServerStatus(statusMessage);
@@ -76,3 +76,41 @@ export const extractAudioFromVideo = async (videoFile) => {
     });
   });
 };
+
+// Stream microphone (or any MediaStream) audio to the backend's /live namespace.
+// `socket` must be connected to `${BACKEND_URL}/live`. Returns a function that
+// stops recording; the server then finalizes the last captions and sends live_ended.
+export const startLiveCaptions = async (socket, { language, spokenLanguage, onPartial, onFinal, stream }) => {
+  const media = stream || await navigator.mediaDevices.getUserMedia({ audio: true });
+
+  const started = await socket.emitWithAck('start', {
+    language,
+    spoken_language: spokenLanguage || language,
+    format: 'opus'
+  });
+  if (started.status !== 'success') {
+    throw new Error(started.message);
+  }
+
+  // Partials replace each other; finals are appended
+  socket.on('live_partial', onPartial);
+  socket.on('live_final', onFinal);
+
+  const recorder = new MediaRecorder(media, { mimeType: 'audio/webm;codecs=opus' });
+  recorder.ondataavailable = async (event) => {
+    if (event.data.size > 0) {
+      socket.emit('audio', await event.data.arrayBuffer());
+    }
+  };
+  // Sent after the last dataavailable, so the server has all the audio
+  recorder.onstop = () => socket.emit('stop');
+
+  // Short timeslices keep end-to-end latency low
+  recorder.start(250);
+
+  return () => {
+    if (recorder.state !== 'inactive') recorder.stop();
+    socket.off('live_partial', onPartial);
+    socket.off('live_final', onFinal);
+  };
+};